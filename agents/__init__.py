@@ -0,0 +1 @@
+"""LLM plumbing for the AstroGen readings and chat."""
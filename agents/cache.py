@@ -0,0 +1,132 @@
+"""
+Persistent cache of LLM readings.
+
+Keys are sha256 of (agent type, prompt version, canonical chart summary,
+model, temperature), so the same chart asked the same question by any
+session or process is answered from disk. Entries expire after a TTL and
+the table is trimmed least-recently-used first by total text size and
+entry count. Only complete answers are stored; failed or interrupted
+streams never are.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.getenv("ASTROGEN_LLM_CACHE") or os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "astrogen", "llm.sqlite3",
+)
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+def response_cache_key(agent_type, prompt_version, chart_summary, model, temperature):
+    parts = [str(agent_type), str(prompt_version), " ".join(str(chart_summary).split()),
+             str(model), repr(float(temperature))]
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+def chart_fingerprint(chart_summary):
+    """Key for 'this chart' independent of agent/model (used for fallbacks)."""
+    return hashlib.sha256(" ".join(str(chart_summary).split()).encode()).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed text cache with TTL and LRU trimming by bytes and count."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, agent TEXT NOT NULL, chart TEXT NOT NULL, text TEXT NOT NULL,"
+            " size INTEGER NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_chart ON responses(chart, agent, created)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT text, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key, text, agent="", chart=""):
+        now = time.time()
+        size = len(text.encode())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, agent, chart, text, size, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, agent, chart, text, size, now, now),
+            )
+            self._trim()
+
+    def _trim(self):
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # walk oldest-first, dropping until both limits hold
+        drop, freed = [], 0
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used ASC"):
+            if count - len(drop) <= self.max_entries and total - freed <= self.max_bytes:
+                break
+            drop.append(key)
+            freed += size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k in drop])
+
+    def latest_for(self, chart, agent):
+        """Most recent unexpired answer by `agent` for a chart fingerprint, or None (fallback reads)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text FROM responses WHERE chart = ? AND agent = ? AND created >= ?"
+                " ORDER BY created DESC LIMIT 1",
+                (chart, agent, time.time() - self.ttl),
+            ).fetchone()
+        return row[0] if row else None
+
+    def purge_expired(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+
+def stream_through_cache(cache, key, make_stream, agent="", chart="", metrics=None):
+    """
+    Yield the cached answer for `key` in one piece, or stream `make_stream()`
+    and store the complete text once the stream finishes without error.
+    """
+    text = cache.get(key)
+    if text is not None:
+        if metrics is not None:
+            metrics.cached = True
+        yield text
+        return
+    parts = []
+    for delta in make_stream():
+        parts.append(delta)
+        yield delta
+    if parts:
+        cache.put(key, "".join(parts), agent=agent, chart=chart)
@@ -1,12 +1,6 @@
-from openai import OpenAI
+from agents.registry import get_registry
 
-client = OpenAI()
 
 def career_agent(chat_history):
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=chat_history,
-        max_tokens=500,
-        temperature=0.8,
-    )
-    return response.choices[0].message.content.strip()
+    llm = get_registry()
+    return llm.complete(llm.request("career", chat_history)).strip()
@@ -0,0 +1,142 @@
+"""
+Compact chart context for LLM prompts.
+
+One serializer for the readings and the chat. Each section is rendered as
+terse pipe-separated lines (no repeated labels, no 'N/A' filler) and the
+whole context is fitted to a token budget by dropping sections in priority
+order, lowest first:
+
+    1 birth, planets      always kept
+    2 dasha               current / running sub-periods / upcoming
+    3 cusps               12 house cusps with star and sub lords
+    4 significators       four-level KP significators per planet
+
+Token counts use tiktoken when it is installed and a 4-characters-per-token
+estimate otherwise. Results are memoised per (chart, birth details, budget).
+"""
+import threading
+from collections import OrderedDict
+
+from kp_engine.houses import get_house_number_from_degree, kp_significators
+
+DEFAULT_TOKEN_BUDGET = 700
+CONTEXT_CACHE_SIZE = 1024
+_SECTION_PRIORITY = (('birth', 1), ('planets', 1), ('dasha', 2), ('cusps', 3), ('significators', 4))
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:           # optional dependency
+    _ENCODING = None
+
+
+def count_tokens(text):
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return (len(text) + 3) // 4
+
+
+def _join(*fields):
+    return "|".join(str(f) for f in fields if f not in (None, ""))
+
+
+def _birth(birth):
+    when = " ".join(str(x) for x in (birth.get('dob'), birth.get('tob_display')) if x)
+    return "Birth: " + ", ".join(str(x) for x in (when, birth.get('place'), birth.get('gender')) if x)
+
+
+def _planets(chart):
+    cusps = chart.get('house_cusps_degrees')
+    lines = ["Planets (sign deg|nakshatra pada/star lord|sub lord|house):"]
+    for name, p in chart.get('planets', {}).items():
+        house = f"H{get_house_number_from_degree(p['full_degree'], cusps)}" if cusps and 'full_degree' in p else ""
+        nak = f"{p.get('nakshatra', '')} {p.get('pada', '')}".strip()
+        lines.append(_join(f"{name} {p.get('sign', '')} {p.get('degree', '')}".strip(),
+                           f"{nak}/{p.get('nakshatra_lord', '')}", p.get('sublord'), house))
+    return "\n".join(lines)
+
+
+def _dasha(chart):
+    d = chart.get('dashas') or {}
+    lines = []
+    cur = d.get('current')
+    if cur:
+        lines.append(f"Dasha: {cur['lord']} {cur['start']}..{cur['end']}")
+    for p in (d.get('running') or [])[1:]:
+        lines.append(f"{p['level'].title()}: {p['path']} {p['start']}..{p['end']}")
+    up = d.get('upcoming')
+    if up:
+        lines.append(f"Next dasha: {up['lord']} from {up['start']}")
+    return "\n".join(lines)
+
+
+def _cusps(chart):
+    lines = ["Cusps (house sign deg|star lord|sub lord):"]
+    for i, h in enumerate(chart.get('houses', {}).values(), start=1):
+        lines.append(_join(f"{i} {h.get('sign', '')} {h.get('degree', '')}".strip(),
+                           h.get('nakshatra_lord'), h.get('sublord')))
+    return "\n".join(lines)
+
+
+def _significators(chart):
+    houses = chart.get('houses', {})
+    cusps = chart.get('house_cusps_degrees')
+    if not houses or not cusps:
+        return ""
+    sig = kp_significators(chart['planets'], cusps, [h['sign'] for h in houses.values()])
+    lines = ["Significators (A star lord occupies|B occupies|C star lord owns|D owns):"]
+    for name, s in sig.items():
+        lines.append(f"{name} " + "|".join(",".join(map(str, s[k])) or "-" for k in "abcd"))
+    return "\n".join(lines)
+
+
+_RENDERERS = {'planets': _planets, 'dasha': _dasha, 'cusps': _cusps, 'significators': _significators}
+
+
+def _cache_key(chart, birth):
+    planets = tuple((n, round(float(p.get('full_degree', 0.0)), 6)) for n, p in chart.get('planets', {}).items())
+    cusps = tuple(round(float(c), 6) for c in chart.get('house_cusps_degrees') or ())
+    d = chart.get('dashas') or {}
+    dasha = (str(d.get('current')), str(d.get('running')), str(d.get('upcoming')))
+    birth_key = tuple(str(birth.get(k, "")) for k in ('dob', 'tob_display', 'place', 'gender'))
+    return planets, cusps, dasha, birth_key
+
+
+def _build_context(chart, birth, budget):
+    sections = {'birth': _birth(birth)}
+    for name, render in _RENDERERS.items():
+        sections[name] = render(chart)
+
+    priority = dict(_SECTION_PRIORITY)
+    kept = [name for name, _ in _SECTION_PRIORITY if sections.get(name)]
+
+    def text():
+        return "\n".join(sections[n] for n in kept)
+
+    while count_tokens(text()) > budget:
+        droppable = [n for n in kept if priority[n] > 1]
+        if not droppable:
+            break
+        kept.remove(max(droppable, key=lambda n: priority[n]))
+    return text()
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def chart_context(chart, birth, budget=DEFAULT_TOKEN_BUDGET):
+    """Compact text context for `chart` within `budget` tokens (see module docstring)."""
+    birth = birth or {}
+    key = (_cache_key(chart, birth), budget)
+    with _cache_lock:
+        text = _cache.get(key)
+        if text is not None:
+            _cache.move_to_end(key)
+            return text
+    text = _build_context(chart, birth, budget)
+    with _cache_lock:
+        _cache[key] = text
+        while len(_cache) > CONTEXT_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return text
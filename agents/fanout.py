@@ -0,0 +1,300 @@
+"""
+Pooled, concurrency-limited LLM calls.
+
+`AsyncLLM` owns one background event loop and one AsyncOpenAI client per
+process, so every session shares the same HTTP connection pool. At most
+`max_concurrency` requests run at once; others wait up to `queue_timeout`
+for a slot and then fail with LLMBusyError, which is the backpressure under
+many simultaneous sessions. Connection errors, timeouts, 429s and 5xx
+responses are retried with full-jitter exponential backoff, but a stream is
+only retried before its first token. Deadlines, hedged duplicates and the
+circuit breaker are described in agents.resilience; a request dict may carry
+'deadline' and 'hedge_after' next to the create() arguments.
+
+`stream` yields one request's deltas to the calling thread, `complete`
+returns a whole answer, and `fan_out` starts several requests at once and
+yields their events as they happen:
+
+    ('delta', name, text)       a streamed chunk
+    ('done', name, metrics)     the stream finished; metrics is a CallMetrics
+    ('error', name, message)    the request failed
+
+Total fan-out wall time is roughly that of the slowest request, not the sum.
+"""
+import asyncio
+import queue
+import random
+import threading
+import time
+
+from agents.resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, CLOSED
+from agents.streaming import CallMetrics, _record
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5           # seconds; doubled per retry, then jittered
+DEFAULT_BACKOFF_CAP = 8.0
+DEFAULT_QUEUE_TIMEOUT = 30.0
+DEFAULT_DEADLINE = 120.0
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class LLMBusyError(RuntimeError):
+    """No concurrency slot became free within the queue timeout."""
+
+
+def _retryable(exc):
+    import openai
+    if isinstance(exc, openai.APIConnectionError):     # includes APITimeoutError
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code in RETRYABLE_STATUS
+
+
+def _provider_failure(exc):
+    """Failures that say something about the provider's health (for the breaker)."""
+    return isinstance(exc, DeadlineExceeded) or _retryable(exc)
+
+
+def _split(request):
+    """(create() kwargs, deadline, hedge_after) from a request dict."""
+    request = dict(request)
+    return request, request.pop('deadline', None) or DEFAULT_DEADLINE, request.pop('hedge_after', None)
+
+
+def _delta(chunk):
+    return chunk.choices[0].delta.content if chunk.choices else None
+
+
+def backoff_delay(attempt, base=DEFAULT_BACKOFF, cap=DEFAULT_BACKOFF_CAP):
+    """Full-jitter exponential backoff before retry number `attempt` (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AsyncLLM:
+    def __init__(self, api_key=None, base_url=None, max_connections=DEFAULT_MAX_CONNECTIONS, timeout=60.0,
+                 max_concurrency=None, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 queue_timeout=DEFAULT_QUEUE_TIMEOUT, breaker=None):
+        import httpx
+        from openai import AsyncOpenAI
+
+        self.max_concurrency = max_concurrency or max_connections
+        self.retries = retries
+        self.backoff = backoff
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-llm", daemon=True)
+        self._thread.start()
+
+        async def make_client():
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections),
+                timeout=timeout,
+            )
+            # retries are ours (jittered, and never after a stream has started)
+            return AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http, max_retries=0)
+
+        self.client = self.run(make_client())
+
+    def run(self, coro):
+        """Run a coroutine on the shared loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the shared loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _acquire(self, metrics=None):
+        queued = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise LLMBusyError(f"no LLM slot free within {self.queue_timeout:.0f}s") from None
+        finally:
+            if metrics is not None:
+                metrics.queue_wait = time.perf_counter() - queued
+
+    async def _open_stream(self, request):
+        """Start a stream and read up to its first content delta: (stream, iterator, delta | None)."""
+        stream = await self.client.chat.completions.create(stream=True, **request)
+        chunks = stream.__aiter__()
+        try:
+            async for chunk in chunks:
+                delta = _delta(chunk)
+                if delta:
+                    return stream, chunks, delta
+        except BaseException:
+            await stream.close()
+            raise
+        return stream, chunks, None
+
+    async def _create(self, request):
+        resp = await self.client.chat.completions.create(**request)
+        return resp.choices[0].message.content or ""
+
+    async def _hedged(self, start, hedge_after, metrics, discard=None):
+        """
+        Await start(); if it has not returned after `hedge_after` seconds, race
+        a second start() against it and return the first success. `discard`
+        tidies up a successful loser.
+        """
+        primary = asyncio.ensure_future(start())
+        tasks, hedge, hedge_slot = {primary}, None, False
+        try:
+            if hedge_after:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done and self.breaker.state == CLOSED and not self._slots.locked():
+                    await self._slots.acquire()         # free, so this does not wait
+                    hedge_slot = True
+                    hedge = asyncio.ensure_future(start())
+                    tasks.add(hedge)
+                    metrics.hedged = True
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((t for t in done if t.exception() is None), None)
+                if winner is None:
+                    error = next(iter(done)).exception()
+                    continue
+                metrics.hedge_won = winner is hedge
+                for other in done - {winner}:
+                    if other.exception() is None and discard is not None:
+                        await discard(other.result())
+                return winner.result()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            if hedge_slot:
+                self._slots.release()
+
+    async def _with_retries(self, start, hedge_after, metrics, discard=None):
+        for attempt in range(self.retries + 1):
+            try:
+                return await self._hedged(start, hedge_after, metrics, discard)
+            except Exception as e:
+                if attempt == self.retries or not _retryable(e):
+                    raise
+                metrics.retries += 1
+                await asyncio.sleep(backoff_delay(attempt, self.backoff))
+
+    async def _guarded(self, work, deadline, metrics=None):
+        """Run the coroutine `work()` under the breaker, a concurrency slot and the deadline."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM provider degraded; circuit breaker is open")
+        await self._acquire(metrics)
+        try:
+            try:
+                result = await asyncio.wait_for(work(), deadline)
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"no complete answer within {deadline:.0f}s") from None
+        except Exception as e:
+            if _provider_failure(e):
+                self.breaker.failure()
+            raise
+        finally:
+            self._slots.release()
+        self.breaker.success()
+        return result
+
+    async def _stream_into(self, name, events, request, metrics=None):
+        request, deadline, hedge_after = _split(request)
+        metrics = metrics or CallMetrics(label=name)
+        metrics.model = request.get('model', metrics.model)
+        metrics.started = time.perf_counter()
+
+        def emit(delta):
+            if metrics.first_token is None:
+                metrics.first_token = time.perf_counter()
+            metrics.chunks += 1
+            metrics.chars += len(delta)
+            events.put(('delta', name, delta))
+
+        async def discard(opened):
+            await opened[0].close()
+
+        async def work():
+            stream, chunks, first = await self._with_retries(
+                lambda: self._open_stream(request), hedge_after, metrics, discard)
+            try:
+                if first:
+                    emit(first)
+                async for chunk in chunks:
+                    delta = _delta(chunk)
+                    if delta:
+                        emit(delta)
+            finally:
+                await stream.close()
+
+        try:
+            await self._guarded(work, deadline, metrics)
+            metrics.finished = time.perf_counter()
+            events.put(('done', name, metrics))
+        except Exception as e:
+            metrics.finished = time.perf_counter()
+            metrics.error = f"{type(e).__name__}: {e}"
+            events.put(('error', name, metrics.error))
+        finally:
+            _record(metrics)
+
+    async def _complete(self, request, metrics):
+        request, deadline, hedge_after = _split(request)
+        metrics.model = request.get('model', metrics.model)
+        metrics.started = time.perf_counter()
+        try:
+            text = await self._guarded(
+                lambda: self._with_retries(lambda: self._create(request), hedge_after, metrics), deadline, metrics)
+            metrics.first_token = metrics.finished = time.perf_counter()
+            metrics.chars = len(text)
+            return text
+        except Exception as e:
+            metrics.finished = time.perf_counter()
+            metrics.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _record(metrics)
+
+    def complete(self, request, metrics=None):
+        """Whole (non-streamed) answer text for one chat.completions.create request."""
+        return self.run(self._complete(request, metrics or CallMetrics()))
+
+    def stream(self, request, metrics=None):
+        """
+        Yield the content deltas of one streamed request in the calling thread.
+        Raises RuntimeError if it fails (the message names the cause, e.g.
+        CircuitOpenError or DeadlineExceeded); closing the generator early
+        cancels the request.
+        """
+        events = queue.Queue()
+        future = self.submit(self._stream_into(metrics.label if metrics else "", events, request, metrics))
+        try:
+            while True:
+                event, _, payload = events.get()
+                if event == 'delta':
+                    yield payload
+                elif event == 'error':
+                    raise RuntimeError(payload)
+                else:
+                    return
+        finally:
+            future.cancel()
+
+    def fan_out(self, requests):
+        """
+        requests: {name: chat.completions.create kwargs (model, messages, max_tokens, ...)}.
+        Yields events (see module docstring) until every request has finished.
+        """
+        events = queue.Queue()
+        futures = [self.submit(self._stream_into(name, events, request)) for name, request in requests.items()]
+        remaining = len(requests)
+        try:
+            while remaining:
+                event = events.get()
+                if event[0] != 'delta':
+                    remaining -= 1
+                yield event
+        finally:
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,271 @@
+"""
+Load test for the AI paths, offline.
+
+    python -m agents.loadtest --users 40 --duration 60                  # against an in-process stand-in
+    python -m agents.loadtest --scripts sessions.json --base-url http://127.0.0.1:8900/v1
+
+Each virtual user is a thread that behaves like one Streamlit session: it
+picks a session script (weighted) and runs its steps through the same agent layer the app uses — LLMRegistry for the
+readings and fan-out, ChatMemory + llm_summarizer for the chat — with think
+time between steps. Unless --base-url is given, an agents.standin server is
+started in-process, configured by the same --ttft/--error-rate/... options.
+Charts are computed once, before the clock starts.
+
+A scripts file is a JSON list (or JSON Lines) of
+
+    {"name": "reader", "weight": 3,
+     "birth": {"dob": "15/08/1990", "tob": "05:30", "place": "Mumbai, India"},
+     "steps": [{"reading": "overall"}, {"think": 20}, {"chat": "When will I marry?"},
+               {"generate_all": true}]}
+
+The report gives, per step kind, calls, errors, throughput and p50/p95/p99
+of time to first token, total latency and time spent queued for a
+concurrency slot. The response cache is bypassed so every step reaches the
+model.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+from agents.memory import ChatMemory, llm_summarizer
+from agents.prompts import AGENTS, chat_system_prompt, reading_messages
+from agents.streaming import CallMetrics, _percentile
+
+DEFAULT_SCRIPTS = [
+    {"name": "single-reading", "weight": 3,
+     "birth": {"dob": "15/08/1990", "tob": "05:30", "place": "Mumbai, India", "gender": "Male"},
+     "steps": [{"reading": "overall"}, {"think": 25}, {"chat": "What does my current dasha mean for me?"},
+               {"think": 15}, {"chat": "When is a good time to change jobs?"}]},
+    {"name": "all-readings", "weight": 2,
+     "birth": {"dob": "02/03/1985", "tob": "14:10", "place": "New York, United States", "gender": "Female"},
+     "steps": [{"generate_all": True}, {"think": 40}, {"chat": "Will I marry this year?"}]},
+    {"name": "long-chat", "weight": 1,
+     "birth": {"dob": "21/11/1978", "tob": "22:45", "place": "London, United Kingdom", "gender": "Male"},
+     "steps": [{"chat": f"Follow-up question {i} about my career and health."} for i in range(12)]},
+]
+STEP_KINDS = ('reading', 'generate_all', 'chat', 'summary')
+
+
+def load_scripts(path):
+    with open(path, encoding="utf-8") as fh:
+        text = fh.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+# ---------- Charts ----------
+def _chart_for(birth, cache):
+    """(chart, birth details) for a script's birth record."""
+    from kp_engine.bulk_reports import _parse_date, _parse_time
+    from kp_engine.chart import calculate_comprehensive_chart
+
+    key = (birth['dob'], birth['tob'], birth['place'])
+    if key in cache:
+        return cache[key]
+    dob, tob = _parse_date(birth['dob']), _parse_time(birth['tob'])
+    chart, error = calculate_comprehensive_chart(dob, tob, birth['place'])
+    if chart is None:
+        raise RuntimeError(f"{birth['place']}: {error} (set ASTROGEN_GAZETTEER for offline geocoding)")
+    details = {'dob': dob, 'tob': tob, 'place': birth['place'], 'gender': birth.get('gender', ''),
+               'tob_display': tob.strftime('%I:%M %p')}
+    cache[key] = (chart, details)
+    return chart, details
+
+
+# ---------- Virtual user ----------
+class _Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = {k: [] for k in STEP_KINDS}
+        self.walls = {k: [] for k in STEP_KINDS}
+        self.errors = {k: 0 for k in STEP_KINDS}
+        self.chars = 0
+
+    def call(self, kind, metrics):
+        with self._lock:
+            self.calls[kind].append(metrics)
+            self.chars += metrics.chars
+            if metrics.error:
+                self.errors[kind] += 1
+
+    def wall(self, kind, seconds):
+        with self._lock:
+            self.walls[kind].append(seconds)
+
+
+def _run_session(llm, script, chart, birth, recorder, think_scale, stop_at, rng):
+    memory = ChatMemory()
+    summarize = llm_summarizer(llm, on_metrics=lambda m: recorder.call('summary', m))
+    for step in script['steps']:
+        now = time.monotonic()
+        if now >= stop_at:
+            return
+        if 'think' in step:
+            time.sleep(min(stop_at - now, step['think'] * think_scale * rng.uniform(0.5, 1.5)))
+
+        elif 'reading' in step:
+            metrics = CallMetrics(label='reading')
+            request = llm.request(step['reading'], reading_messages(step['reading'], chart, birth))
+            try:
+                for _ in llm.stream(request, metrics):
+                    pass
+            except RuntimeError:
+                pass                    # recorded in metrics.error
+            recorder.call('reading', metrics)
+
+        elif 'generate_all' in step:
+            requests = {a: llm.request(a, reading_messages(a, chart, birth)) for a in AGENTS}
+            started = time.perf_counter()
+            for event, name, payload in llm.fan_out(requests):
+                if event == 'done':
+                    recorder.call('generate_all', payload)
+                elif event == 'error':
+                    metrics = CallMetrics(label='generate_all')
+                    metrics.error = payload
+                    recorder.call('generate_all', metrics)
+            recorder.wall('generate_all', time.perf_counter() - started)
+
+        elif 'chat' in step:
+            question = step['chat']
+            memory.show("user", question)
+            messages = memory.history(chat_system_prompt(chart, birth))
+            messages.append({"role": "user", "content": question})
+            metrics = CallMetrics(label='chat')
+            parts = []
+            try:
+                for delta in llm.stream(llm.request('chat', messages), metrics):
+                    parts.append(delta)
+            except RuntimeError:
+                parts = []
+            recorder.call('chat', metrics)
+            if parts:
+                memory.add_turn(question, "".join(parts))
+                memory.fold(summarize)
+
+
+def _user(llm, scripts, charts, recorder, think_scale, stop_at, seed):
+    rng = random.Random(seed)
+    weights = [s.get('weight', 1) for s in scripts]
+    while time.monotonic() < stop_at:
+        script = rng.choices(scripts, weights)[0]
+        chart, birth = charts[id(script)]
+        _run_session(llm, script, chart, birth, recorder, think_scale, stop_at, rng)
+
+
+# ---------- Driver ----------
+def _pcts(values):
+    return {f"p{q}": _percentile(values, q) for q in (50, 95, 99)}
+
+
+def run(scripts=None, users=10, duration=60.0, think_scale=1.0, base_url=None, api_key=None,
+        standin_config=None, max_concurrency=None, seed=None):
+    """Replay `scripts` with `users` concurrent sessions for `duration` seconds. Returns the report dict."""
+    from agents.registry import LLMRegistry, DEFAULT_MAX_CONCURRENCY
+    from agents.standin import StandInConfig, start_in_thread
+
+    scripts = scripts or DEFAULT_SCRIPTS
+    cache = {}
+    charts = {id(s): _chart_for(s['birth'], cache) for s in scripts}
+
+    server = None
+    if base_url is None:
+        server, base_url = start_in_thread(standin_config or StandInConfig(seed=seed))
+    llm = LLMRegistry(api_key=api_key or "standin", base_url=base_url,
+                      max_concurrency=max_concurrency or DEFAULT_MAX_CONCURRENCY)
+    recorder = _Recorder()
+
+    started = time.perf_counter()
+    stop_at = time.monotonic() + duration
+    threads = [threading.Thread(target=_user, name=f"vu-{i}", daemon=True,
+                                args=(llm, scripts, charts, recorder, think_scale, stop_at,
+                                      None if seed is None else seed + i))
+               for i in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    steps = {}
+    for kind in STEP_KINDS:
+        calls = recorder.calls[kind]
+        if not calls:
+            continue
+        ok = [m for m in calls if not m.error]
+        steps[kind] = {
+            'calls': len(calls), 'errors': recorder.errors[kind], 'per_second': len(calls) / wall,
+            'ttft': _pcts([m.ttft for m in ok if m.ttft is not None]),
+            'total': _pcts([m.total for m in ok if m.total is not None]),
+            'queue_wait': _pcts([m.queue_wait for m in calls]),
+            'hedged': sum(1 for m in calls if m.hedged),
+            'hedge_won': sum(1 for m in calls if m.hedge_won),
+            'retries': sum(m.retries for m in calls),
+        }
+        if recorder.walls[kind]:
+            steps[kind]['wall'] = _pcts(recorder.walls[kind])
+    total_calls = sum(st['calls'] for st in steps.values())
+    report = {
+        'users': users, 'wall_seconds': wall, 'max_concurrency': llm.pool.max_concurrency,
+        'calls': total_calls, 'calls_per_second': total_calls / wall if wall else 0.0,
+        'chars_per_second': recorder.chars / wall if wall else 0.0,
+        'steps': steps, 'breaker': llm.pool.breaker.as_dict(),
+    }
+    if server is not None:
+        report['standin'] = dict(server.stats)
+        server.shutdown()
+    return report
+
+
+def format_report(report):
+    def ms(v):
+        return "-" if v is None else f"{v * 1000:.0f}"
+
+    lines = [f"{report['users']} users · {report['wall_seconds']:.1f}s · {report['calls']} LLM calls "
+             f"({report['calls_per_second']:.1f}/s, {report['chars_per_second']:.0f} chars/s) · "
+             f"concurrency limit {report['max_concurrency']} · breaker {report['breaker']['state']} "
+             f"(opened {report['breaker']['opens']}x)",
+             f"{'step':13s} {'calls':>6s} {'err':>4s} {'hedge':>6s} "
+             f"{'ttft p50/p95/p99 ms':>21s} {'total p50/p95/p99 ms':>22s} {'queued p99':>10s}"]
+    for kind, st in report['steps'].items():
+        ttft = "/".join(ms(st['ttft'][p]) for p in ('p50', 'p95', 'p99'))
+        total = "/".join(ms(st['total'][p]) for p in ('p50', 'p95', 'p99'))
+        lines.append(f"{kind:13s} {st['calls']:6d} {st['errors']:4d} {st['hedged']:6d} "
+                     f"{ttft:>21s} {total:>22s} {ms(st['queue_wait']['p99']):>10s}")
+    if 'standin' in report:
+        s = report['standin']
+        lines.append(f"stand-in: {s['requests']} requests, {s['errors']} errors, {s['rate_limited']} rate-limited, "
+                     f"{s['stalled']} stalled, {s['disconnected']} cut off, peak {s['peak_in_flight']} in flight")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    from agents.standin import add_arguments, config_from_args
+
+    ap = argparse.ArgumentParser(description="Replay session scripts against the LLM agent layer.")
+    ap.add_argument("--scripts", help="JSON list or JSON Lines of session scripts (default: built-in mix)")
+    ap.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    ap.add_argument("--duration", type=float, default=60.0, help="seconds to run")
+    ap.add_argument("--think-scale", type=float, default=1.0, help="multiply scripted think times")
+    ap.add_argument("--concurrency", type=int, default=None, help="LLM concurrency limit (registry default)")
+    ap.add_argument("--base-url", help="test an existing endpoint instead of an in-process stand-in")
+    ap.add_argument("--api-key", help="API key for --base-url")
+    ap.add_argument("--json", help="also write the report here")
+    add_arguments(ap.add_argument_group("stand-in"))
+    args = ap.parse_args(argv)
+    try:
+        config = config_from_args(args)
+    except ValueError as e:
+        ap.error(str(e))
+    report = run(load_scripts(args.scripts) if args.scripts else None, args.users, args.duration,
+                 args.think_scale, args.base_url, args.api_key, config, args.concurrency, args.seed)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
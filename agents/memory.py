@@ -0,0 +1,139 @@
+"""
+Bounded conversation memory for the chat.
+
+`ChatMemory` keeps two views of a conversation:
+
+    transcript   what the UI shows; capped at `max_transcript` messages
+    history      what the model sees: a rolling summary of older turns
+                 plus the last `keep_turns` user/assistant turns verbatim
+
+Once more than `keep_turns + fold_batch` turns are unsummarized, the
+oldest ones are folded into the summary with one LLM call, so the model
+gets the thread of the conversation at a bounded prompt size and the
+summarization cost is paid every `fold_batch` turns, not every turn. The
+summary is held to `summary_budget` tokens and the verbatim turns to
+`history_budget` tokens (older turns are folded early if they overflow).
+If the summarizer fails, a plain extractive summary is used instead.
+"""
+from agents.context import count_tokens
+from agents.streaming import CallMetrics
+
+DEFAULT_KEEP_TURNS = 6
+DEFAULT_FOLD_BATCH = 2
+DEFAULT_SUMMARY_BUDGET = 300
+DEFAULT_HISTORY_BUDGET = 1500
+DEFAULT_MAX_TRANSCRIPT = 400
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and Yogi Baba, a KP astrologer. "
+    "Update the summary with the new turns. Keep the user's questions, concerns and personal facts, "
+    "and the key conclusions and timings given. Plain sentences, at most {words} words."
+)
+
+
+def _clip(text, budget, keep="tail"):
+    """Cut `text` to roughly `budget` tokens on a word boundary."""
+    if count_tokens(text) <= budget:
+        return text
+    words = text.split()
+    while words and count_tokens(" ".join(words)) > budget:
+        drop = max(1, len(words) // 10)
+        words = words[drop:] if keep == "tail" else words[:-drop]
+    return " ".join(words)
+
+
+def extractive_summary(summary, turns, budget):
+    """Fallback: previous summary plus the gist of each folded turn, newest kept."""
+    lines = [summary] if summary else []
+    for user, assistant in turns:
+        lines.append(f"User asked: {_clip(user, 40, keep='head')} Yogi Baba: {_clip(assistant, 60, keep='head')}")
+    return _clip(" ".join(lines), budget)
+
+
+def llm_summarizer(registry, agent="summary", on_metrics=None):
+    """
+    A `summarize(summary, turns, budget)` callable backed by the registry's
+    `agent`. `on_metrics` receives each call's CallMetrics.
+    """
+    def summarize(summary, turns, budget):
+        transcript = "\n".join(f"User: {u}\nYogi Baba: {a}" for u, a in turns)
+        messages = [
+            {"role": "system", "content": SUMMARY_PROMPT.format(words=int(budget * 0.7))},
+            {"role": "user", "content": f"Summary so far:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"},
+        ]
+        metrics = CallMetrics(label=agent)
+        try:
+            return registry.complete(registry.request(agent, messages, max_tokens=budget), metrics)
+        finally:
+            if on_metrics is not None:
+                on_metrics(metrics)
+
+    return summarize
+
+
+class ChatMemory:
+    def __init__(self, keep_turns=DEFAULT_KEEP_TURNS, fold_batch=DEFAULT_FOLD_BATCH,
+                 summary_budget=DEFAULT_SUMMARY_BUDGET, history_budget=DEFAULT_HISTORY_BUDGET,
+                 max_transcript=DEFAULT_MAX_TRANSCRIPT):
+        self.keep_turns = keep_turns
+        self.fold_batch = fold_batch
+        self.summary_budget = summary_budget
+        self.history_budget = history_budget
+        self.max_transcript = max_transcript
+        self.transcript = []        # [{'role', 'content'}] for display
+        self.turns = []             # [(user, assistant)] not yet folded into the summary
+        self.summary = ""
+        self.folded = 0             # turns folded so far
+
+    def show(self, role, content):
+        """Add a message to the transcript only (greetings, errors)."""
+        self.transcript.append({"role": role, "content": content})
+        if len(self.transcript) > self.max_transcript:
+            del self.transcript[:len(self.transcript) - self.max_transcript]
+
+    def add_turn(self, user, assistant):
+        """Record a completed exchange; the user message is assumed to be shown already."""
+        self.turns.append((user, assistant))
+        self.show("assistant", assistant)
+
+    def history(self, system_prompt=""):
+        """Messages for the model: system prompt (+ summary) followed by the verbatim turns."""
+        system = system_prompt
+        if self.summary:
+            system += f"\n\nConversation so far (summary): {self.summary}"
+        messages = [{"role": "system", "content": system}] if system else []
+        for user, assistant in self.turns:
+            messages.append({"role": "user", "content": user})
+            messages.append({"role": "assistant", "content": assistant})
+        return messages
+
+    def _verbatim_tokens(self):
+        return sum(count_tokens(u) + count_tokens(a) for u, a in self.turns)
+
+    def needs_fold(self):
+        return (len(self.turns) > self.keep_turns + self.fold_batch
+                or (len(self.turns) > 1 and self._verbatim_tokens() > self.history_budget))
+
+    def fold(self, summarize=None):
+        """Fold the oldest turns into the summary (no-op unless `needs_fold()`)."""
+        if not self.needs_fold():
+            return False
+        n = max(0, len(self.turns) - self.keep_turns)
+        while n < len(self.turns) - 1 and \
+                sum(count_tokens(u) + count_tokens(a) for u, a in self.turns[n:]) > self.history_budget:
+            n += 1
+        if n == 0:
+            return False
+        old, self.turns = self.turns[:n], self.turns[n:]
+        summary = None
+        if summarize is not None:
+            try:
+                summary = summarize(self.summary, old, self.summary_budget)
+            except Exception:
+                summary = None
+        if summary:
+            self.summary = _clip(" ".join(summary.split()), self.summary_budget)
+        else:
+            self.summary = extractive_summary(self.summary, old, self.summary_budget)
+        self.folded += n
+        return True
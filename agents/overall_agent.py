@@ -1,8 +1,9 @@
 import streamlit as st
-from openai import OpenAI
 from datetime import date
 
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+from agents.registry import get_registry
+
+llm = get_registry(api_key=st.secrets["OPENAI_API_KEY"])
 
 st.set_page_config(page_title="🔮 AstroGen", page_icon="✨", layout="centered")
 
@@ -26,14 +27,8 @@ st.markdown(summary)
 st.markdown("---")
 
 def overall_agent(chat_history):
-    """call OpenAI once"""
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",  # or gpt-4o-mini
-        messages=chat_history,
-        max_tokens=600,
-        temperature=0.8,
-    )
-    return response.choices[0].message.content.strip()
+    """call the LLM once"""
+    return llm.complete(llm.request("overall", chat_history)).strip()
 
 # ---------- one-shot buttons ----------
 cols = st.columns(3)
@@ -0,0 +1,100 @@
+"""
+One place to configure and call every LLM agent.
+
+Each agent name (the three readings, the chat and the chat summarizer)
+maps to an `AgentConfig` — model, max_tokens, temperature, a per-HTTP-call
+timeout, a deadline for the whole answer and the first-token wait after
+which a hedged duplicate goes out (agents.resilience).
+
+`LLMRegistry.request` turns a config and messages into
+chat.completions.create arguments; `stream`, `complete` and `fan_out` run
+them through the process's single pooled, concurrency-limited AsyncLLM
+(see agents.fanout), so connection reuse and backpressure hold however
+many sessions are open.
+"""
+import os
+import threading
+from typing import NamedTuple
+
+from agents.fanout import AsyncLLM, DEFAULT_MAX_CONNECTIONS
+from agents.resilience import CLOSED
+from agents.streaming import latency_summary
+
+
+class AgentConfig(NamedTuple):
+    model: str
+    max_tokens: int
+    temperature: float
+    timeout: float = 60.0       # seconds, per HTTP call
+    deadline: float = 90.0      # seconds for the whole answer, retries included
+    hedge_after: float = 0.0    # seconds without a first token before hedging; 0 = never
+
+
+AGENT_CONFIGS = {
+    'overall': AgentConfig("gpt-4o-mini", 1200, 0.7, hedge_after=4.0),
+    'career': AgentConfig("gpt-4o-mini", 1200, 0.7, hedge_after=4.0),
+    'relationship': AgentConfig("gpt-4o-mini", 1200, 0.7, hedge_after=4.0),
+    'chat': AgentConfig("gpt-4o-mini", 800, 0.7, 45.0, 60.0, hedge_after=3.0),
+    'summary': AgentConfig("gpt-4o-mini", 300, 0.2, 30.0, 30.0),
+}
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("ASTROGEN_LLM_CONCURRENCY") or 16)
+
+
+class LLMRegistry:
+    def __init__(self, api_key=None, base_url=None, configs=None, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, **pool_options):
+        self.configs = dict(AGENT_CONFIGS)
+        self.configs.update(configs or {})
+        self.pool = AsyncLLM(api_key=api_key, base_url=base_url, max_connections=max_connections,
+                             max_concurrency=max_concurrency, **pool_options)
+
+    def config(self, agent):
+        try:
+            return self.configs[agent]
+        except KeyError:
+            raise KeyError(f"unknown agent {agent!r}; known: {', '.join(sorted(self.configs))}") from None
+
+    def request(self, agent, messages, **overrides):
+        """chat.completions.create arguments for `agent`; overrides replace config fields."""
+        cfg = self.config(agent)._replace(**overrides)
+        return {'model': cfg.model, 'messages': messages, 'max_tokens': cfg.max_tokens,
+                'temperature': cfg.temperature, 'timeout': cfg.timeout,
+                'deadline': cfg.deadline, 'hedge_after': cfg.hedge_after}
+
+    def stream(self, request, metrics=None):
+        """Yield content deltas of `request` (built with `request()`)."""
+        return self.pool.stream(request, metrics)
+
+    def complete(self, request, metrics=None):
+        return self.pool.complete(request, metrics)
+
+    def fan_out(self, requests):
+        """{name: request} -> events as in agents.fanout."""
+        return self.pool.fan_out(requests)
+
+    @property
+    def degraded(self):
+        """True while the circuit breaker is not closed."""
+        return self.pool.breaker.state != CLOSED
+
+    def stats(self, label=None):
+        """Latency percentiles, hedge rate/win rate and breaker state."""
+        return {**latency_summary(label), 'breaker': self.pool.breaker.as_dict()}
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_registry(api_key=None, base_url=None):
+    """
+    Process-wide registry. The first call creates it; later arguments are
+    ignored. Credentials default to OPENAI_API_KEY / OPENAI_BASE_URL.
+    """
+    global _default_registry
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                _default_registry = LLMRegistry(api_key=api_key, base_url=base_url)
+    return _default_registry
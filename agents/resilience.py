@@ -0,0 +1,86 @@
+"""
+Deadlines, hedging and a circuit breaker for LLM calls.
+
+Every request carries a `deadline` (seconds for the whole answer) and a
+`hedge_after` threshold: if no first token has arrived by then, AsyncLLM
+sends one duplicate request and keeps whichever answers first. Hedges only
+go out while the breaker is closed and a concurrency slot is free, so they
+never add load to a struggling provider.
+
+`CircuitBreaker` opens after `failure_threshold` consecutive provider
+failures (5xx/429/connection errors after retries, or missed deadlines) and
+then fails calls immediately for `reset_after` seconds. After that a single
+probe is let through (half-open); its outcome closes or re-opens the
+breaker. Callers fall back to a cached reading while it is open.
+"""
+import threading
+import time
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_AFTER = 30.0
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call did not finish within its deadline."""
+
+
+class CircuitOpenError(RuntimeError):
+    """The provider is considered degraded; the call was not attempted."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_after=DEFAULT_RESET_AFTER,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_at = None
+        self.opens = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_after:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """True if a call may go out now (in half-open state, one probe at a time)."""
+        with self._lock:
+            now = self._clock()
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if now - self._opened_at < self.reset_after:
+                    return False
+                self._state = HALF_OPEN
+            # a probe that never reported back (cancelled) expires after reset_after
+            if self._probe_at is not None and now - self._probe_at < self.reset_after:
+                return False
+            self._probe_at = now
+            return True
+
+    def success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_at = None
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opens += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probe_at = None
+
+    def as_dict(self):
+        return {'state': self.state, 'consecutive_failures': self._failures, 'opens': self.opens}
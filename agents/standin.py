@@ -0,0 +1,284 @@
+"""
+Local stand-in for the OpenAI chat-completions API.
+
+    python -m agents.standin --port 8900 --ttft lognormal:0.6,0.5 --tokens-per-second 60 --error-rate 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=x streamlit run app.py
+
+Speaks POST /v1/chat/completions (plain and `stream: true` server-sent
+events) and GET /v1/models well enough for the openai client. Answers are
+filler text; what is realistic is the timing and the failures:
+
+    --ttft              seconds before the first token (a distribution)
+    --tokens-per-second streaming rate (a distribution, drawn per request)
+    --output-tokens     answer length, capped by the request's max_tokens
+    --error-rate        fraction answered with a 500/503 error
+    --rate-limit-rate   fraction answered with 429 + Retry-After
+    --stall-rate        fraction that hang for --stall-seconds first
+    --disconnect-rate   fraction of streams cut off half-way
+
+Distributions are written kind:params — fixed:0.5, uniform:0.2,1.5,
+normal:0.8,0.2, lognormal:MEDIAN,SIGMA or exp:MEAN. GET /stats returns
+request, error and in-flight counters. `start_in_thread` runs a server
+inside another program (the load test does this).
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+
+_WORDS = (
+    "the stars suggest a period of steady growth with Jupiter supporting your tenth house while "
+    "Saturn asks for patience in partnerships and the Moon dasha brings emotional clarity so focus "
+    "on disciplined effort timing favours new beginnings after the transit of Venus through your "
+    "seventh house and the sub lord of the cusp confirms career gains through communication"
+).split()
+
+
+# ---------- Distributions ----------
+def parse_distribution(spec):
+    """'lognormal:0.6,0.5' -> function(rng) returning a non-negative float."""
+    kind, _, params = str(spec).partition(":")
+    try:
+        args = [float(x) for x in params.split(",")] if params else []
+        if kind == "fixed" and len(args) == 1:
+            return lambda rng: args[0]
+        if kind == "uniform" and len(args) == 2:
+            return lambda rng: rng.uniform(args[0], args[1])
+        if kind == "normal" and len(args) == 2:
+            return lambda rng: max(0.0, rng.gauss(args[0], args[1]))
+        if kind == "lognormal" and len(args) == 2:
+            mu = math.log(args[0])
+            return lambda rng: rng.lognormvariate(mu, args[1])
+        if kind == "exp" and len(args) == 1:
+            return lambda rng: rng.expovariate(1.0 / args[0])
+    except ValueError:
+        pass
+    raise ValueError(f"bad distribution {spec!r} (fixed:X, uniform:A,B, normal:MU,SD, lognormal:MEDIAN,SIGMA, exp:MEAN)")
+
+
+class StandInConfig(NamedTuple):
+    ttft: str = "lognormal:0.6,0.5"
+    tokens_per_second: str = "normal:60,15"
+    output_tokens: str = "uniform:150,450"
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    stall_rate: float = 0.0
+    stall_seconds: float = 120.0
+    disconnect_rate: float = 0.0
+    seed: int = None
+
+
+class _Plan(NamedTuple):
+    """What one request will do, drawn when it arrives."""
+    fault: str              # '', 'error', 'rate_limit', 'stall', 'disconnect'
+    ttft: float
+    tokens_per_second: float
+    tokens: int
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config=StandInConfig()):
+        super().__init__(address, _Handler)
+        self.config = config
+        self._ttft = parse_distribution(config.ttft)
+        self._rate = parse_distribution(config.tokens_per_second)
+        self._length = parse_distribution(config.output_tokens)
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'streams': 0, 'completed': 0, 'errors': 0, 'rate_limited': 0,
+                      'stalled': 0, 'disconnected': 0, 'in_flight': 0, 'peak_in_flight': 0}
+
+    def plan(self, max_tokens):
+        cfg = self.config
+        with self._lock:
+            r = self._rng.random()
+            fault = ''
+            for name, rate in (('error', cfg.error_rate), ('rate_limit', cfg.rate_limit_rate),
+                               ('stall', cfg.stall_rate), ('disconnect', cfg.disconnect_rate)):
+                if r < rate:
+                    fault = name
+                    break
+                r -= rate
+            tokens = max(1, int(self._length(self._rng)))
+            return _Plan(fault, self._ttft(self._rng), max(1.0, self._rate(self._rng)),
+                         min(tokens, max_tokens) if max_tokens else tokens)
+
+    def count(self, **deltas):
+        with self._lock:
+            for k, v in deltas.items():
+                self.stats[k] += v
+            self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self.stats['in_flight'])
+
+
+def _approx_tokens(messages):
+    return sum(len(str(m.get('content', ''))) for m in messages) // 4
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "AstroGenStandIn/1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _json(self, status, payload, headers=()):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in headers:
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._json(200, {'object': 'list', 'data': [{'id': 'gpt-4o-mini', 'object': 'model', 'owned_by': 'standin'}]})
+        elif self.path.rstrip("/") == "/stats":
+            with self.server._lock:
+                self._json(200, dict(self.server.stats))
+        else:
+            self._json(404, {'error': {'message': 'not found', 'type': 'invalid_request_error'}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._json(400, {'error': {'message': 'invalid JSON', 'type': 'invalid_request_error'}})
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._json(404, {'error': {'message': 'not found', 'type': 'invalid_request_error'}})
+
+        srv = self.server
+        plan = srv.plan(body.get('max_tokens'))
+        srv.count(requests=1, in_flight=1)
+        try:
+            self._serve(body, plan)
+        except (BrokenPipeError, ConnectionResetError):
+            pass                                # client gave up (timeout, hedge loser)
+        finally:
+            srv.count(in_flight=-1)
+
+    def _serve(self, body, plan):
+        srv = self.server
+        if plan.fault == 'error':
+            srv.count(errors=1)
+            time.sleep(plan.ttft / 4)
+            status = random.choice((500, 503))
+            return self._json(status, {'error': {'message': 'injected server error', 'type': 'server_error'}})
+        if plan.fault == 'rate_limit':
+            srv.count(rate_limited=1)
+            return self._json(429, {'error': {'message': 'injected rate limit', 'type': 'rate_limit_error'}},
+                              headers=(("Retry-After", "1"),))
+        if plan.fault == 'stall':
+            srv.count(stalled=1)
+            time.sleep(srv.config.stall_seconds)
+
+        model = body.get('model', 'gpt-4o-mini')
+        words = [_WORDS[i % len(_WORDS)] for i in range(plan.tokens)]
+        created = int(time.time())
+        usage = {'prompt_tokens': _approx_tokens(body.get('messages', [])), 'completion_tokens': plan.tokens,
+                 'total_tokens': _approx_tokens(body.get('messages', [])) + plan.tokens}
+
+        if not body.get('stream'):
+            time.sleep(plan.ttft + plan.tokens / plan.tokens_per_second)
+            srv.count(completed=1)
+            return self._json(200, {
+                'id': 'chatcmpl-standin', 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': " ".join(words)},
+                             'finish_reason': 'stop'}],
+                'usage': usage,
+            })
+
+        srv.count(streams=1)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(delta, finish=None):
+            chunk = {'id': 'chatcmpl-standin', 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                     'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish}]}
+            self._chunk(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+
+        time.sleep(plan.ttft)
+        started = time.perf_counter()
+        cut = plan.tokens // 2 if plan.fault == 'disconnect' else None
+        for i, word in enumerate(words):
+            if i == cut:
+                srv.count(disconnected=1)
+                self.close_connection = True
+                return
+            # pace by schedule, not per-token sleeps, so high rates stay accurate
+            ahead = started + i / plan.tokens_per_second - time.perf_counter()
+            if ahead > 0.002:
+                time.sleep(ahead)
+            event({'role': 'assistant', 'content': word} if i == 0 else {'content': " " + word})
+        event({}, finish='stop')
+        self._chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        srv.count(completed=1)
+
+
+def start_in_thread(config=StandInConfig(), host="127.0.0.1", port=0):
+    """Serve in a daemon thread; returns (server, base_url). Stop with server.shutdown()."""
+    server = StandInServer((host, port), config)
+    threading.Thread(target=server.serve_forever, name="llm-standin", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+# ---------- CLI ----------
+def add_arguments(ap):
+    d = StandInConfig()
+    ap.add_argument("--ttft", default=d.ttft, help=f"time to first token, seconds (default {d.ttft})")
+    ap.add_argument("--tokens-per-second", default=d.tokens_per_second,
+                    help=f"streaming rate (default {d.tokens_per_second})")
+    ap.add_argument("--output-tokens", default=d.output_tokens, help=f"answer length (default {d.output_tokens})")
+    ap.add_argument("--error-rate", type=float, default=d.error_rate, help="fraction answered 500/503")
+    ap.add_argument("--rate-limit-rate", type=float, default=d.rate_limit_rate, help="fraction answered 429")
+    ap.add_argument("--stall-rate", type=float, default=d.stall_rate, help="fraction that hang first")
+    ap.add_argument("--stall-seconds", type=float, default=d.stall_seconds)
+    ap.add_argument("--disconnect-rate", type=float, default=d.disconnect_rate,
+                    help="fraction of streams cut off half-way")
+    ap.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args):
+    config = StandInConfig(args.ttft, args.tokens_per_second, args.output_tokens, args.error_rate,
+                           args.rate_limit_rate, args.stall_rate, args.stall_seconds, args.disconnect_rate,
+                           args.seed)
+    for spec in (config.ttft, config.tokens_per_second, config.output_tokens):
+        parse_distribution(spec)                # fail fast on typos
+    return config
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local OpenAI-compatible chat-completions stand-in.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8900)
+    add_arguments(ap)
+    args = ap.parse_args(argv)
+    try:
+        config = config_from_args(args)
+    except ValueError as e:
+        ap.error(str(e))
+    server = StandInServer((args.host, args.port), config)
+    print(f"stand-in listening on http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
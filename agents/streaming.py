@@ -0,0 +1,93 @@
+"""
+Latency accounting for streamed chat completions.
+
+The streaming calls themselves live in agents.fanout (AsyncLLM), which fills
+a `CallMetrics` with time-to-first-token and total latency for every call and
+hands it to `_record`. The last few hundred calls are kept in a process-wide
+ring buffer for `latency_summary` and `format_metrics` captions.
+"""
+import threading
+import time
+from collections import deque
+
+RECENT_CALLS = 500
+
+_recent = deque(maxlen=RECENT_CALLS)
+_recent_lock = threading.Lock()
+
+
+class CallMetrics:
+    """Timings for one LLM call; times are time.perf_counter() values."""
+
+    def __init__(self, label="", model=""):
+        self.label = label
+        self.model = model
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.finished = None
+        self.chunks = 0
+        self.chars = 0
+        self.error = None
+        self.cached = False
+        self.retries = 0
+        self.queue_wait = 0.0       # seconds waiting for a concurrency slot
+        self.hedged = False         # a duplicate request was sent
+        self.hedge_won = False      # ... and it answered first
+
+    @property
+    def ttft(self):
+        """Seconds to the first content token, or None."""
+        return None if self.first_token is None else self.first_token - self.started
+
+    @property
+    def total(self):
+        return None if self.finished is None else self.finished - self.started
+
+    def as_dict(self):
+        return {'label': self.label, 'model': self.model, 'ttft': self.ttft, 'total': self.total,
+                'chunks': self.chunks, 'chars': self.chars, 'error': self.error, 'cached': self.cached,
+                'retries': self.retries, 'queue_wait': self.queue_wait, 'hedged': self.hedged, 'hedge_won': self.hedge_won}
+
+    def __repr__(self):
+        ttft = f"{self.ttft:.2f}s" if self.ttft is not None else "-"
+        total = f"{self.total:.2f}s" if self.total is not None else "-"
+        return f"CallMetrics({self.label!r}, ttft={ttft}, total={total})"
+
+
+def _record(metrics):
+    with _recent_lock:
+        _recent.append(metrics)
+
+
+def format_metrics(metrics):
+    """Short caption, e.g. 'first token 0.41s · total 6.20s'."""
+    if metrics is not None and metrics.cached:
+        return "served from cache"
+    if metrics is None or metrics.ttft is None:
+        return ""
+    return f"first token {metrics.ttft:.2f}s · total {metrics.total:.2f}s"
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    k = min(len(values) - 1, max(0, int(round(q / 100.0 * (len(values) - 1)))))
+    return values[k]
+
+
+def latency_summary(label=None):
+    """p50/p95 of ttft and total, and hedge rates, over the recent calls (optionally one label)."""
+    with _recent_lock:
+        calls = [m for m in _recent if label is None or m.label == label]
+    ttft = [m.ttft for m in calls if m.ttft is not None]
+    total = [m.total for m in calls if m.total is not None]
+    hedged = sum(1 for m in calls if m.hedged)
+    return {
+        'calls': len(calls),
+        'errors': sum(1 for m in calls if m.error),
+        'ttft_p50': _percentile(ttft, 50), 'ttft_p95': _percentile(ttft, 95),
+        'total_p50': _percentile(total, 50), 'total_p95': _percentile(total, 95),
+        'hedge_rate': hedged / len(calls) if calls else 0.0,
+        'hedge_win_rate': sum(1 for m in calls if m.hedge_won) / hedged if hedged else 0.0,
+    }
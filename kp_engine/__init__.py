@@ -0,0 +1,41 @@
+"""
+Headless KP astrology engine shared by the Streamlit app and batch jobs.
+
+Importing the package (or any submodule) has no side effects and loads none
+of the heavy optional dependencies: NumPy, PIL, ReportLab, geopy and
+timezonefinder are imported by the functions that use them. The common entry
+points are re-exported here lazily, so `kp_engine.calculate_comprehensive_chart`
+costs only the import of kp_engine.chart. `python -m kp_engine.coldstart`
+measures and budgets import times.
+"""
+from importlib import import_module
+
+_EXPORTS = {
+    'calculate_comprehensive_chart': 'kp_engine.chart',
+    'get_coordinates': 'kp_engine.geocode',
+    'kp_lords': 'kp_engine.sublords',
+    'kp_lords_bulk': 'kp_engine.sublords',
+    'kp_significators': 'kp_engine.houses',
+    'VimshottariDasha': 'kp_engine.dasha',
+    'numerology_name_number': 'kp_engine.numerology',
+    'numerology_life_path': 'kp_engine.numerology',
+    'render_chart_png_bytes_pil': 'kp_engine.render',
+    'render_chart_svg': 'kp_engine.vector',
+    'generate_pdf_report': 'kp_engine.report',
+    'get_pdf_report_cached': 'kp_engine.report',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
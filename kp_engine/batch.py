@@ -0,0 +1,189 @@
+"""
+Columnar KP chart engine for bulk jobs.
+
+`compute_chart_batch` takes arrays of (JD UT, lat, lng) and returns arrays:
+swisseph is still called once per body per row (it has no vector API), but
+every classification step (sign, nakshatra/pada, KP sub, house placement)
+runs as NumPy array operations over the whole batch. Semantics match the
+scalar helpers in app.py.
+
+With an EphemerisGrid, planet longitudes are interpolated. The grid's error
+is a sampled maximum, not a guarantee. So any row with a grid longitude
+within GRID_EDGE_MARGIN x max_error of a pada or KP sub edge is recomputed
+with swisseph, and the classification never depends on interpolation error.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import swisseph as swe
+
+from kp_engine.constants import CHITRAPAKSHA_AYANAMSA_DEG
+from kp_engine.sublords import KP_SUB_TABLE, kp_lords_bulk
+
+# Column order of the planet axis; Ketu is derived from Rahu.
+PLANET_NAMES = ('Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn', 'Rahu', 'Ketu')
+_SWE_BODIES = (swe.SUN, swe.MOON, swe.MARS, swe.MERCURY, swe.JUPITER, swe.VENUS, swe.SATURN, swe.TRUE_NODE)
+
+_NAK_WIDTH = 13.0 + (20.0 / 60.0)
+_PADA_WIDTH = _NAK_WIDTH / 4.0
+_EPS = 1e-6
+
+# Grid longitudes closer than this many times the body's max_error to an edge are recomputed
+GRID_EDGE_MARGIN = 3.0
+# Sorted pada and KP sub edges (sign and nakshatra edges are among them), closed at 360
+_EDGES = np.unique(np.concatenate([np.arange(108) * (10.0 / 3.0),
+                                   [float(r.start) / 3600.0 for r in KP_SUB_TABLE], [360.0]]))
+
+
+class ChartBatch(NamedTuple):
+    """Columnar chart result. Shapes: N rows, P = len(PLANET_NAMES) bodies, 12 cusps."""
+    ok: np.ndarray              # (N,) bool, False where swisseph failed for the row
+    longitudes: np.ndarray      # (N, P) sidereal degrees
+    sign: np.ndarray            # (N, P) 0..11
+    nakshatra: np.ndarray       # (N, P) 0..26
+    pada: np.ndarray            # (N, P) 1..4
+    sub: np.ndarray             # (N, P) row in kp_engine.sublords.KP_SUB_TABLE
+    sub_lord: np.ndarray        # (N, P) index into VIMSHOTTARI_ORDER
+    asc: np.ndarray             # (N,) sidereal ascendant
+    cusps: np.ndarray           # (N, 12) sidereal Placidus cusps
+    cusp_sign: np.ndarray       # (N, 12)
+    cusp_nakshatra: np.ndarray  # (N, 12)
+    cusp_pada: np.ndarray       # (N, 12)
+    cusp_sub: np.ndarray        # (N, 12)
+    cusp_sub_lord: np.ndarray   # (N, 12)
+    house: np.ndarray           # (N, P) 1..12
+
+
+# ---------- Vectorised classification ----------
+def sign_index_and_offset(deg):
+    """Array form of deg_to_sign_index_and_offset: (sign index, degrees within sign)."""
+    d = np.mod(np.asarray(deg, dtype=np.float64), 360.0)
+    idx = np.minimum((d // 30).astype(np.int16), 11)
+    return idx, d - idx * 30.0
+
+
+def nakshatra_and_pada(deg):
+    """Array form of get_nakshatra_and_pada: (nakshatra index, pada), same boundary nudges."""
+    arc = np.mod(np.asarray(deg, dtype=np.float64), 360.0)
+    nak = np.minimum(np.floor(arc / _NAK_WIDTH), 26)
+    inside = arc - nak * _NAK_WIDTH
+
+    # tiny rounding that would make inside == nak width moves to the next nakshatra
+    rolled = inside + _EPS >= _NAK_WIDTH
+    inside = np.where(rolled, 0.0, inside)
+    nak = np.where(rolled, np.minimum(nak + 1, 26), nak)
+
+    fraction = inside / _PADA_WIDTH
+    nearest = np.round(fraction)
+    fraction = np.where(np.abs(nearest - fraction) <= _EPS / _PADA_WIDTH, nearest, fraction)
+    pada = np.clip(np.floor(fraction) + 1, 1, 4)
+    return nak.astype(np.int16), pada.astype(np.int8)
+
+
+def house_numbers(deg, cusps):
+    """
+    Array form of get_house_number_from_degree.
+    deg: (N, P) longitudes, cusps: (N, 12). Returns (N, P) house numbers 1..12.
+    """
+    d = np.mod(np.asarray(deg, dtype=np.float64), 360.0)[..., None]      # (N, P, 1)
+    cur = np.mod(np.asarray(cusps, dtype=np.float64), 360.0)[:, None, :]  # (N, 1, 12)
+    nxt = np.roll(cur, -1, axis=-1)
+    inside = np.where(cur < nxt, (cur <= d) & (d < nxt), (d >= cur) | (d < nxt))
+    first = np.argmax(inside, axis=-1)
+    return np.where(inside.any(axis=-1), first + 1, 1).astype(np.int8)
+
+
+# ---------- Ephemeris ----------
+def _edge_distance(deg):
+    """Distance in degrees from each longitude to the nearest pada / KP sub edge."""
+    d = np.mod(deg, 360.0)
+    i = np.clip(np.searchsorted(_EDGES, d), 1, len(_EDGES) - 1)
+    return np.minimum(d - _EDGES[i - 1], _EDGES[i] - d)
+
+
+def _near_grid_edges(grid, lons):
+    """(N,) True where an interpolated longitude (N, 8) is too close to an edge to trust."""
+    margin = GRID_EDGE_MARGIN * np.array([grid.max_error(b) for b in PLANET_NAMES[:8]])
+    near = (_edge_distance(lons) <= margin).any(axis=1)
+    return near | (_edge_distance(lons[:, 7] + 180.0) <= margin[7])     # Ketu
+
+
+def _ephemeris_columns(jd, lat, lng, grid=None):
+    n = len(jd)
+    lons = np.full((n, len(PLANET_NAMES)), np.nan)
+    cusps = np.full((n, 12), np.nan)
+    asc = np.full(n, np.nan)
+    ok = np.ones(n, dtype=bool)
+
+    # interpolated planets from the shared grid; only houses still need swisseph,
+    # and rows outside the grid range or near an edge fall back to it for the planets too
+    on_grid = grid.covers(jd) if grid is not None else np.zeros(n, dtype=bool)
+    if on_grid.any():
+        lons[on_grid, :8] = grid.longitudes(jd[on_grid], PLANET_NAMES[:8])
+        on_grid[on_grid] = ~_near_grid_edges(grid, lons[on_grid, :8])
+    swe.set_sid_mode(swe.SIDM_KRISHNAMURTI)
+    calc_ut, houses, flag = swe.calc_ut, swe.houses, swe.FLG_SIDEREAL
+    for i in range(n):
+        try:
+            t = float(jd[i])
+            if not on_grid[i]:
+                for j, body in enumerate(_SWE_BODIES):
+                    lons[i, j] = calc_ut(t, body, flag)[0][0]
+            c, ascmc = houses(t, float(lat[i]), float(lng[i]), b'P')
+            cusps[i] = c[:12]
+            asc[i] = ascmc[0]
+        except Exception:
+            ok[i] = False
+
+    lons[:, 8] = lons[:, 7] + 180.0
+    lons = np.mod(lons, 360.0)
+    # houses use the fixed Chitrapaksha value, as _calc_ascendant does
+    cusps = np.mod(cusps - CHITRAPAKSHA_AYANAMSA_DEG, 360.0)
+    asc = np.mod(asc - CHITRAPAKSHA_AYANAMSA_DEG, 360.0)
+    return ok, lons, asc, cusps
+
+
+def compute_chart_batch(jd, lat, lng, grid=None):
+    """
+    KP charts for many births at once. Inputs are equal-length 1-D sequences.
+    Pass a kp_engine.ephemeris_grid.EphemerisGrid as `grid` to interpolate
+    planet positions from the memory-mapped grid instead of calling swisseph;
+    rows outside the grid range, or with a planet within the grid's error
+    margin of a pada / sub edge, are computed with swisseph. Rows swisseph
+    cannot compute either come back with ok=False.
+    """
+    jd = np.atleast_1d(np.asarray(jd, dtype=np.float64))
+    lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+    lng = np.atleast_1d(np.asarray(lng, dtype=np.float64))
+    if not (jd.shape == lat.shape == lng.shape) or jd.ndim != 1:
+        raise ValueError("jd, lat and lng must be 1-D arrays of equal length")
+
+    ok, lons, asc, cusps = _ephemeris_columns(jd, lat, lng, grid)
+    # failed rows are NaN; classify them as 0 and let callers filter on `ok`
+    lons_c = np.where(ok[:, None], lons, 0.0)
+    cusps_c = np.where(ok[:, None], cusps, 0.0)
+
+    sign, _ = sign_index_and_offset(lons_c)
+    nak, pada = nakshatra_and_pada(lons_c)
+    lords = kp_lords_bulk(lons_c)
+    cusp_sign, _ = sign_index_and_offset(cusps_c)
+    cusp_nak, cusp_pada = nakshatra_and_pada(cusps_c)
+    cusp_lords = kp_lords_bulk(cusps_c)
+
+    return ChartBatch(
+        ok=ok,
+        longitudes=lons,
+        sign=sign,
+        nakshatra=nak,
+        pada=pada,
+        sub=lords.sub,
+        sub_lord=lords.sub_lord,
+        asc=asc,
+        cusps=cusps,
+        cusp_sign=cusp_sign,
+        cusp_nakshatra=cusp_nak,
+        cusp_pada=cusp_pada,
+        cusp_sub=cusp_lords.sub,
+        cusp_sub_lord=cusp_lords.sub_lord,
+        house=house_numbers(lons_c, cusps_c),
+    )
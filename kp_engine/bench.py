@@ -0,0 +1,292 @@
+"""
+Micro and macro benchmarks for the KP pipeline, with JSON baselines.
+
+    python -m kp_engine.bench run --json base.json           # record a baseline
+    python -m kp_engine.bench run --against base.json        # run and compare
+    python -m kp_engine.bench compare base.json new.json --threshold 0.15
+    python -m kp_engine.bench run -k micro.sub --quick
+
+Micro benchmarks time the per-call hot helpers over fixed, seeded inputs:
+
+    micro.sublord          get_sublord_kp_standard
+    micro.nakshatra_pada   get_nakshatra_and_pada
+    micro.house_number     get_house_number_from_degree
+    micro.vimshottari      calculate_vimshottari_dasha
+    micro.render_png       render_chart_png_bytes_pil, layout cache cleared each call
+
+Macro benchmarks time whole requests:
+
+    macro.chart            calculate_comprehensive_chart, geocoding stubbed out
+    macro.pdf              generate_pdf_report for a precomputed chart
+
+Each benchmark is warmed once, then timed in `repeat` samples. Each sample
+runs enough loops to last at least `min_time`. Results are seconds per
+operation (median, min, stdev). A baseline file stores them next to the
+Python version, platform and git commit. `compare` reports the change in
+median per benchmark. It exits 1 if any benchmark got slower by more than
+the threshold (a fraction; default 0.10).
+"""
+import argparse
+import fnmatch
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, time as dtime
+from typing import NamedTuple
+from unittest import mock
+
+BASELINE_VERSION = 1
+DEFAULT_REPEAT = 7
+DEFAULT_MIN_TIME = 0.2
+DEFAULT_THRESHOLD = 0.10
+
+BIRTH = {'dob': date(1990, 8, 15), 'tob': dtime(5, 30), 'place': "Mumbai, India", 'gender': "Male",
+         'tob_display': "05:30 AM"}
+COORDINATES = (19.0760, 72.8777)
+# sidereal Placidus cusps of BIRTH, so house lookups see a realistic unequal layout
+CUSPS = [105.9191, 132.3793, 162.2305, 194.3810, 226.2994, 256.6962,
+         285.9191, 312.3793, 342.2305, 14.3810, 46.2994, 76.6962]
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: object           # () -> op; op() performs `inner` operations
+    inner: int = 1          # operations per op() call, for per-operation timing
+
+
+# ---------- Benchmarks ----------
+def _degrees(n=1000, seed=7):
+    rng = random.Random(seed)
+    return [rng.uniform(0.0, 360.0) for _ in range(n)]
+
+
+def _sublord():
+    from kp_engine.chart import get_sublord_kp_standard
+
+    degs = _degrees()
+    return lambda: [get_sublord_kp_standard(d) for d in degs]
+
+
+def _nakshatra_pada():
+    from kp_engine.chart import get_nakshatra_and_pada
+
+    degs = _degrees()
+    return lambda: [get_nakshatra_and_pada(d) for d in degs]
+
+
+def _house_number():
+    from kp_engine.houses import get_house_number_from_degree
+
+    degs = _degrees()
+    return lambda: [get_house_number_from_degree(d, CUSPS) for d in degs]
+
+
+def _vimshottari():
+    from kp_engine.chart import calculate_vimshottari_dasha
+
+    degs = _degrees(100)
+    born = datetime.combine(BIRTH['dob'], BIRTH['tob'])
+    return lambda: [calculate_vimshottari_dasha(d, born) for d in degs]
+
+
+def _stub_geocoding():
+    """Patch the chart module's geocoder to fixed coordinates (no cache, no network)."""
+    return mock.patch('kp_engine.chart.get_coordinates', lambda place: COORDINATES)
+
+
+def _sample_chart():
+    from kp_engine.chart import calculate_comprehensive_chart
+
+    with _stub_geocoding():
+        chart, error = calculate_comprehensive_chart(BIRTH['dob'], BIRTH['tob'], BIRTH['place'])
+    if chart is None:
+        raise RuntimeError(error)
+    return chart
+
+
+def _render_png():
+    from kp_engine.render import render_chart_png_bytes_pil, render_layout_png
+
+    chart = _sample_chart()
+
+    def op():
+        render_layout_png.cache_clear()
+        return render_chart_png_bytes_pil(chart['planets'], chart['house_cusps_degrees'])
+    return op
+
+
+def _chart():
+    from kp_engine.chart import calculate_comprehensive_chart
+
+    births = [(date(1950 + i, 1 + i % 12, 1 + i % 28), dtime(i % 24, (7 * i) % 60)) for i in range(20)]
+
+    def op():
+        with _stub_geocoding():
+            for dob, tob in births:
+                calculate_comprehensive_chart(dob, tob, BIRTH['place'])
+    return op
+
+
+def _pdf():
+    from kp_engine.report import generate_pdf_report
+
+    chart = _sample_chart()
+    now = datetime(2026, 1, 1)
+    return lambda: generate_pdf_report(BIRTH, chart, name="Benchmark", now=now)
+
+
+BENCHMARKS = (
+    Benchmark('micro.sublord', _sublord, 1000),
+    Benchmark('micro.nakshatra_pada', _nakshatra_pada, 1000),
+    Benchmark('micro.house_number', _house_number, 1000),
+    Benchmark('micro.vimshottari', _vimshottari, 100),
+    Benchmark('micro.render_png', _render_png),
+    Benchmark('macro.chart', _chart, 20),
+    Benchmark('macro.pdf', _pdf),
+)
+
+
+# ---------- Timing ----------
+def _loops_for(op, min_time):
+    """Smallest power of ten of loops that runs for at least `min_time`."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            op()
+        if time.perf_counter() - started >= min_time or loops >= 10 ** 6:
+            return loops
+        loops *= 10
+
+
+def time_benchmark(bench, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME):
+    """{'median', 'min', 'stdev'} seconds per operation, plus the sampling parameters."""
+    op = bench.setup()
+    op()                                    # warm caches and lazy imports
+    loops = _loops_for(op, min_time)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            op()
+        samples.append((time.perf_counter() - started) / (loops * bench.inner))
+    return {'median': statistics.median(samples), 'min': min(samples),
+            'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            'repeat': repeat, 'loops': loops, 'inner': bench.inner}
+
+
+def _commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run(patterns=None, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME, log=None):
+    """Run the benchmarks matching any of the glob `patterns` (default: all). Returns a baseline dict."""
+    results = {}
+    for bench in BENCHMARKS:
+        if patterns and not any(fnmatch.fnmatch(bench.name, p) or p in bench.name for p in patterns):
+            continue
+        results[bench.name] = time_benchmark(bench, repeat, min_time)
+        if log:
+            log(f"{bench.name:22s} {_fmt(results[bench.name]['median']):>10s}/op")
+    return {'version': BASELINE_VERSION, 'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'commit': _commit(), 'results': results}
+
+
+# ---------- Comparison ----------
+def _fmt(seconds):
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def compare(base, current, threshold=DEFAULT_THRESHOLD):
+    """[(name, base median, current median, ratio, verdict)] for benchmarks in both runs."""
+    rows = []
+    for name, cur in current['results'].items():
+        old = base['results'].get(name)
+        if old is None:
+            rows.append((name, None, cur['median'], None, "new"))
+            continue
+        ratio = cur['median'] / old['median']
+        if ratio > 1 + threshold:
+            verdict = "REGRESSION"
+        elif ratio < 1 - threshold:
+            verdict = "faster"
+        else:
+            verdict = "ok"
+        rows.append((name, old['median'], cur['median'], ratio, verdict))
+    return rows
+
+
+def format_comparison(rows, base, current):
+    lines = [f"baseline {base.get('commit') or '?'} ({base.get('created', '?')}) -> "
+             f"current {current.get('commit') or '?'} ({current.get('created', '?')})"]
+    if (base.get('python'), base.get('platform')) != (current.get('python'), current.get('platform')):
+        lines.append("note: runs come from different Python versions or platforms")
+    lines.append(f"{'benchmark':22s} {'baseline':>10s} {'current':>10s} {'change':>8s}")
+    for name, old, new, ratio, verdict in rows:
+        change = "-" if ratio is None else f"{(ratio - 1) * 100:+.1f}%"
+        lines.append(f"{name:22s} {'-' if old is None else _fmt(old):>10s} {_fmt(new):>10s} {change:>8s}  {verdict}")
+    return "\n".join(lines)
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    if data.get('version') != BASELINE_VERSION:
+        raise SystemExit(f"{path}: unsupported baseline version {data.get('version')!r}")
+    return data
+
+
+def _report(base, current, threshold):
+    rows = compare(base, current, threshold)
+    print(format_comparison(rows, base, current))
+    return 1 if any(verdict == "REGRESSION" for *_, verdict in rows) else 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the KP pipeline and compare against baselines.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="run benchmarks")
+    run_p.add_argument("-k", dest="patterns", action="append", help="only benchmarks matching (glob or substring)")
+    run_p.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed samples per benchmark")
+    run_p.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME, help="minimum seconds per sample")
+    run_p.add_argument("--quick", action="store_true", help="3 short samples (smoke test, noisy)")
+    run_p.add_argument("--json", help="write the results here (a baseline)")
+    run_p.add_argument("--against", help="baseline to compare with after the run")
+    run_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                       help="slowdown fraction flagged as a regression")
+
+    cmp_p = sub.add_parser("compare", help="compare two result files")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("current")
+    cmp_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                       help="slowdown fraction flagged as a regression")
+    args = ap.parse_args(argv)
+
+    if args.command == "compare":
+        sys.exit(_report(_load(args.baseline), _load(args.current), args.threshold))
+
+    repeat, min_time = (3, 0.05) if args.quick else (args.repeat, args.min_time)
+    results = run(args.patterns, repeat, min_time, log=print)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    if args.against:
+        print()
+        sys.exit(_report(_load(args.against), results, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Bulk PDF reports for a manifest of birth records.
+
+    python -m kp_engine.bulk_reports manifest.csv out/            # one PDF per record
+    python -m kp_engine.bulk_reports manifest.jsonl reports.zip   # streamed into a zip
+
+The manifest is CSV (header row) or JSON Lines with fields
+id, name, dob (DD/MM/YYYY or YYYY-MM-DD), tob (HH:MM, 24h), place, gender;
+only dob, tob and place are required. `id` defaults to the row number.
+
+Each record runs three stages in a worker process — chart (geocode + KP
+chart), render (vector chart drawing) and pdf (ReportLab build) — and the
+parent writes the bytes out. At most `workers * 2` records are in flight,
+so memory stays flat however long the manifest is. Workers are recycled
+after `max_tasks_per_child` records.
+
+Every finished record is appended to a checkpoint file next to the output
+(<out>/.checkpoint.jsonl, or <out>.zip.checkpoint.jsonl). A rerun with the
+same output skips records already written; failed records are retried.
+
+A zip is written as <out>.zip.partial and renamed when the run closes it. A
+crash leaves the partial without its central directory, so a rerun salvages
+the complete entries from their local headers into a fresh archive. Only
+checkpointed records whose file is actually in the output count as done.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import struct
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+STAGES = ('chart', 'render', 'pdf', 'write')
+DEFAULT_MAX_TASKS_PER_CHILD = 500
+
+
+# ---------- Manifest ----------
+def _parse_date(s):
+    s = str(s).strip()
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(s, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"bad date {s!r}")
+
+
+def _parse_time(s):
+    s = str(s).strip()
+    for fmt in ("%H:%M", "%H:%M:%S", "%I:%M %p"):
+        try:
+            return datetime.strptime(s, fmt).time()
+        except ValueError:
+            pass
+    raise ValueError(f"bad time {s!r}")
+
+
+def read_manifest(path):
+    """Yield manifest rows as dicts with a string 'id', lazily."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        if path.endswith((".jsonl", ".ndjson")):
+            rows = (json.loads(line) for line in fh if line.strip())
+        else:
+            rows = csv.DictReader(fh)
+        for i, row in enumerate(rows, start=1):
+            row = {k.strip().lower(): v for k, v in row.items() if k}
+            row['id'] = str(row.get('id') or i)
+            yield row
+
+
+# ---------- Worker ----------
+def _init_worker():
+    # import and warm the engine once per process, not per record
+    import kp_engine.chart  # noqa: F401
+    import kp_engine.report
+    kp_engine.report.warm_up()
+
+
+def build_report(row):
+    """Run the chart/render/pdf stages for one manifest row. Returns (id, pdf bytes | None, error, timings)."""
+    from kp_engine.chart import calculate_comprehensive_chart
+    from kp_engine.numerology import numerology_name_number, numerology_life_path
+    from kp_engine.report import generate_pdf_report, CHART_WIDTH
+    from kp_engine.vector import chart_drawing_for
+
+    timings = {}
+    try:
+        t0 = time.perf_counter()
+        dob, tob = _parse_date(row['dob']), _parse_time(row['tob'])
+        place, name = row['place'], (row.get('name') or "").strip()
+        chart, error = calculate_comprehensive_chart(dob, tob, place)
+        t1 = time.perf_counter()
+        timings['chart'] = t1 - t0
+        if chart is None:
+            return row['id'], None, error, timings
+
+        drawing = chart_drawing_for(chart['planets'], chart['house_cusps_degrees'], CHART_WIDTH, show_pada=True)
+        t2 = time.perf_counter()
+        timings['render'] = t2 - t1
+
+        birth = {'dob': dob, 'tob': tob, 'place': place, 'gender': row.get('gender') or "",
+                 'tob_display': tob.strftime('%I:%M %p')}
+        numerology = {'name_number': numerology_name_number(name), 'life_path': numerology_life_path(dob)}
+        pdf = generate_pdf_report(birth, chart, name=name, numerology=numerology, chart_flowable=drawing).getvalue()
+        timings['pdf'] = time.perf_counter() - t2
+        return row['id'], pdf, None, timings
+    except Exception as e:
+        return row['id'], None, f"{type(e).__name__}: {e}", timings
+
+
+# ---------- Output sinks ----------
+def _file_name(record_id):
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in record_id)
+    return f"KP_Chart_{safe}.pdf"
+
+
+class DirectorySink:
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.checkpoint = os.path.join(path, ".checkpoint.jsonl")
+
+    def write(self, name, data):
+        tmp = os.path.join(self.path, name + ".tmp")
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, os.path.join(self.path, name))
+
+    def has(self, name):
+        return os.path.exists(os.path.join(self.path, name))
+
+    def close(self):
+        pass
+
+
+_LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+
+
+def _salvage_entries(path):
+    """Yield (name, data) for the intact stored entries of a zip that may lack its central directory."""
+    with open(path, "rb") as fh:
+        while True:
+            header = fh.read(_LOCAL_HEADER.size)
+            if len(header) < _LOCAL_HEADER.size:
+                return
+            sig, _, flags, method, _, _, crc, csize, usize, name_len, extra_len = _LOCAL_HEADER.unpack(header)
+            # stop at the central directory, a torn entry, or anything writestr would not have produced
+            if sig != b"PK\x03\x04" or flags & 0x08 or method != zipfile.ZIP_STORED or csize != usize:
+                return
+            name = fh.read(name_len).decode("utf-8" if flags & 0x800 else "cp437")
+            fh.seek(extra_len, os.SEEK_CUR)
+            data = fh.read(csize)
+            if len(data) < csize or zlib.crc32(data) != crc:
+                return
+            yield name, data
+
+
+class ZipSink:
+    def __init__(self, path):
+        self.path = path
+        self.partial = path + ".partial"
+        self.checkpoint = path + ".checkpoint.jsonl"
+        self._names = set()
+        if os.path.exists(path) or os.path.exists(self.partial):
+            self._resume()
+        # PDFs are already compressed; store them as-is
+        self._zip = zipfile.ZipFile(self.partial, "a" if self._names else "w", zipfile.ZIP_STORED)
+
+    def _resume(self):
+        """Copy the finished archive and whatever survives of a crashed partial into a fresh partial."""
+        tmp = self.partial + ".tmp"
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_STORED) as out:
+            if os.path.exists(self.path):
+                with zipfile.ZipFile(self.path) as done:
+                    for name in done.namelist():
+                        out.writestr(name, done.read(name))
+                        self._names.add(name)
+            if os.path.exists(self.partial):
+                for name, data in _salvage_entries(self.partial):
+                    if name not in self._names:
+                        out.writestr(name, data)
+                        self._names.add(name)
+        os.replace(tmp, self.partial)
+
+    def write(self, name, data):
+        self._zip.writestr(name, data)
+        self._names.add(name)
+
+    def has(self, name):
+        return name in self._names
+
+    def close(self):
+        self._zip.close()
+        os.replace(self.partial, self.path)
+
+
+def _load_checkpoint(path, sink):
+    """Ids checkpointed as ok whose file really is in `sink`."""
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue            # torn last line after a crash
+                if entry.get('status') == 'ok' and sink.has(entry.get('file') or _file_name(entry['id'])):
+                    done.add(entry['id'])
+    return done
+
+
+# ---------- Driver ----------
+def run(manifest, out, workers=None, max_tasks_per_child=DEFAULT_MAX_TASKS_PER_CHILD, log=print):
+    """Build every report in `manifest` into `out` (directory, or *.zip). Returns the summary dict."""
+    workers = workers or os.cpu_count() or 1
+    sink = ZipSink(out) if out.endswith(".zip") else DirectorySink(out)
+    try:
+        summary = _run(manifest, sink, workers, max_tasks_per_child, log)
+    finally:
+        sink.close()
+    return summary
+
+
+def _run(manifest, sink, workers, max_tasks_per_child, log):
+    done = _load_checkpoint(sink.checkpoint, sink)
+    stage_seconds = dict.fromkeys(STAGES, 0.0)
+    stage_counts = dict.fromkeys(STAGES, 0)
+    ok = failed = skipped = 0
+    started = time.perf_counter()
+
+    ctx = multiprocessing.get_context("spawn")
+    with open(sink.checkpoint, "a", encoding="utf-8") as ckpt, \
+            ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker,
+                                max_tasks_per_child=max_tasks_per_child) as pool:
+        rows = read_manifest(manifest)
+        pending = set()
+
+        def fill():
+            nonlocal skipped
+            while len(pending) < workers * 2:
+                row = next(rows, None)
+                if row is None:
+                    return
+                if row['id'] in done:
+                    skipped += 1
+                    continue
+                pending.add(pool.submit(build_report, row))
+
+        fill()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                pending.discard(fut)
+                record_id, pdf, error, timings = fut.result()
+                for stage, secs in timings.items():
+                    stage_seconds[stage] += secs
+                    stage_counts[stage] += 1
+                entry = {'id': record_id}
+                if pdf is not None:
+                    t = time.perf_counter()
+                    entry['file'] = _file_name(record_id)
+                    sink.write(entry['file'], pdf)
+                    stage_seconds['write'] += time.perf_counter() - t
+                    stage_counts['write'] += 1
+                    entry['status'] = 'ok'
+                    ok += 1
+                else:
+                    entry.update(status='error', error=error)
+                    failed += 1
+                    log(f"{record_id}: {error}")
+                ckpt.write(json.dumps(entry) + "\n")
+                ckpt.flush()
+            fill()
+
+    wall = time.perf_counter() - started
+    summary = {
+        'ok': ok, 'failed': failed, 'skipped': skipped, 'wall_seconds': wall,
+        'records_per_second': ok / wall if wall else 0.0,
+        'stages': {
+            s: {'count': stage_counts[s], 'seconds': stage_seconds[s],
+                'per_second': stage_counts[s] / stage_seconds[s] if stage_seconds[s] else 0.0}
+            for s in STAGES
+        },
+    }
+    return summary
+
+
+def format_summary(summary):
+    lines = [f"{summary['ok']} written, {summary['failed']} failed, {summary['skipped']} skipped (checkpoint) "
+             f"in {summary['wall_seconds']:.1f}s — {summary['records_per_second']:.1f} reports/s",
+             f"{'stage':8s} {'count':>7s} {'cpu s':>9s} {'per cpu s':>10s}"]
+    for stage, st in summary['stages'].items():
+        lines.append(f"{stage:8s} {st['count']:7d} {st['seconds']:9.2f} {st['per_second']:10.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate KP PDF reports for a manifest of birth records.")
+    ap.add_argument("manifest", help="CSV with a header row, or .jsonl")
+    ap.add_argument("out", help="output directory, or a .zip file")
+    ap.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    ap.add_argument("--max-tasks-per-child", type=int, default=DEFAULT_MAX_TASKS_PER_CHILD,
+                    help="recycle a worker after this many records")
+    args = ap.parse_args(argv)
+    summary = run(args.manifest, args.out, args.workers, args.max_tasks_per_child)
+    print(format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+KP position tables for a file of birth records, streamed.
+
+    python -m kp_engine.bulk_tables births.csv tables.parquet
+    python -m kp_engine.bulk_tables births.parquet tables.csv --chunk-rows 100000 --workers 8
+
+Input is CSV (header row), Parquet or JSON Lines with the manifest fields of
+kp_engine.bulk_reports (id, dob, tob, place); `lat` and `lng` columns, when
+present, are used instead of geocoding. The output has one row per record
+and body (Asc, then the nine planets) with the columns of test.py's table:
+
+    id, Planet, Sign, Degree, Pad, Nakshatra Lord, S. Lord
+
+The input is read `chunk_rows` records at a time. Each chunk goes to a
+worker process, which parses the dates, resolves coordinates and time zones
+once per distinct value, converts local times to JD in bulk
+(kp_engine.timezones), runs compute_chart_batch and serialises its slice of
+output (CSV text or an Arrow table). The parent only writes, in input
+order, one chunk at a time. At most `workers * 2` chunks are in flight, so
+memory stays flat however many rows the input has. Progress (records/s
+and rows/s) is logged every few seconds.
+
+Records that cannot be charted (bad date, unknown place, ephemeris error, or
+a chunk whose worker raised) are left out of the table and listed in
+<out>.errors.csv; dates must fall in
+pandas' timestamp range (1677-2262). pandas is needed; pyarrow only for
+Parquet.
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_CHUNK_ROWS = 50_000
+COLUMNS = ('id', 'Planet', 'Sign', 'Degree', 'Pad', 'Nakshatra Lord', 'S. Lord')
+_INPUT_FIELDS = ('id', 'dob', 'tob', 'place', 'lat', 'lng')
+_DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d")
+_TIME_FORMATS = ("%H:%M", "%H:%M:%S", "%I:%M %p")
+_JD_UNIX_EPOCH = 2440587.5
+
+
+# ---------- Input ----------
+def _normalise(df, first_id):
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    df = df[[c for c in _INPUT_FIELDS if c in df.columns]]
+    if 'id' not in df.columns:
+        df = df.assign(id=[str(i) for i in range(first_id, first_id + len(df))])
+    return df
+
+
+def read_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield DataFrames of at most `chunk_rows` input records, lazily."""
+    import pandas as pd
+
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("reading Parquet needs pyarrow (pip install pyarrow)") from None
+        source = pq.ParquetFile(path)
+        wanted = [f.name for f in source.schema_arrow if f.name.strip().lower() in _INPUT_FIELDS]
+        chunks = (batch.to_pandas() for batch in source.iter_batches(batch_size=chunk_rows, columns=wanted))
+    elif path.endswith((".jsonl", ".ndjson")):
+        chunks = pd.read_json(path, lines=True, chunksize=chunk_rows, dtype=False)
+    else:
+        chunks = pd.read_csv(path, chunksize=chunk_rows, dtype=str, keep_default_na=False,
+                             skipinitialspace=True)
+    first_id = 1
+    for df in chunks:
+        yield _normalise(df, first_id)
+        first_id += len(df)
+
+
+# ---------- Worker ----------
+_grid = None
+
+
+def _init_worker(grid_path=None):
+    global _grid
+    import kp_engine.batch  # noqa: F401
+    if grid_path:
+        from kp_engine.ephemeris_grid import EphemerisGrid
+        _grid = EphemerisGrid(grid_path)
+
+
+def _parse_column(values, formats):
+    """Strings -> datetime64 Series, trying each format in turn; NaT where none fits."""
+    import pandas as pd
+
+    values = values.astype(str).str.strip()
+    out = pd.to_datetime(values, format=formats[0], errors="coerce")
+    for fmt in formats[1:]:
+        missing = out.isna()
+        if not missing.any():
+            break
+        out[missing] = pd.to_datetime(values[missing], format=fmt, errors="coerce")
+    return out
+
+
+def _coordinates(df, wanted):
+    """
+    (lat, lng, failures) for the rows flagged in `wanted`: float arrays, NaN
+    where the place cannot be resolved, and {row: message} for rows whose
+    place lookup raised (geocoder down, quota, ...).
+    """
+    import numpy as np
+    from kp_engine.geocode import get_coordinates
+
+    n = len(df)
+    lat = np.full(n, np.nan)
+    lng = np.full(n, np.nan)
+    failures = {}
+    if 'lat' in df.columns and 'lng' in df.columns:
+        import pandas as pd
+        # copies: pandas 3 hands out read-only views, and geocoded rows are filled in below
+        lat = pd.to_numeric(df['lat'], errors="coerce").to_numpy(dtype=float, copy=True)
+        lng = pd.to_numeric(df['lng'], errors="coerce").to_numpy(dtype=float, copy=True)
+    if 'place' in df.columns:
+        todo = wanted & (np.isnan(lat) | np.isnan(lng))
+        places = df['place'].astype(str).to_numpy()
+        coords = {}
+        for i in np.flatnonzero(todo):
+            place = places[i]
+            if place not in coords:
+                try:
+                    coords[place] = get_coordinates(place)
+                except Exception as e:
+                    coords[place] = f"{type(e).__name__}: {e}"
+            found = coords[place]
+            if isinstance(found, str):
+                failures[i] = found
+            elif found[0] is not None:
+                lat[i], lng[i] = found
+    return lat, lng, failures
+
+
+def _julian_days(local, lat, lng):
+    """JD (UT) for naive local datetime64[s] values, one bulk conversion per time zone."""
+    import numpy as np
+    import pandas as pd
+    from kp_engine.timezones import get_resolver
+
+    resolver = get_resolver()
+    zones = {}
+    names = [zones[k] if k in zones else zones.setdefault(k, resolver.timezone_at(*k))
+             for k in zip(lat.tolist(), lng.tolist())]
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object))    # None -> -1
+    # no zone (open ocean): the wall time is taken as UTC, as in kp_engine.chart
+    jd = local.astype(np.int64) / 86400.0 + _JD_UNIX_EPOCH
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    for c, zone in enumerate(uniques):
+        idx = order[bounds[c]:bounds[c + 1]]
+        jd[idx] = resolver.local_to_jd_ut(local[idx], zone)
+    return jd
+
+
+def _dms(deg_within_sign):
+    """Array form of kp_engine.chart.decdeg_to_dms_string."""
+    import numpy as np
+    import pandas as pd
+
+    d = np.floor(deg_within_sign)
+    rem = (deg_within_sign - d) * 60.0
+    m = np.floor(rem)
+    s = np.round((rem - m) * 60.0)
+    m = np.where(s == 60, m + 1, m)
+    s = np.where(s == 60, 0, s)
+    d = np.where(m == 60, d + 1, d)
+    m = np.where(m == 60, 0, m)
+
+    def as_str(a, width):
+        return pd.Series(a.astype(np.int64)).astype(str).str.zfill(width)
+
+    return (as_str(d, 1) + "°" + as_str(m, 2) + "'" + as_str(s, 2) + '"').to_numpy()
+
+
+def tabulate_chunk(df, fmt="csv"):
+    """
+    KP table for one input chunk. Returns (payload, records, rows, errors):
+    CSV text without header for fmt='csv', else a pyarrow Table; errors are (id, message).
+    """
+    import numpy as np
+    import pandas as pd
+    from kp_engine.batch import PLANET_NAMES, compute_chart_batch, sign_index_and_offset, nakshatra_and_pada
+    from kp_engine.constants import SIGNS, NAKSHATRAS, VIMSHOTTARI_ORDER
+    from kp_engine.sublords import kp_lords_bulk
+
+    ids = df['id'].astype(str).to_numpy()
+    errors = []
+    dob = _parse_column(df['dob'], _DATE_FORMATS) if 'dob' in df.columns else pd.Series(pd.NaT, index=df.index)
+    tob = _parse_column(df['tob'], _TIME_FORMATS) if 'tob' in df.columns else pd.Series(pd.NaT, index=df.index)
+    bad_time = (dob.isna() | tob.isna()).to_numpy()
+    lat, lng, failures = _coordinates(df, ~bad_time)      # no geocoding for rows that fail anyway
+
+    bad_place = np.isnan(lat) | np.isnan(lng)
+    for i in np.flatnonzero(bad_time | bad_place):
+        errors.append((ids[i], "bad date or time" if bad_time[i] else failures.get(i, "Could not geocode place.")))
+    keep = np.flatnonzero(~(bad_time | bad_place))
+
+    local = (dob.to_numpy()[keep].astype('datetime64[s]')
+             + (tob - tob.dt.normalize()).to_numpy()[keep].astype('timedelta64[s]'))
+    lat, lng = lat[keep], lng[keep]
+    batch = compute_chart_batch(_julian_days(local, lat, lng), lat, lng, grid=_grid)
+    for i in np.flatnonzero(~batch.ok):
+        errors.append((ids[keep[i]], "ephemeris calculation failed"))
+    ok = batch.ok
+    keep = keep[ok]
+
+    # Asc first, then the planets: (records, 10) arrays
+    asc = batch.asc[ok][:, None]
+    lons = np.hstack([asc, batch.longitudes[ok]])
+    sign, deg_in = sign_index_and_offset(lons)
+    nak, pada = nakshatra_and_pada(lons)
+    sub_lord = kp_lords_bulk(lons).sub_lord
+    bodies = ('Asc',) + PLANET_NAMES
+
+    nak_lords = np.array([lord for _, lord in NAKSHATRAS], dtype=object)
+    table = pd.DataFrame({
+        'id': np.repeat(ids[keep], len(bodies)),
+        'Planet': np.tile(np.array(bodies, dtype=object), len(keep)),
+        'Sign': np.array(SIGNS, dtype=object)[sign.ravel()],
+        'Degree': _dms(deg_in.ravel()),
+        'Pad': pada.ravel(),
+        'Nakshatra Lord': nak_lords[nak.ravel()],
+        'S. Lord': np.array(VIMSHOTTARI_ORDER, dtype=object)[sub_lord.ravel()],
+    }, columns=list(COLUMNS))
+
+    if fmt == "csv":
+        payload = table.to_csv(index=False, header=False)
+    else:
+        import pyarrow as pa
+        payload = pa.Table.from_pandas(table, schema=_arrow_schema(), preserve_index=False)
+    return payload, len(df), len(table), errors
+
+
+# ---------- Output ----------
+def _arrow_schema():
+    import pyarrow as pa
+
+    return pa.schema([('id', pa.string()), ('Planet', pa.string()), ('Sign', pa.string()),
+                      ('Degree', pa.string()), ('Pad', pa.int8()), ('Nakshatra Lord', pa.string()),
+                      ('S. Lord', pa.string())])
+
+
+class CSVSink:
+    fmt = "csv"
+
+    def __init__(self, path):
+        self._fh = open(path, "w", encoding="utf-8", newline="")
+        csv.writer(self._fh).writerow(COLUMNS)
+
+    def write(self, payload):
+        self._fh.write(payload)
+
+    def close(self):
+        self._fh.close()
+
+
+class ParquetSink:
+    fmt = "parquet"
+
+    def __init__(self, path):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("writing Parquet needs pyarrow (pip install pyarrow)") from None
+        self._writer = pq.ParquetWriter(path, _arrow_schema(), compression="zstd")
+
+    def write(self, payload):
+        self._writer.write_table(payload)       # one row group per chunk
+
+    def close(self):
+        self._writer.close()
+
+
+# ---------- Driver ----------
+def run(src, out, chunk_rows=DEFAULT_CHUNK_ROWS, workers=None, grid_path=None, log=print, progress_every=5.0):
+    """Tabulate every record of `src` into `out` (.csv or .parquet). Returns the summary dict."""
+    workers = workers or os.cpu_count() or 1
+    sink = ParquetSink(out) if out.endswith(".parquet") else CSVSink(out)
+    records = rows = failed = 0
+    started = last_log = time.perf_counter()
+
+    try:
+        ctx = multiprocessing.get_context("spawn")
+        with open(out + ".errors.csv", "w", encoding="utf-8", newline="") as err_fh, \
+                ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker, initargs=(grid_path,)) as pool:
+            errors = csv.writer(err_fh)
+            errors.writerow(('id', 'error'))
+            window = deque()
+
+            def drain_one():
+                nonlocal records, rows, failed, last_log
+                future, ids = window.popleft()
+                try:
+                    payload, n_records, n_rows, chunk_errors = future.result()
+                except Exception as e:
+                    # one bad chunk fails its records, not the whole run
+                    message = f"chunk failed: {type(e).__name__}: {e}"
+                    payload, n_records, n_rows, chunk_errors = None, len(ids), 0, [(i, message) for i in ids]
+                if payload is not None:
+                    sink.write(payload)
+                errors.writerows(chunk_errors)
+                records += n_records
+                rows += n_rows
+                failed += len(chunk_errors)
+                now = time.perf_counter()
+                if log and now - last_log >= progress_every:
+                    last_log = now
+                    log(f"{records:,} records, {rows:,} rows — {records / (now - started):,.0f} records/s")
+
+            for chunk in read_chunks(src, chunk_rows):
+                window.append((pool.submit(tabulate_chunk, chunk, sink.fmt), chunk['id'].astype(str).tolist()))
+                if len(window) >= workers * 2:
+                    drain_one()
+            while window:
+                drain_one()
+    finally:
+        sink.close()
+
+    wall = time.perf_counter() - started
+    return {'records': records, 'rows': rows, 'failed': failed, 'wall_seconds': wall,
+            'records_per_second': records / wall if wall else 0.0,
+            'rows_per_second': rows / wall if wall else 0.0}
+
+
+def format_summary(summary):
+    return (f"{summary['records']:,} records -> {summary['rows']:,} rows ({summary['failed']:,} failed) "
+            f"in {summary['wall_seconds']:.1f}s — {summary['records_per_second']:,.0f} records/s, "
+            f"{summary['rows_per_second']:,.0f} rows/s")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Stream KP position tables for a file of birth records.")
+    ap.add_argument("src", help="CSV with a header row, .parquet or .jsonl")
+    ap.add_argument("out", help="output .csv or .parquet")
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="input records per chunk")
+    ap.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    ap.add_argument("--grid", help="kp_engine.ephemeris_grid file to interpolate planets from")
+    args = ap.parse_args(argv)
+    summary = run(args.src, args.out, args.chunk_rows, args.workers, args.grid)
+    print(format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
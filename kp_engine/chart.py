@@ -0,0 +1,362 @@
+"""
+Single-chart KP calculation: the dict-shaped chart the Streamlit app, the
+PDF report and the batch jobs all consume.
+
+`calculate_comprehensive_chart(dob, tob, place)` returns (chart, None) or
+(None, error message). Planets use swisseph with the KP ayanamsa; houses use
+Placidus minus the fixed Chitrapaksha value (see _calc_ascendant).
+"""
+import math
+from bisect import bisect_right
+from datetime import datetime
+
+import pytz
+import swisseph as swe
+
+from kp_engine.constants import CHITRAPAKSHA_AYANAMSA_DEG, SIGNS, SIGN_RULERS, NAKSHATRAS
+from kp_engine.dasha import VimshottariDasha, LEVEL_NAMES
+from kp_engine.geocode import get_coordinates as geocode_cached
+from kp_engine.sublords import kp_lords
+from kp_engine.timezones import get_resolver as get_tz_resolver
+
+
+# ---------- KP SUBLORD (249-sub boundary table) ----------
+def get_sublord_kp_standard(deg360):
+    """
+    KP Sublord from the precomputed 249-sub table (exact arc-second edges).
+    Sublord sequence starts with nakshatra's own lord.
+    """
+    return kp_lords(deg360).sub_lord
+
+# ---------- Helpers ----------
+def deg_to_sign_index_and_offset(deg360):
+    d = float(deg360) % 360.0
+    idx = int(d // 30)
+    deg_in = d - idx * 30
+    return SIGNS[idx], deg_in
+
+def decdeg_to_dms_string(deg_within_sign):
+    """Decimal degrees within sign -> D°M'S\" (seconds precision)."""
+    d = int(math.floor(deg_within_sign))
+    rem = (deg_within_sign - d) * 60.0
+    m = int(math.floor(rem))
+    s = int(round((rem - m) * 60.0))
+    if s == 60:
+        s = 0
+        m += 1
+    if m == 60:
+        m = 0
+        d += 1
+    return f"{d}°{m:02d}'{s:02d}\""
+
+def get_coordinates(place):
+    """(lat, lng) via the shared in-process + SQLite place cache; Nominatim on a miss."""
+    return geocode_cached(place)
+
+
+def _calc_planet_longitude_sidereal(jd_ut, planet_const):
+    """Return sidereal longitude using KRISHNAMURTI ayanamsa."""
+    try:
+        # set per call rather than at import: swisseph's sidereal mode is process-global
+        swe.set_sid_mode(swe.SIDM_KRISHNAMURTI)
+        res = swe.calc_ut(jd_ut, planet_const, swe.FLG_SIDEREAL)
+        lon = res[0][0] if isinstance(res[0], (list, tuple)) else res[0]
+        return float(lon) % 360.0
+    except Exception as e:
+        print(f"Error calculating {planet_const}: {e}")
+        return None
+
+
+
+
+def _calc_planet_longitude_tropical(jd_ut, planet_const):
+    """Calculate tropical longitude."""
+    try:
+        res = swe.calc_ut(jd_ut, planet_const)
+        lon = res[0][0] if isinstance(res[0], (list, tuple)) else res[0]
+        return float(lon) % 360.0
+    except Exception:
+        return None
+
+def _calc_ascendant(jd_ut, lat, lng):
+    """
+    Calculate both tropical and sidereal ascendant/cusps.
+    Uses Chitrapaksha ayanamsa (24°01'00") to match reference documents.
+    Returns: (asc_sid, cusps_sid, asc_trop, cusps_trop, ayanamsa)
+    """
+    try:
+        # Use FIXED Chitrapaksha ayanamsa instead of swisseph's calculation
+        ay = CHITRAPAKSHA_AYANAMSA_DEG  # 24.0166666667°
+        
+        # Calculate tropical houses using Placidus
+        cusps_trop, ascmc_trop = swe.houses(jd_ut, lat, lng, b'P')  # Placidus
+        asc_trop = float(ascmc_trop[0]) % 360.0
+        cusps_trop = [float(c) % 360.0 for c in cusps_trop[:12]]
+        
+        # Convert to sidereal using fixed ayanamsa
+        asc_sid = (asc_trop - ay) % 360.0
+        cusps_sid = [(c - ay) % 360.0 for c in cusps_trop]
+        
+        return asc_sid, cusps_sid, asc_trop, cusps_trop, ay
+    except Exception as e:
+        print(f"ERROR in _calc_ascendant: {e}")
+        return None, None, None, None, None
+
+def get_nakshatra_and_pada(deg360):
+    """
+    Return: (nak_name, nak_lord, nak_index, pada)
+    Robust to floating rounding and consistent with KP (13°20' nakshatra, 4 padas).
+    """
+    # normalized degree 0..360
+    arc = float(deg360) % 360.0
+
+    # exact nak width in degrees and pada width
+    nak_width = 13.0 + (20.0 / 60.0)             # 13°20' = 13.3333333333...
+    pada_width = nak_width / 4.0                # 3°20' = 3.3333333333...
+
+    # tiny epsilon to guard against floating point boundaries (~0.5 arc-second)
+    eps = 1e-6
+
+    # nakshatra index 0..26
+    nak_index = int(math.floor(arc / nak_width))
+    if nak_index >= 27:
+        nak_index = 26
+
+    nak_name, nak_lord = NAKSHATRAS[nak_index]
+
+    # degree inside the nak (0 <= inside < nak_width)
+    inside_nak = arc - (nak_index * nak_width)
+
+    # correct any tiny floating rounding that would make inside_nak == nak_width
+    if inside_nak + eps >= nak_width:
+        # move to next nakshatra (rare)
+        inside_nak = 0.0
+        nak_index = min(26, nak_index + 1)
+        nak_name, nak_lord = NAKSHATRAS[nak_index]
+
+    # compute pada using floor; add epsilon so boundary cases fall consistently to upper pada
+    # e.g. if inside_nak/pada_width is very near to an integer, we want consistent behavior.
+    fraction = inside_nak / pada_width
+    # If fraction is extremely close to an integer (within eps/pada_width), nudge it a touch
+    if abs(round(fraction) - fraction) <= (eps / pada_width):
+        fraction = round(fraction)
+
+    pada = int(math.floor(fraction)) + 1
+
+    # clamp pada into 1..4
+    if pada < 1:
+        pada = 1
+    elif pada > 4:
+        pada = 4
+
+    return nak_name, nak_lord, nak_index, pada
+
+
+
+def classify_position_simple(planet, sign_name, deg_in_sign):
+    """Simple Friend/Neutral/Deb classification."""
+    own = {
+        'Sun':['Leo'], 'Moon':['Cancer'], 'Mars':['Aries','Scorpio'],
+        'Mercury':['Gemini','Virgo'], 'Jupiter':['Sagittarius','Pisces'],
+        'Venus':['Taurus','Libra'], 'Saturn':['Capricorn','Aquarius']
+    }
+    if planet in own and sign_name in own[planet]:
+        return "Friend"
+    
+    EXALT = {
+        'Sun': ('Aries', 10.0), 'Moon': ('Taurus', 3.0),
+        'Mars': ('Capricorn', 28.0), 'Mercury': ('Virgo', 15.0),
+        'Jupiter': ('Cancer', 5.0), 'Venus': ('Pisces', 27.0),
+        'Saturn': ('Libra', 20.0)
+    }
+    exalt = EXALT.get(planet)
+    if exalt and exalt[0] == sign_name:
+        return "Friend"
+    
+    # Check debilitation (opposite to exaltation)
+    DEB = {
+        'Sun': 'Libra', 'Moon': 'Scorpio', 'Mars': 'Cancer',
+        'Mercury': 'Pisces', 'Jupiter': 'Capricorn',
+        'Venus': 'Virgo', 'Saturn': 'Aries'
+    }
+    if planet in DEB and sign_name == DEB[planet]:
+        return "Deb"
+    
+    return "Neutral"
+
+def calculate_vimshottari_dasha(moon_degree, birth_date):
+    """Calculate Vimshottari dasha periods (mahadashas) from the lazy dasha tree."""
+    start = datetime.combine(birth_date, datetime.min.time())
+    return [
+        {'lord': p.lord, 'start': p.start, 'years': p.years, 'end': p.end}
+        for p in VimshottariDasha(moon_degree, start).mahadashas
+    ]
+
+def get_current_dasha(dashas, current_date):
+    """Get current and upcoming dasha (binary search over start dates)."""
+    now = current_date if isinstance(current_date, datetime) else datetime.combine(current_date, datetime.min.time())
+    if not dashas:
+        return None, None
+    if now > dashas[-1]['end']:
+        return dashas[-1], None
+    idx = bisect_right([d['start'] for d in dashas], now) - 1
+    if idx < 0:
+        return None, dashas[0]
+    upcoming = dashas[idx + 1] if (idx + 1) < len(dashas) else None
+    return dashas[idx], upcoming
+
+def _compute_jd_from_local_using_place(dob_date, tob_time, place_str, lat=None, lng=None):
+    """Convert local birth time to Julian Day (UT). Geocodes only if lat/lng are not given."""
+    if lat is None or lng is None:
+        lat, lng = get_coordinates(place_str)
+    if lat is None or lng is None:
+        return None, None, None, None
+    
+    local_dt = datetime.combine(dob_date, tob_time)
+    tzr = get_tz_resolver()
+    tz_name = tzr.timezone_at(lat, lng)
+    
+    if not tz_name:
+        tz_name = "UTC"
+        utc_dt = local_dt
+    else:
+        tz = tzr.zone(tz_name)
+        if local_dt.tzinfo is None:
+            local_dt = tz.localize(local_dt)
+        utc_dt = local_dt.astimezone(pytz.utc)
+    
+    year, month, day = utc_dt.year, utc_dt.month, utc_dt.day
+    hour_decimal = (utc_dt.hour + utc_dt.minute / 60.0 + 
+                   utc_dt.second / 3600.0 + utc_dt.microsecond / 3_600_000_000.0)
+    jd_ut = swe.julday(year, month, day, hour_decimal)
+    
+    return jd_ut, tz_name, lat, lng
+
+def calculate_comprehensive_chart(dob, tob, place):
+    """Calculate complete KP chart."""
+    lat, lng = get_coordinates(place)
+    if lat is None:
+        return None, "Could not geocode place."
+    
+    jd, tz_name, lat, lng = _compute_jd_from_local_using_place(dob, tob, place, lat, lng)
+    if jd is None:
+        return None, "Could not compute JD / timezone."
+    
+    # Calculate ascendant and cusps
+    asc_sid, cusps_sid, asc_trop, cusps_trop, ay = _calc_ascendant(jd, lat, lng)
+    if asc_sid is None:
+        return None, "Could not calculate ascendant."
+    
+    # Calculate planets
+    planets = {
+        'Sun': swe.SUN, 'Moon': swe.MOON, 'Mars': swe.MARS,
+        'Mercury': swe.MERCURY, 'Jupiter': swe.JUPITER,
+        'Venus': swe.VENUS, 'Saturn': swe.SATURN, 'Rahu': swe.TRUE_NODE
+    }
+    
+    planet_data = {}
+    for name, pid in planets.items():
+        lon_sid = _calc_planet_longitude_sidereal(jd, pid)
+        if lon_sid is None:
+            return None, f"Could not compute {name}"
+        
+        sign, deg_in = deg_to_sign_index_and_offset(lon_sid)
+        deg_dms = decdeg_to_dms_string(deg_in)
+        nak_name, nak_lord, nak_index, pada = get_nakshatra_and_pada(lon_sid)
+        sublord = get_sublord_kp_standard(lon_sid)
+        sign_lord = SIGN_RULERS.get(sign, '')
+        position = classify_position_simple(name, sign, deg_in)
+        
+        planet_data[name] = {
+            'full_degree': float(lon_sid),
+            'sign': sign,
+            'degree': deg_dms,
+            'deg_decimal_in_sign': deg_in,
+            'nakshatra': nak_name,
+            'nakshatra_lord': nak_lord,
+            'pada': pada,
+            'sublord': sublord,
+            'sign_lord': sign_lord,
+            'position': position
+        }
+    
+    # Add Ketu (opposite Rahu)
+    if 'Rahu' in planet_data:
+        rahu_deg = planet_data['Rahu']['full_degree']
+        ketu_deg = (rahu_deg + 180.0) % 360.0
+        sign, deg_in = deg_to_sign_index_and_offset(ketu_deg)
+        deg_dms = decdeg_to_dms_string(deg_in)
+        nak_name, nak_lord, nak_index, pada = get_nakshatra_and_pada(ketu_deg)
+        
+        planet_data['Ketu'] = {
+            'full_degree': float(ketu_deg),
+            'sign': sign, 'degree': deg_dms, 'deg_decimal_in_sign': deg_in,
+            'nakshatra': nak_name, 'nakshatra_lord': nak_lord, 'pada': pada,
+            'sublord': get_sublord_kp_standard(ketu_deg),
+            'sign_lord': SIGN_RULERS.get(sign,''), 
+            'position': classify_position_simple('Ketu', sign, deg_in)
+        }
+    
+    # Calculate house cusps data
+    house_data = {}
+    house_names = ['1st (Lagna)', '2nd', '3rd', '4th', '5th', '6th',
+                   '7th', '8th', '9th', '10th', '11th', '12th']
+    
+    for i, cusp_deg in enumerate(cusps_sid):
+        cusp_deg = float(cusp_deg) % 360.0
+        sign, deg_in = deg_to_sign_index_and_offset(cusp_deg)
+        deg_dms = decdeg_to_dms_string(deg_in)
+        nak_name, nak_lord, nak_index, pada = get_nakshatra_and_pada(cusp_deg)
+        sublord = get_sublord_kp_standard(cusp_deg)
+        
+        house_data[house_names[i]] = {
+            'cusp_degree': cusp_deg,
+            'sign': sign, 'degree': deg_dms, 'deg_decimal_in_sign': deg_in,
+            'nakshatra': nak_name, 'nakshatra_lord': nak_lord, 
+            'pada': pada, 'sublord': sublord
+        }
+    
+    # Calculate dashas
+    moon_deg = planet_data['Moon']['full_degree']
+    dashas = calculate_vimshottari_dasha(moon_deg, datetime.combine(dob, tob))
+    current_dasha, upcoming_dasha = get_current_dasha(dashas, datetime.now())
+    dasha_tree = VimshottariDasha(moon_deg, datetime.combine(dob, datetime.min.time()))
+    running = dasha_tree.running(datetime.now(), depth=3)
+    
+    dasha_info = {
+        'current': {
+            'lord': current_dasha['lord'],
+            'start': current_dasha['start'].strftime('%Y-%m-%d'),
+            'end': current_dasha['end'].strftime('%Y-%m-%d'),
+            'years': f"{current_dasha['years']:.2f}"
+        } if current_dasha else None,
+        'upcoming': {
+            'lord': upcoming_dasha['lord'],
+            'start': upcoming_dasha['start'].strftime('%Y-%m-%d'),
+            'years': f"{upcoming_dasha['years']:.0f}"
+        } if upcoming_dasha else None,
+        'running': [
+            {
+                'level': LEVEL_NAMES[p.level - 1],
+                'lord': p.lord,
+                'path': p.path,
+                'start': p.start.strftime('%Y-%m-%d'),
+                'end': p.end.strftime('%Y-%m-%d')
+            } for p in running
+        ]
+    }
+    
+    # Get tropical positions for summary
+    sun_trop = _calc_planet_longitude_tropical(jd, swe.SUN)
+    moon_trop = _calc_planet_longitude_tropical(jd, swe.MOON)
+    
+    return {
+        'houses': house_data,
+        'planets': planet_data,
+        'dashas': dasha_info,
+        'location': {'place': place, 'lat': lat, 'lng': lng, 'tz_name': tz_name},
+        'house_cusps_degrees': cusps_sid,
+        'asc_degree': asc_sid,
+        'ayanamsa': ay,
+        'tropical': {'Sun': sun_trop, 'Moon': moon_trop}
+    }, None
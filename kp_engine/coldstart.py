@@ -0,0 +1,109 @@
+"""
+Import-time (cold start) budgets for the engine.
+
+    python -m kp_engine.coldstart                  # table of import times
+    python -m kp_engine.coldstart --check          # exit 1 if a budget is broken
+    python -m kp_engine.coldstart --json out.json --repeat 7
+
+Each module is imported in a fresh interpreter (`repeat` times, the median
+is kept), so the numbers are what a new Streamlit worker, batch process or
+CLI pays. Besides the time, each run records which heavy dependencies the
+import dragged in. A module breaks its budget if it is slower than its
+milliseconds budget, or if it loads a dependency it is meant to defer.
+Only the import itself is timed, not interpreter start-up.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import NamedTuple
+
+HEAVY = ('numpy', 'PIL', 'reportlab', 'geopy', 'timezonefinder', 'pandas', 'openai', 'httpx', 'streamlit')
+
+
+class Budget(NamedTuple):
+    ms: float
+    allowed: tuple = ()     # heavy dependencies this module may load at import
+
+
+BUDGETS = {
+    'kp_engine': Budget(5),
+    'kp_engine.constants': Budget(10),
+    'kp_engine.sublords': Budget(40),
+    'kp_engine.dasha': Budget(20),
+    'kp_engine.geocode': Budget(25),
+    'kp_engine.timezones': Budget(40),
+    'kp_engine.chart': Budget(80),
+    'kp_engine.render': Budget(30),
+    'kp_engine.vector': Budget(40),
+    'kp_engine.report': Budget(90),
+    'kp_engine.batch': Budget(250, ('numpy',)),
+    'kp_engine.transits': Budget(250, ('numpy',)),
+    'kp_engine.bulk_reports': Budget(80),
+    'kp_engine.bulk_tables': Budget(80),
+    'kp_engine.service': Budget(120),
+    'agents.registry': Budget(200, ('openai', 'httpx')),
+}
+
+_PROBE = (
+    "import json, sys, time\n"
+    "t = time.perf_counter()\n"
+    "import {module}\n"
+    "t = time.perf_counter() - t\n"
+    "print(json.dumps([t, [m for m in {heavy!r} if m in sys.modules]]))\n"
+)
+
+
+def _probe(module, python=sys.executable, cwd=None):
+    """(seconds, heavy deps loaded) for one import in a fresh interpreter."""
+    out = subprocess.run([python, "-c", _PROBE.format(module=module, heavy=HEAVY)], cwd=cwd,
+                         capture_output=True, text=True, check=True).stdout
+    seconds, loaded = json.loads(out.strip().splitlines()[-1])
+    return seconds, loaded
+
+
+def measure(modules=None, repeat=5, python=sys.executable, cwd=None):
+    """{module: {'ms', 'budget_ms', 'loaded', 'unexpected', 'ok'}} for `modules` (default: BUDGETS)."""
+    results = {}
+    for module in modules or BUDGETS:
+        budget = BUDGETS.get(module, Budget(float('inf')))
+        times, loaded = [], []
+        for _ in range(max(1, repeat)):
+            seconds, loaded = _probe(module, python, cwd)
+            times.append(seconds * 1000)
+        ms = statistics.median(times)
+        unexpected = [m for m in loaded if m not in budget.allowed]
+        results[module] = {'ms': ms, 'budget_ms': budget.ms, 'loaded': loaded, 'unexpected': unexpected,
+                           'ok': ms <= budget.ms and not unexpected}
+    return results
+
+
+def format_results(results):
+    lines = [f"{'module':24s} {'ms':>8s} {'budget':>8s}  heavy deps loaded"]
+    for module, r in results.items():
+        flag = "" if r['ok'] else "  <-- over budget" if not r['unexpected'] else "  <-- eager import"
+        deps = ", ".join(r['loaded']) or "-"
+        lines.append(f"{module:24s} {r['ms']:8.1f} {r['budget_ms']:8.0f}  {deps}{flag}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Measure per-module import time against budgets.")
+    ap.add_argument("modules", nargs="*", help="modules to measure (default: every budgeted module)")
+    ap.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module; the median is kept")
+    ap.add_argument("--check", action="store_true", help="exit 1 if any module breaks its budget")
+    ap.add_argument("--json", help="also write the results here")
+    args = ap.parse_args(argv)
+
+    results = measure(args.modules or None, args.repeat)
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    if args.check and not all(r['ok'] for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Static KP / Vedic reference tables."""
+
+CHITRAPAKSHA_AYANAMSA_DEG = 24.0166666667  # 24°01'00" - Chitrapaksha standard
+
+SIGNS = ['Aries','Taurus','Gemini','Cancer','Leo','Virgo','Libra','Scorpio','Sagittarius','Capricorn','Aquarius','Pisces']
+SIGN_RULERS = {
+    'Aries': 'Mars', 'Taurus': 'Venus', 'Gemini': 'Mercury', 'Cancer': 'Moon',
+    'Leo': 'Sun', 'Virgo': 'Mercury', 'Libra': 'Venus', 'Scorpio': 'Mars',
+    'Sagittarius': 'Jupiter', 'Capricorn': 'Saturn', 'Aquarius': 'Saturn', 'Pisces': 'Jupiter'
+}
+NAKSHATRAS = [
+    ('Ashwini','Ketu'), ('Bharani','Venus'), ('Krittika','Sun'),
+    ('Rohini','Moon'), ('Mrigashira','Mars'), ('Ardra','Rahu'),
+    ('Punarvasu','Jupiter'), ('Pushya','Saturn'), ('Ashlesha','Mercury'),
+    ('Magha','Ketu'), ('Purva Phalguni','Venus'), ('Uttara Phalguni','Sun'),
+    ('Hasta','Moon'), ('Chitra','Mars'), ('Swati','Rahu'),
+    ('Vishakha','Jupiter'), ('Anuradha','Saturn'), ('Jyeshtha','Mercury'),
+    ('Mula','Ketu'), ('Purva Ashadha','Venus'), ('Uttara Ashadha','Sun'),
+    ('Shravana','Moon'), ('Dhanishta','Mars'), ('Shatabhisha','Rahu'),
+    ('Purva Bhadrapada','Jupiter'), ('Uttara Bhadrapada','Saturn'), ('Revati','Mercury')
+]
+
+# Vimshottari sequence (Ketu first) and mahadasha years, total = 120
+VIMSHOTTARI_ORDER = ['Ketu', 'Venus', 'Sun', 'Moon', 'Mars', 'Rahu', 'Jupiter', 'Saturn', 'Mercury']
+DASHA_YEARS = [7, 20, 6, 10, 7, 18, 16, 19, 17]
+VIMSHOTTARI_TOTAL_YEARS = 120
+
+# Arc sizes in arc-seconds (all exact integers)
+ARCSEC_PER_CIRCLE = 360 * 3600
+ARCSEC_PER_SIGN = 30 * 3600
+ARCSEC_PER_NAKSHATRA = 48000       # 13°20'
+ARCSEC_PER_PADA = 12000            # 3°20'
@@ -0,0 +1,157 @@
+"""
+Multi-level Vimshottari dasha engine.
+
+Levels: 1 mahadasha, 2 antardasha, 3 pratyantardasha, 4 sookshma, 5 prana.
+Every period of lord L and length D splits into nine sub-periods that start
+with L and follow the Vimshottari order, each D * years / 120 long.
+
+A full five-level tree is ~9^4 nodes per mahadasha, so nothing below the
+mahadashas is built up front: children are generated when asked for (and
+memoised per parent), and "what is running at time t" descends the tree with
+a bisect over each level's sorted start offsets.
+
+Times are kept internally as float days from the birth moment; a year is
+365.25 days, as in app.calculate_vimshottari_dasha.
+"""
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import NamedTuple
+
+from kp_engine.constants import VIMSHOTTARI_ORDER, DASHA_YEARS, VIMSHOTTARI_TOTAL_YEARS
+
+LEVEL_NAMES = ('mahadasha', 'antardasha', 'pratyantardasha', 'sookshma', 'prana')
+MAX_LEVEL = len(LEVEL_NAMES)
+DAYS_PER_YEAR = 365.25
+_NAK_WIDTH = 13.333333333333334
+
+
+class DashaPeriod(NamedTuple):
+    lords: tuple        # lord indices into VIMSHOTTARI_ORDER, mahadasha first
+    start: datetime
+    end: datetime
+
+    @property
+    def level(self):
+        return len(self.lords)
+
+    @property
+    def lord(self):
+        return VIMSHOTTARI_ORDER[self.lords[-1]]
+
+    @property
+    def path(self):
+        """e.g. 'Jupiter/Saturn/Mercury'."""
+        return "/".join(VIMSHOTTARI_ORDER[i] for i in self.lords)
+
+    @property
+    def years(self):
+        return (self.end - self.start).total_seconds() / 86400.0 / DAYS_PER_YEAR
+
+
+class _Node(NamedTuple):
+    lords: tuple
+    start: float        # nominal start, days from birth (may be < 0 for the birth mahadasha)
+    length: float       # nominal length in days
+
+
+class VimshottariDasha:
+    """Lazy dasha tree for one birth. Periods are clipped so nothing starts before birth."""
+
+    def __init__(self, moon_degree, birth_dt, horizon_years=210):
+        self.birth = birth_dt
+        nak_num = int((moon_degree % 360.0) / _NAK_WIDTH) % 27
+        first_lord = nak_num % 9
+        elapsed = (moon_degree % _NAK_WIDTH) / _NAK_WIDTH
+
+        first_len = DASHA_YEARS[first_lord] * DAYS_PER_YEAR
+        nodes = [_Node((first_lord,), -elapsed * first_len, first_len)]
+        i = 1
+        while nodes[-1].start + nodes[-1].length < horizon_years * DAYS_PER_YEAR and i < 30:
+            lord = (first_lord + i) % 9
+            prev = nodes[-1]
+            nodes.append(_Node((lord,), prev.start + prev.length, DASHA_YEARS[lord] * DAYS_PER_YEAR))
+            i += 1
+        self._mahadashas = tuple(nodes)
+        self._md_starts = [max(n.start, 0.0) for n in nodes]
+        self._children = lru_cache(maxsize=4096)(self._build_children)
+
+    # ---------- internals ----------
+    def _days(self, when):
+        if not isinstance(when, datetime):
+            when = datetime.combine(when, datetime.min.time())
+        return (when - self.birth).total_seconds() / 86400.0
+
+    def _period(self, node):
+        start = max(node.start, 0.0)
+        return DashaPeriod(node.lords, self.birth + timedelta(days=start),
+                           self.birth + timedelta(days=node.start + node.length))
+
+    def _build_children(self, node):
+        lord = node.lords[-1]
+        children, starts, pos = [], [], node.start
+        for k in range(9):
+            li = (lord + k) % 9
+            length = node.length * DASHA_YEARS[li] / VIMSHOTTARI_TOTAL_YEARS
+            if pos + length > 0.0:          # drop sub-periods that ended before birth
+                children.append(_Node(node.lords + (li,), pos, length))
+                starts.append(max(pos, 0.0))
+            pos += length
+        return tuple(children), starts
+
+    def _path_at(self, days, level):
+        """Nodes from mahadasha down to `level` containing `days`; [] outside the tree."""
+        if days < 0.0:
+            return []
+        node = self._mahadashas[bisect_right(self._md_starts, days) - 1]
+        if days >= node.start + node.length:
+            return []
+        path = [node]
+        for _ in range(level - 1):
+            children, starts = self._children(node)
+            node = children[max(bisect_right(starts, days) - 1, 0)]
+            path.append(node)
+        return path
+
+    # ---------- public API ----------
+    @property
+    def mahadashas(self):
+        return [self._period(n) for n in self._mahadashas]
+
+    def children(self, period):
+        """Sub-periods of `period` (one level down)."""
+        if period.level >= MAX_LEVEL:
+            return []
+        # locate by the midpoint so datetime rounding at the edges cannot pick a neighbour
+        path = self._path_at(self._days(period.start + (period.end - period.start) / 2), period.level)
+        if not path or path[-1].lords != period.lords:
+            raise ValueError(f"{period.path} is not a period of this chart")
+        return [self._period(c) for c in self._children(path[-1])[0]]
+
+    def period_at(self, when, level=1):
+        """Period running at `when` at the given level (1..5), or None outside the tree."""
+        if not 1 <= level <= MAX_LEVEL:
+            raise ValueError(f"level must be 1..{MAX_LEVEL}")
+        path = self._path_at(self._days(when), level)
+        return self._period(path[-1]) if path else None
+
+    def running(self, when, depth=MAX_LEVEL):
+        """[mahadasha, antardasha, ...] running at `when`, `depth` levels deep."""
+        return [self._period(n) for n in self._path_at(self._days(when), depth)]
+
+    def iter_periods(self, level, start=None, end=None):
+        """Yield periods of one level overlapping [start, end), generating only what is needed."""
+        lo = self._days(start) if start is not None else 0.0
+        hi = self._days(end) if end is not None else float('inf')
+
+        def walk(node):
+            if node.start + node.length <= lo or max(node.start, 0.0) >= hi:
+                return
+            if len(node.lords) == level:
+                yield self._period(node)
+                return
+            for child in self._children(node)[0]:
+                yield from walk(child)
+
+        for md in self._mahadashas:
+            yield from walk(md)
@@ -0,0 +1,194 @@
+"""
+Precomputed sidereal ephemeris grid, memory-mapped and interpolated.
+
+`build_grid` samples swe.calc_ut (KP ayanamsa, with speeds) on a regular
+grid — hourly for the Moon and the true node, daily for everything else —
+and writes one binary file:
+
+    b"KPEPH1\\n" | u64 header length | JSON header | float64 [lon, speed] rows per body
+
+`EphemerisGrid` maps the file read-only (np.memmap), so every worker process
+shares the same page-cache pages instead of loading swisseph state, and
+answers positions by cubic Hermite interpolation on (longitude, speed).
+
+Interpolation error: for a cubic Hermite step h it is at most
+h^4 / 384 * max|d^4 lon/dt^4|, largest at mid-step. Swisseph's built-in
+Moshier ephemeris has small discontinuities, though, so the formula is not a
+real bound. `build_grid` instead checks every body against swisseph at the
+midpoints of a random sample of steps (_ERROR_CHECKS per body). It records the
+observed maximum and 99th percentile (degrees) in the header as
+`max_error_deg` / `p99_error_deg`. With the default steps the typical error
+is ~1e-8 deg and the maximum stays around two arc-seconds; it shrinks when the
+Swiss Ephemeris .se1 files are installed. `EphemerisGrid.max_error` exposes
+the observed maximum. It is an estimate, not a guarantee: a step that was not
+sampled can be worse. kp_engine.batch.compute_chart_batch therefore recomputes
+with swisseph any row that has a grid longitude within GRID_EDGE_MARGIN (3) x
+max_error of a pada or KP sub edge. Its lords never rest on the estimate.
+
+Positions are only defined inside [start_jd, end_jd]; `covers` tells callers
+which JDs to send elsewhere.
+"""
+import argparse
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b"KPEPH1\n"
+DEFAULT_BODIES = ('Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn', 'Rahu')
+DEFAULT_STEP_DAYS = {'Moon': 1.0 / 24.0, 'Rahu': 1.0 / 24.0}
+_ERROR_CHECKS = 50_000    # mid-step checks per body; ~5 s for a daily body over 200 years
+
+
+def _swe_bodies():
+    import swisseph as swe
+    return {
+        'Sun': swe.SUN, 'Moon': swe.MOON, 'Mars': swe.MARS, 'Mercury': swe.MERCURY,
+        'Jupiter': swe.JUPITER, 'Venus': swe.VENUS, 'Saturn': swe.SATURN, 'Rahu': swe.TRUE_NODE,
+    }
+
+
+def _sample(body_id, jds):
+    import swisseph as swe
+    flags = swe.FLG_SIDEREAL | swe.FLG_SPEED
+    out = np.empty((len(jds), 2))
+    for i, jd in enumerate(jds):
+        res = swe.calc_ut(float(jd), body_id, flags)[0]
+        out[i, 0] = res[0]
+        out[i, 1] = res[3]
+    return out
+
+
+def _hermite(rows, start_jd, step, jd):
+    """Cubic Hermite on wrapped longitudes. rows: (n, 2) [lon, speed]."""
+    jd = np.asarray(jd, dtype=np.float64)
+    x = (jd - start_jd) / step
+    i = np.clip(np.floor(x).astype(np.int64), 0, len(rows) - 2)
+    t = x - i
+    l0, v0 = rows[i, 0], rows[i, 1] * step
+    l1, v1 = rows[i + 1, 0], rows[i + 1, 1] * step
+    dl = (l1 - l0 + 180.0) % 360.0 - 180.0      # unwrap across 0/360
+
+    t2, t3 = t * t, t * t * t
+    h10 = t3 - 2 * t2 + t
+    h01 = -2 * t3 + 3 * t2
+    h11 = t3 - t2
+    lon = l0 + h10 * v0 + h01 * dl + h11 * v1
+    # derivative of the Hermite polynomial, back in deg/day
+    d10 = 3 * t2 - 4 * t + 1
+    d01 = -6 * t2 + 6 * t
+    d11 = 3 * t2 - 2 * t
+    speed = (d10 * v0 + d01 * dl + d11 * v1) / step
+    return np.mod(lon, 360.0), speed
+
+
+def build_grid(path, start_year=1900, end_year=2100, bodies=DEFAULT_BODIES, step_days=None, seed=0):
+    """Write a grid file covering [start_year-01-01, end_year-01-01]. Returns the header dict."""
+    import swisseph as swe
+    swe.set_sid_mode(swe.SIDM_KRISHNAMURTI)
+    steps = dict(DEFAULT_STEP_DAYS, **(step_days or {}))
+    start_jd = swe.julday(start_year, 1, 1, 0.0)
+    end_jd = swe.julday(end_year, 1, 1, 0.0)
+    ids = _swe_bodies()
+    rng = np.random.default_rng(seed)
+
+    header = {'sid_mode': 'KRISHNAMURTI', 'start_jd': start_jd, 'end_jd': end_jd, 'bodies': {}}
+    blocks, offset = [], 0
+    for body in bodies:
+        step = steps.get(body, 1.0)
+        n = int(np.ceil((end_jd - start_jd) / step)) + 1
+        rows = _sample(ids[body], start_jd + np.arange(n) * step)
+
+        checked = np.arange(n - 1) if n - 1 <= _ERROR_CHECKS else rng.choice(n - 1, _ERROR_CHECKS, replace=False)
+        mids = start_jd + (checked + 0.5) * step
+        truth = _sample(ids[body], mids)[:, 0]
+        approx, _ = _hermite(rows, start_jd, step, mids)
+        err = np.abs((approx - truth + 180.0) % 360.0 - 180.0)
+
+        header['bodies'][body] = {
+            'offset': offset, 'count': n, 'step': step,
+            'max_error_deg': float(err.max()), 'p99_error_deg': float(np.percentile(err, 99)),
+        }
+        blocks.append(rows)
+        offset += rows.nbytes
+
+    head = json.dumps(header).encode()
+    pad = (-(len(MAGIC) + 8 + len(head))) % 8      # keep the float64 payload 8-byte aligned
+    head += b" " * pad
+    with open(path, "wb") as fh:
+        fh.write(MAGIC)
+        fh.write(struct.pack("<Q", len(head)))
+        fh.write(head)
+        for rows in blocks:
+            fh.write(rows.astype("<f8").tobytes())
+    return header
+
+
+class EphemerisGrid:
+    """Read-only, memory-mapped view of a grid file written by `build_grid`."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fh:
+            if fh.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an ephemeris grid file")
+            (head_len,) = struct.unpack("<Q", fh.read(8))
+            self.header = json.loads(fh.read(head_len))
+        data_offset = len(MAGIC) + 8 + head_len
+        self._mm = np.memmap(path, dtype="<f8", mode="r", offset=data_offset)
+        self.start_jd = self.header['start_jd']
+        self.end_jd = self.header['end_jd']
+        self._bodies = {}
+        for body, meta in self.header['bodies'].items():
+            first = meta['offset'] // 8
+            rows = self._mm[first:first + 2 * meta['count']].reshape(meta['count'], 2)
+            self._bodies[body] = (rows, meta['step'])
+
+    @property
+    def bodies(self):
+        return tuple(self._bodies) + (('Ketu',) if 'Rahu' in self._bodies else ())
+
+    def max_error(self, body):
+        """Largest interpolation error seen at the build's check points, degrees (an estimate, not a bound)."""
+        return self.header['bodies']['Rahu' if body == 'Ketu' else body]['max_error_deg']
+
+    def covers(self, jd):
+        """Boolean mask (or bool) of the JDs inside the grid range."""
+        jd_arr = np.asarray(jd, dtype=np.float64)
+        inside = (jd_arr >= self.start_jd) & (jd_arr <= self.end_jd)
+        return bool(inside) if np.ndim(jd) == 0 else inside
+
+    def position(self, body, jd):
+        """(sidereal longitude, speed deg/day); scalars or arrays of JD (UT)."""
+        key = 'Rahu' if body == 'Ketu' else body
+        rows, step = self._bodies[key]
+        jd_arr = np.asarray(jd, dtype=np.float64)
+        if np.any(jd_arr < self.start_jd) or np.any(jd_arr > self.end_jd):
+            raise ValueError("JD outside the grid range")
+        lon, speed = _hermite(rows, self.start_jd, step, jd_arr)
+        if body == 'Ketu':
+            lon = np.mod(lon + 180.0, 360.0)
+        if np.ndim(jd) == 0:
+            return float(lon), float(speed)
+        return lon, speed
+
+    def longitudes(self, jd, bodies):
+        """(N, len(bodies)) longitudes for an array of JDs."""
+        jd = np.atleast_1d(np.asarray(jd, dtype=np.float64))
+        return np.stack([self.position(b, jd)[0] for b in bodies], axis=1)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build a memory-mapped sidereal ephemeris grid.")
+    ap.add_argument("out", help="output file, e.g. kp_ephemeris.bin")
+    ap.add_argument("--start", type=int, default=1900, help="first year (Jan 1)")
+    ap.add_argument("--end", type=int, default=2100, help="end year (Jan 1, exclusive)")
+    args = ap.parse_args(argv)
+    header = build_grid(args.out, args.start, args.end)
+    for body, meta in header['bodies'].items():
+        print(f"{body:8s} step={meta['step']:.5f}d rows={meta['count']} "
+              f"max_err={meta['max_error_deg']:.2e}° p99={meta['p99_error_deg']:.2e}°")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Offline place lookup from a GeoNames-style cities dump.
+
+`build_index` turns a `citiesNNNN.txt` dump (tab separated, GeoNames column
+order) into two files:
+
+    <out>.npy   fixed-width records sorted by a 64-bit hash of the place name,
+                opened with mmap so worker processes share the pages
+    <out>.json  small sidecar mapping country / admin-region names to codes
+
+`Gazetteer.lookup("Mumbai, India")` hashes the first comma part, bisects the
+record array, filters by any remaining parts (country name or ISO code, admin
+region name or code) and returns the most populous match. No network.
+Qualifiers the index knows nothing about (e.g. a state name when the build
+had no admin1 file) are ignored rather than ruling out every candidate.
+
+Country names resolve through GeoNames countryInfo.txt when the build is
+given `--countries`, then through the ISO 3166 names shipped with pytz
+("India", "United States", ...), then through COUNTRY_ALIASES, so
+"Mumbai, India" works with or without the countries file.
+
+    python -m kp_engine.gazetteer cities15000.txt gazetteer \
+        --countries countryInfo.txt --admin1 admin1CodesASCII.txt
+"""
+import argparse
+import hashlib
+import json
+import re
+import unicodedata
+
+import numpy as np
+
+RECORD_DTYPE = np.dtype([
+    ('key', '<u8'),
+    ('lat', '<f4'),
+    ('lng', '<f4'),
+    ('population', '<u4'),
+    ('country', 'S2'),
+    ('admin1', 'S8'),
+])
+
+# Common spellings that are neither ISO codes nor GeoNames / ISO 3166 country names
+COUNTRY_ALIASES = {'uk': 'GB', 'usa': 'US', 'america': 'US', 'uae': 'AE', 'england': 'GB',
+                   'united kingdom': 'GB', 'great britain': 'GB'}
+
+
+def name_key(text):
+    """Accent-stripped, case-folded, single-spaced form used for hashing names."""
+    s = "".join(c for c in unicodedata.normalize("NFKD", str(text)) if not unicodedata.combining(c))
+    s = re.sub(r"[^\w\s'-]", " ", s.casefold())
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def name_hash(text):
+    return int.from_bytes(hashlib.blake2b(name_key(text).encode(), digest_size=8).digest(), "little")
+
+
+def default_countries():
+    """{name key: ISO code} from pytz's ISO 3166 table plus COUNTRY_ALIASES, for indexes built without --countries."""
+    import pytz
+
+    countries, bare = {}, {}
+    for code, name in pytz.country_names.items():
+        countries[name_key(name)] = code
+        # "Korea (South)" -> "korea" only when the bare name is unambiguous
+        bare.setdefault(name_key(name.split(" (")[0].replace("&", "and")), set()).add(code)
+    for key, codes in bare.items():
+        if len(codes) == 1:
+            countries.setdefault(key, codes.pop())
+    for alias, code in COUNTRY_ALIASES.items():
+        countries.setdefault(alias, code)
+    return countries
+
+
+def _read_tsv(path):
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.startswith("#") or not line.strip():
+                continue
+            yield line.rstrip("\n").split("\t")
+
+
+def build_index(cities_path, out_prefix, countries_path=None, admin1_path=None, include_alternates=True):
+    """Build `<out_prefix>.npy` and `<out_prefix>.json` from GeoNames dumps. Returns record count."""
+    records = []
+    for cols in _read_tsv(cities_path):
+        names = {cols[1], cols[2]}
+        if include_alternates and cols[3]:
+            names.update(cols[3].split(","))
+        keys = {name_hash(n) for n in names if name_key(n)}
+        for key in keys:
+            records.append((key, float(cols[4]), float(cols[5]), int(cols[14] or 0),
+                            cols[8].encode()[:2], cols[10].encode()[:8]))
+    arr = np.array(records, dtype=RECORD_DTYPE)
+    arr.sort(order=('key', 'population'))
+    np.save(out_prefix + ".npy", arr)
+
+    countries, admins = {}, {}
+    if countries_path:
+        for cols in _read_tsv(countries_path):
+            for alias in (cols[0], cols[1], cols[4]):
+                countries[name_key(alias)] = cols[0]
+    for alias, code in default_countries().items():
+        countries.setdefault(alias, code)
+    if admin1_path:
+        for cols in _read_tsv(admin1_path):
+            cc, _, code = cols[0].partition(".")
+            for alias in (cols[1], cols[2]):
+                admins.setdefault(name_key(alias), []).append([cc, code[:8]])
+    with open(out_prefix + ".json", "w", encoding="utf-8") as fh:
+        json.dump({"countries": countries, "admin1": admins}, fh)
+    return len(arr)
+
+
+class Gazetteer:
+    """Read-only view over an index written by `build_index`."""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.records = np.load(prefix + ".npy", mmap_mode="r")
+        self._keys = self.records['key']
+        try:
+            with open(prefix + ".json", encoding="utf-8") as fh:
+                meta = json.load(fh)
+        except FileNotFoundError:
+            meta = {}
+        # indexes built before the ISO 3166 fallback still resolve full country names
+        self.countries = dict(default_countries(), **(meta.get("countries") or {}))
+        self.admin1 = {k: {tuple(x) for x in v} for k, v in (meta.get("admin1") or {}).items()}
+        self._country_codes = set(self.countries.values())
+
+    def __len__(self):
+        return len(self.records)
+
+    def _qualifier_mask(self, cands, qualifier):
+        q = name_key(qualifier)
+        country = cands['country']
+        admin = cands['admin1']
+        mask = np.zeros(len(cands), dtype=bool)
+        codes = {self.countries.get(q)}
+        if len(q) == 2:
+            codes.add(q.upper())
+        for code in codes - {None}:
+            mask |= country == code.encode()
+        for cc, code in self.admin1.get(q, ()):
+            mask |= (country == cc.encode()) & (admin == code.encode())
+        mask |= np.char.lower(admin) == q.encode()[:8]
+        return mask
+
+    def lookup(self, place):
+        """(lat, lng) for "City[, Region][, Country]" or None when the index has no match."""
+        parts = [p for p in (s.strip() for s in str(place or "").split(",")) if p]
+        if not parts or not name_key(parts[0]):
+            return None
+        key = name_hash(parts[0])
+        lo = np.searchsorted(self._keys, key, side="left")
+        hi = np.searchsorted(self._keys, key, side="right")
+        if lo == hi:
+            return None
+        cands = np.asarray(self.records[lo:hi])
+        for qualifier in parts[1:]:
+            q = name_key(qualifier)
+            if not q:
+                continue
+            mask = self._qualifier_mask(cands, qualifier)
+            known = (q in self.countries or q in self.admin1 or q.upper() in self._country_codes)
+            if known or mask.any():
+                cands = cands[mask]
+        if not len(cands):
+            return None
+        best = cands[np.argmax(cands['population'])]
+        # records are float32; GeoNames only carries 5 decimals anyway
+        return round(float(best['lat']), 5), round(float(best['lng']), 5)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build an offline gazetteer index from GeoNames dumps.")
+    ap.add_argument("cities", help="GeoNames citiesNNNN.txt / allCountries.txt")
+    ap.add_argument("out_prefix", help="output path without extension")
+    ap.add_argument("--countries", help="GeoNames countryInfo.txt (default: ISO 3166 names from pytz)")
+    ap.add_argument("--admin1", help="GeoNames admin1CodesASCII.txt")
+    ap.add_argument("--no-alternates", action="store_true", help="index only name/asciiname")
+    args = ap.parse_args(argv)
+    n = build_index(args.cities, args.out_prefix, args.countries, args.admin1,
+                    include_alternates=not args.no_alternates)
+    print(f"Wrote {n} records to {args.out_prefix}.npy")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Cached geocoding.
+
+Lookups go through two layers before touching the network:
+an in-process LRU dict, then a SQLite file shared by every process on the
+host. Keys are normalised place strings, entries expire after a TTL, and the
+SQLite table is trimmed least-recently-used first once it grows past
+`max_entries`. Failed lookups are not cached.
+
+Misses are resolved by a pluggable backend: anything with a
+`lookup(place) -> (lat, lng) | None` method. The default backend uses the
+offline gazetteer named by $ASTROGEN_GAZETTEER (see kp_engine.gazetteer) and
+falls back to Nominatim only for places the gazetteer does not know; set
+$ASTROGEN_GEOCODE_FALLBACK=0 to stay fully offline (with no gazetteer either,
+only places already in the cache resolve).
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "astrogen", "geocode.sqlite3",
+)
+DEFAULT_TTL_SECONDS = 90 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 100_000
+FRONT_CACHE_SIZE = 2048
+
+
+def normalize_place(place):
+    """Canonical cache key: case/accent-folded, single spaces, tidy commas."""
+    s = unicodedata.normalize("NFKC", str(place or "")).casefold()
+    s = re.sub(r"\s*,\s*", ", ", s)
+    s = re.sub(r"\s+", " ", s)
+    return s.strip(" ,")
+
+
+class PlaceCache:
+    """SQLite-backed (lat, lng) cache with TTL and LRU trimming."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS places ("
+            " key TEXT PRIMARY KEY, lat REAL NOT NULL, lng REAL NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS places_last_used ON places(last_used)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT lat, lng, created FROM places WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[2] > self.ttl:
+                self._conn.execute("DELETE FROM places WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE places SET last_used = ? WHERE key = ?", (now, key))
+        return row[0], row[1]
+
+    def put(self, key, lat, lng):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO places (key, lat, lng, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, float(lat), float(lng), now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM places").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM places WHERE key IN "
+                    "(SELECT key FROM places ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM places")
+
+
+class NominatimBackend:
+    """Network lookup through a single, lazily created Nominatim client."""
+
+    def __init__(self, user_agent="astrologyapp", timeout=10):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self._client = None
+
+    def lookup(self, place):
+        if self._client is None:
+            from geopy.geocoders import Nominatim
+            self._client = Nominatim(user_agent=self.user_agent)
+        loc = self._client.geocode(place, timeout=self.timeout)
+        if not loc:
+            return None
+        return loc.latitude, loc.longitude
+
+
+class GazetteerBackend:
+    """Offline lookup against a memory-mapped gazetteer index."""
+
+    def __init__(self, prefix):
+        from kp_engine.gazetteer import Gazetteer
+        self.gazetteer = Gazetteer(prefix)
+
+    def lookup(self, place):
+        return self.gazetteer.lookup(place)
+
+
+class ChainBackend:
+    """Try each backend in order; the first hit wins."""
+
+    def __init__(self, *backends):
+        self.backends = [b for b in backends if b is not None]
+
+    def lookup(self, place):
+        for backend in self.backends:
+            coords = backend.lookup(place)
+            if coords is not None:
+                return coords
+        return None
+
+
+def default_backend():
+    """Gazetteer from $ASTROGEN_GAZETTEER (if set), then Nominatim unless $ASTROGEN_GEOCODE_FALLBACK=0."""
+    gazetteer_prefix = os.getenv("ASTROGEN_GAZETTEER")
+    use_fallback = os.getenv("ASTROGEN_GEOCODE_FALLBACK", "1") != "0"
+    return ChainBackend(
+        GazetteerBackend(gazetteer_prefix) if gazetteer_prefix else None,
+        NominatimBackend() if use_fallback else None,
+    )
+
+
+class CachedGeocoder:
+    """In-process LRU in front of a PlaceCache in front of a lookup backend."""
+
+    def __init__(self, backend=None, cache=None, front_size=FRONT_CACHE_SIZE):
+        self._backend = backend
+        self._cache = cache
+        self._front = OrderedDict()
+        self._front_size = front_size
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = default_backend()
+        return self._backend
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            self._cache = PlaceCache(os.getenv("ASTROGEN_GEOCODE_CACHE", DEFAULT_CACHE_PATH))
+        return self._cache
+
+    def _remember(self, key, coords):
+        with self._lock:
+            self._front[key] = coords
+            self._front.move_to_end(key)
+            while len(self._front) > self._front_size:
+                self._front.popitem(last=False)
+
+    def geocode(self, place):
+        """Return (lat, lng) or (None, None) if the place cannot be resolved."""
+        key = normalize_place(place)
+        if not key:
+            return None, None
+        with self._lock:
+            coords = self._front.get(key)
+            if coords is not None:
+                self._front.move_to_end(key)
+                return coords
+
+        try:
+            coords = self.cache.get(key)
+        except sqlite3.Error:
+            coords = None
+        if coords is None:
+            coords = self.backend.lookup(place)
+            if coords is None:
+                return None, None
+            try:
+                self.cache.put(key, *coords)
+            except sqlite3.Error:
+                pass
+        self._remember(key, coords)
+        return coords
+
+
+_default_geocoder = None
+_default_lock = threading.Lock()
+
+
+def get_default_geocoder():
+    global _default_geocoder
+    if _default_geocoder is None:
+        with _default_lock:
+            if _default_geocoder is None:
+                _default_geocoder = CachedGeocoder()
+    return _default_geocoder
+
+
+def get_coordinates(place):
+    """Cached drop-in for app.get_coordinates: (lat, lng) or (None, None)."""
+    return get_default_geocoder().geocode(place)
@@ -0,0 +1,50 @@
+"""House placement, ownership and significator helpers."""
+from kp_engine.constants import SIGN_RULERS
+
+
+def get_house_number_from_degree(degree, house_cusps):
+    """Determine which house a degree falls into."""
+    d = float(degree) % 360
+    cusps = [float(c) % 360 for c in house_cusps]
+    
+    for i in range(12):
+        current = cusps[i]
+        nxt = cusps[(i + 1) % 12]
+        
+        if current < nxt:
+            if current <= d < nxt:
+                return i + 1
+        else:  # Wraps around 360
+            if d >= current or d < nxt:
+                return i + 1
+    
+    return 1
+
+
+def house_owners(house_signs):
+    """Lord of each house from its cusp sign: {1: 'Mars', ...}."""
+    return {h: SIGN_RULERS.get(sign, '') for h, sign in enumerate(house_signs, start=1)}
+
+
+def kp_significators(planets, house_cusps, house_signs):
+    """
+    Four-level KP significators per planet, as sorted house lists:
+    a = houses occupied by its star lord, b = occupied by the planet,
+    c = owned by its star lord, d = owned by the planet.
+    `planets` maps name -> {'full_degree', 'nakshatra_lord'}.
+    """
+    occupied = {name: get_house_number_from_degree(p['full_degree'], house_cusps) for name, p in planets.items()}
+    owned = {}
+    for h, lord in house_owners(house_signs).items():
+        owned.setdefault(lord, []).append(h)
+
+    result = {}
+    for name, p in planets.items():
+        star = p.get('nakshatra_lord', '')
+        result[name] = {
+            'a': [occupied[star]] if star in occupied else [],
+            'b': [occupied[name]],
+            'c': sorted(owned.get(star, [])),
+            'd': sorted(owned.get(name, [])),
+        }
+    return result
@@ -0,0 +1,179 @@
+"""
+Bounded, size-aware memoisation of computed charts.
+
+Values are stored pickled, which gives an honest byte size for the budget
+and hands every caller its own copy. Eviction is least-recently-used, by
+total bytes first and entry count second.
+
+`SpillingLRUCache` keeps the same memory budget but writes evicted entries
+to a directory (itself bounded, oldest files removed first) and reloads them
+on a later hit, for values that are expensive to rebuild such as PDFs. It
+holds bytes only and stores them raw, in memory and on disk: the spill
+directory may be shared, and unpickling a file from it would run whatever
+code someone managed to put there.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+from kp_engine.geocode import normalize_place
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 * 1024
+_MISSING = object()
+
+
+class SizedLRUCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get(self, key, default=None):
+        with self._lock:
+            blob = self._data.get(key)
+            if blob is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+        return self._decode(blob)
+
+    def _encode(self, value):
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _decode(self, blob):
+        return pickle.loads(blob)
+
+    def put(self, key, value):
+        blob = self._encode(value)
+        if len(blob) > self.max_bytes:
+            self._evicted(key, blob)
+            return
+        evicted = []
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._data[key] = blob
+            self._bytes += len(blob)
+            while self._data and (self._bytes > self.max_bytes or len(self._data) > self.max_entries):
+                item = self._data.popitem(last=False)
+                self._bytes -= len(item[1])
+                evicted.append(item)
+        for k, b in evicted:
+            self._evicted(k, b)
+
+    def _evicted(self, key, blob):
+        """Called outside the lock for every entry dropped from memory."""
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+
+class SpillingLRUCache(SizedLRUCache):
+    """SizedLRUCache of bytes values whose evictions spill to `spill_dir` instead of being dropped."""
+
+    _SUFFIX = ".bin"
+
+    def __init__(self, spill_dir, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        super().__init__(max_bytes=max_bytes, max_entries=max_entries)
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_hits = 0
+        os.makedirs(spill_dir, exist_ok=True)
+
+    def _encode(self, value):
+        if not isinstance(value, (bytes, bytearray, memoryview)):
+            raise TypeError(f"SpillingLRUCache stores bytes, not {type(value).__name__}")
+        return bytes(value)
+
+    def _decode(self, blob):
+        return blob
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, hashlib.sha256(str(key).encode()).hexdigest() + self._SUFFIX)
+
+    def _evicted(self, key, blob):
+        if len(blob) > self.max_disk_bytes:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.spill_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(blob)
+            os.replace(tmp, self._spill_path(key))
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        try:
+            files = [e for e in os.scandir(self.spill_dir) if e.name.endswith(self._SUFFIX)]
+        except OSError:
+            return
+        stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in files]
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in sorted(stats):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+
+    def get(self, key, default=None):
+        value = super().get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        path = self._spill_path(key)
+        try:
+            with open(path, "rb") as fh:
+                blob = fh.read()
+            os.unlink(path)
+        except OSError:
+            return default
+        self.disk_hits += 1
+        self.put(key, blob)            # promote back into memory
+        return blob
+
+    def clear(self):
+        super().clear()
+        for e in os.scandir(self.spill_dir):
+            if e.name.endswith((self._SUFFIX, ".pkl")):      # .pkl: pickled spills of older versions
+                try:
+                    os.unlink(e.path)
+                except OSError:
+                    pass
+
+
+def chart_cache_key(dob, tob, place, **settings):
+    """
+    Canonical key for a birth: ISO date/time, normalised place and every
+    setting that changes the result (ayanamsa, house system, as-of date ...).
+    """
+    parts = [dob.isoformat(), tob.isoformat(), normalize_place(place)]
+    parts += [f"{k}={settings[k]!r}" for k in sorted(settings)]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
@@ -0,0 +1,34 @@
+"""Chaldean name number and life-path number."""
+
+CHALDEAN_MAP = {
+    'A':1, 'I':1, 'J':1, 'Q':1, 'Y':1,
+    'B':2, 'K':2, 'R':2,
+    'C':3, 'G':3, 'L':3, 'S':3,
+    'D':4, 'M':4, 'T':4,
+    'E':5, 'H':5, 'N':5, 'X':5,
+    'U':6, 'V':6, 'W':6,
+    'O':7, 'Z':7,
+    'F':8, 'P':8
+}
+
+def numerology_name_number(name: str) -> int:
+    if not name:
+        return None
+    total = 0
+    for ch in name.upper():
+        if ch.isalpha():
+            total += CHALDEAN_MAP.get(ch, 0)
+    
+    def reduce_to_digit(n):
+        while n > 9:
+            n = sum(int(d) for d in str(n))
+        return n
+    
+    return reduce_to_digit(total)
+
+def numerology_life_path(dob):
+    parts = dob.strftime("%d%m%Y")
+    s = sum(int(ch) for ch in parts)
+    while s > 9:
+        s = sum(int(d) for d in str(s))
+    return s
@@ -0,0 +1,222 @@
+"""
+East-Indian chart rendering (PIL).
+
+`chart_template(size)` holds the static frame geometry (border, grid,
+diagonals, house anchors, font sizes); the raster backend here and the vector
+backends in kp_engine.vector both draw from it.
+
+The chart image depends only on which planet labels sit in which house, so
+rendering is split into cached pieces:
+
+- fonts are loaded once per process and size;
+- the static frame (border, 3x3 grid, diagonals, house-1 marker, footer) is
+  rasterised once per size and copied for each chart;
+- finished PNGs are cached by (layout, size), where the layout is the tuple of
+  labels per house. Any chart with the same layout — the UI image, the PDF
+  image, another session — reuses the bytes.
+"""
+import io
+from functools import lru_cache
+from typing import NamedTuple
+
+from kp_engine.houses import get_house_number_from_degree
+
+BG = (255, 255, 255)
+LINE_COLOR = (0, 0, 0)
+PLANET_COLOR = (2, 48, 99)
+HOUSE_NUM_COLOR = (40, 40, 40)
+FOOTER_NOTE = "House 1 shown. Degrees hidden. Generated by AstroGen."
+
+# House label anchors in cell units (East-Indian style)
+HOUSE_POSITIONS = {
+    1:  (1.50, 2.68, 'center'),
+    2:  (2.73, 2.18, 'right'),
+    3:  (2.73, 1.50, 'right'),
+    4:  (2.73, 0.32, 'right'),
+    5:  (1.50, 0.32, 'center'),
+    6:  (1.50, 1.50, 'center'),
+    7:  (0.27, 1.50, 'left'),
+    8:  (0.27, 2.18, 'left'),
+    9:  (1.50, 2.18, 'center'),
+    10: (0.27, 0.32, 'left'),
+    11: (0.27, 1.82, 'left'),
+    12: (0.80, 2.80, 'center'),
+}
+
+RENDER_CACHE_SIZE = 256
+
+
+def _planet_abbr(name: str) -> str:
+    mapping = {
+        'Sun': 'SUN', 'Moon': 'MOO', 'Mars': 'MAR', 'Mercury': 'MER',
+        'Jupiter': 'JUP', 'Venus': 'VEN', 'Saturn': 'SAT',
+        'Rahu': 'RAH', 'Ketu': 'KET'
+    }
+    return mapping.get(name, name[:3].upper())
+
+
+class ChartTemplate(NamedTuple):
+    """Static East-Indian frame geometry for one size, in pixels (y down)."""
+    size: int
+    pad: int
+    cell: float
+    border: tuple           # (x0, y0, x1, y1) outer border
+    border_width: int
+    inner: tuple            # (x0, y0, x1, y1) chart square
+    line_width: int
+    lines: tuple            # ((x0, y0), (x1, y1)) grid lines and diagonals
+    anchors: dict           # house -> (x, y, 'left' | 'right' | 'center')
+    house_font_px: int
+    planet_font_px: int
+    small_font_px: int
+    label_gap: int
+    marker_radius: int
+
+
+def _geometry(size):
+    pad = int(size * 0.05)
+    inner = size - 2 * pad
+    return pad, inner, inner / 3.0
+
+
+@lru_cache(maxsize=16)
+def chart_template(size):
+    """Frame template shared by the raster (PIL) and vector (SVG / ReportLab) backends."""
+    pad, inner, cell = _geometry(size)
+    ox, oy = pad, pad
+    lines = []
+    for i in range(1, 3):
+        x = ox + i * cell
+        y = oy + i * cell
+        lines.append(((x, oy), (x, oy + inner)))
+        lines.append(((ox, y), (ox + inner, y)))
+    x0, x1, x2, x3 = ox, ox + cell, ox + 2 * cell, ox + 3 * cell
+    y0, y1, y2, y3 = oy, oy + cell, oy + 2 * cell, oy + 3 * cell
+    lines += [((x0, y3), (x1, y2)), ((x3, y3), (x2, y2)), ((x0, y0), (x1, y1)), ((x3, y0), (x2, y1))]
+    return ChartTemplate(
+        size=size,
+        pad=pad,
+        cell=cell,
+        border=(pad // 4, pad // 4, size - pad // 4, size - pad // 4),
+        border_width=max(2, int(size * 0.01)),
+        inner=(ox, oy, ox + inner, oy + inner),
+        line_width=max(1, int(size * 0.003)),
+        lines=tuple(lines),
+        anchors={h: (ox + cx * cell, oy + cy * cell, anchor) for h, (cx, cy, anchor) in HOUSE_POSITIONS.items()},
+        house_font_px=max(10, int(size * 0.018)),
+        planet_font_px=max(11, int(size * 0.030)),
+        small_font_px=max(9, int(size * 0.014)),
+        label_gap=int(size * 0.01),
+        marker_radius=max(3, int(size * 0.006)),
+    )
+
+
+def _text_size(draw, text, font):
+    try:
+        bb = draw.textbbox((0, 0), text, font=font)
+        return bb[2] - bb[0], bb[3] - bb[1]
+    except AttributeError:
+        return draw.textsize(text, font=font)
+
+
+@lru_cache(maxsize=16)
+def _fonts(size):
+    """(house, planet, small) fonts for a chart size, loaded once per process."""
+    from PIL import ImageFont
+
+    tpl = chart_template(size)
+    try:
+        font_house = ImageFont.truetype("DejaVuSans-Bold.ttf", size=tpl.house_font_px)
+        font_planet = ImageFont.truetype("DejaVuSans-Bold.ttf", size=tpl.planet_font_px)
+        font_small = ImageFont.truetype("DejaVuSans.ttf", size=tpl.small_font_px)
+    except Exception:
+        font_house = font_planet = font_small = ImageFont.load_default()
+    return font_house, font_planet, font_small
+
+
+@lru_cache(maxsize=16)
+def _frame(size):
+    """Static chart frame for a size. Callers must copy() before drawing."""
+    from PIL import Image, ImageDraw
+
+    tpl = chart_template(size)
+    font_house, _, font_small = _fonts(size)
+
+    im = Image.new("RGB", (size, size), BG)
+    draw = ImageDraw.Draw(im)
+
+    # Outer border, 3x3 grid and diagonals
+    draw.rectangle(list(tpl.border), outline=LINE_COLOR, width=tpl.border_width)
+    draw.rectangle(list(tpl.inner), outline=LINE_COLOR, width=tpl.line_width)
+    for p0, p1 in tpl.lines:
+        draw.line([p0, p1], fill=LINE_COLOR, width=tpl.line_width)
+
+    # House 1 marker
+    hx, hy, _ = tpl.anchors[1]
+    hw, hh = _text_size(draw, "1", font_house)
+    tx = hx - hw / 2
+    ty = hy - hh / 2
+    draw.rectangle([tx - 4, ty - 2, tx + hw + 4, ty + hh + 2], fill=BG)
+    draw.text((tx, ty), "1", fill=HOUSE_NUM_COLOR, font=font_house)
+
+    # Footer note
+    nw, _ = _text_size(draw, FOOTER_NOTE, font_small)
+    draw.text((size - tpl.pad - nw, size - tpl.pad + 2), FOOTER_NOTE, fill=(70, 70, 70), font=font_small)
+    return im
+
+
+def chart_layout(planet_data, house_cusps_degrees, show_pada=True):
+    """Canonical content key: for houses 1..12, the tuple of planet labels drawn there."""
+    houses = {i: [] for i in range(1, 13)}
+    for pname, pdata in planet_data.items():
+        full_deg = pdata.get('full_degree') if isinstance(pdata, dict) else pdata
+        hnum = get_house_number_from_degree(full_deg, house_cusps_degrees)
+        label = _planet_abbr(pname)
+        if show_pada and isinstance(pdata, dict):
+            p = pdata.get('pada')
+            if p:
+                label = f"{label} p{p}"
+        houses[hnum].append(label)
+    return tuple(tuple(houses[h]) for h in range(1, 13))
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_layout_png(layout, size=900):
+    """PNG bytes for a layout from chart_layout(); cached per (layout, size)."""
+    from PIL import ImageDraw
+
+    tpl = chart_template(size)
+    _, font_planet, _ = _fonts(size)
+    gap = tpl.label_gap
+    circle_r = tpl.marker_radius
+
+    im = _frame(size).copy()
+    draw = ImageDraw.Draw(im)
+    for h, labels in enumerate(layout, start=1):
+        if not labels:
+            continue
+        x, y, anchor = tpl.anchors[h]
+        sizes = [_text_size(draw, lab, font_planet) for lab in labels]
+        total_h = sum(hgt for _, hgt in sizes) + (len(sizes) - 1) * gap
+        cur_y = y - (total_h / 2)
+
+        for lab, (w, hgt) in zip(labels, sizes):
+            if anchor == 'left':
+                txp = x
+            elif anchor == 'right':
+                txp = x - w
+            else:
+                txp = x - (w / 2.0)
+            draw.text((txp, cur_y), lab, fill=PLANET_COLOR, font=font_planet)
+            draw.ellipse((txp - circle_r * 2 - 2, cur_y + hgt / 2 - circle_r,
+                          txp - 2, cur_y + hgt / 2 + circle_r), fill=PLANET_COLOR)
+            cur_y += hgt + gap
+
+    buf = io.BytesIO()
+    im.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def render_chart_png_bytes_pil(planet_data, house_cusps_degrees, size=900, show_pada=True):
+    """Render East-Indian style chart (cached by planet-to-house layout)."""
+    return render_layout_png(chart_layout(planet_data, house_cusps_degrees, show_pada), size)
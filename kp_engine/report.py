@@ -0,0 +1,266 @@
+"""
+PDF chart report.
+
+`generate_pdf_report` builds a multi-page ReportLab document: birth details,
+planetary positions and the vector chart; house cusps and KP significators;
+Vimshottari dasha tables. Paragraph styles and table styles are built once
+per process and reused.
+
+Nothing here runs until a report is asked for, and ReportLab itself is only
+imported then (`warm_up` pays that cost ahead of time, for batch workers).
+`get_pdf_report_cached` memoises the finished bytes by a fingerprint of
+everything printed in the report, in a bounded in-memory LRU that spills
+evicted PDFs to disk ($ASTROGEN_PDF_CACHE, default ~/.cache/astrogen/pdf).
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from kp_engine.constants import SIGN_RULERS, VIMSHOTTARI_TOTAL_YEARS
+from kp_engine.dasha import VimshottariDasha, LEVEL_NAMES, DAYS_PER_YEAR
+from kp_engine.houses import get_house_number_from_degree, house_owners, kp_significators
+from kp_engine.memo import SpillingLRUCache
+from kp_engine.vector import chart_drawing_for
+
+REPORT_VERSION = 2          # bump when the layout changes so cached PDFs are rebuilt
+DEFAULT_PDF_CACHE_DIR = os.getenv("ASTROGEN_PDF_CACHE") or os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "astrogen", "pdf",
+)
+PDF_MEMORY_BYTES = 32 * 1024 * 1024
+PDF_DISK_BYTES = 256 * 1024 * 1024
+INCH = 72.0                 # points, as reportlab.lib.units.inch
+CHART_WIDTH = 5 * INCH
+
+
+# ---------- Cached styles and table templates ----------
+@lru_cache(maxsize=1)
+def _styles():
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    base = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle('CustomTitle', parent=base['Heading1'], fontSize=16,
+                                textColor=colors.HexColor('#8B4513'), alignment=TA_CENTER, spaceAfter=12),
+        'section': ParagraphStyle('Section', parent=base['Heading2'], fontSize=12,
+                                  textColor=colors.HexColor('#8B4513'), spaceBefore=6, spaceAfter=6),
+        'note': ParagraphStyle('Note', parent=base['Normal'], fontSize=8, textColor=colors.grey),
+    }
+
+
+@lru_cache(maxsize=None)
+def _table_style(kind):
+    """'kv': label/value pairs; 'grid': header row plus centred data."""
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    if kind == 'kv':
+        return TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#FFF8DC')),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ])
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E8E8E8')),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ])
+
+
+def _table(rows, col_widths, kind='grid', highlight_row=None):
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    t = Table(rows, colWidths=[w * INCH for w in col_widths], repeatRows=1 if kind == 'grid' else 0)
+    t.setStyle(_table_style(kind))
+    if highlight_row is not None:
+        t.setStyle(TableStyle([('BACKGROUND', (0, highlight_row), (-1, highlight_row), colors.HexColor('#FFF8DC'))]))
+    return t
+
+
+def warm_up():
+    """Import ReportLab and build the cached styles now (batch workers call this once at start)."""
+    import reportlab.platypus  # noqa: F401
+
+    _styles()
+    for kind in ('kv', 'grid'):
+        _table_style(kind)
+
+
+# ---------- Sections ----------
+def _birth_section(birth_data, chart_data, name, numerology):
+    from reportlab.platypus import Spacer
+
+    rows = [
+        ["Name:", name or ""],
+        ["Date of Birth:", str(birth_data['dob'])],
+        ["Time of Birth:", birth_data.get('tob_display', birth_data['tob'].strftime('%I:%M %p'))],
+        ["Place of Birth:", birth_data['place']],
+        ["Gender:", birth_data['gender']],
+        ["Coordinates:", f"{chart_data['location']['lat']:.3f}°, {chart_data['location']['lng']:.3f}°"],
+        ["Ayanamsa:", f"{chart_data.get('ayanamsa', 24.0):.2f}°"]
+    ]
+    if numerology:
+        rows.append(["Name Number:", str(numerology.get('name_number', ''))])
+        rows.append(["Life Path:", str(numerology.get('life_path', ''))])
+    return [_table(rows, [1.6, 4.4], kind='kv'), Spacer(1, 0.15 * INCH)]
+
+
+def _planet_section(chart_data):
+    from reportlab.platypus import Spacer
+
+    rows = [["Entity", "Sign", "Degree", "Nakshatra", "Pada", "Nak Lord", "Sub-lord", "Sign Lord"]]
+    asc = chart_data['houses']['1st (Lagna)']
+    rows.append(["Ascendant", asc['sign'], asc['degree'], asc['nakshatra'], str(asc.get('pada', '')),
+                 asc['nakshatra_lord'], asc['sublord'], SIGN_RULERS.get(asc['sign'], '')])
+
+    # planets in house order from the Lagna
+    house_map = {i: [] for i in range(1, 13)}
+    for pname, pdata in chart_data['planets'].items():
+        hnum = get_house_number_from_degree(pdata['full_degree'], chart_data['house_cusps_degrees'])
+        house_map[hnum].append((pname, pdata))
+    for h in range(1, 13):
+        for pname, pdata in house_map[h]:
+            rows.append([pname, pdata['sign'], pdata['degree'], pdata['nakshatra'], str(pdata.get('pada', '')),
+                         pdata['nakshatra_lord'], pdata['sublord'], pdata.get('sign_lord', '')])
+    return [_table(rows, [0.9, 0.7, 0.9, 1.1, 0.4, 0.9, 0.8, 0.8]), Spacer(1, 0.2 * INCH)]
+
+
+def _cusp_section(chart_data):
+    from reportlab.platypus import Paragraph, Spacer
+
+    houses = list(chart_data['houses'].values())
+    owners = house_owners([h['sign'] for h in houses])
+    rows = [["House", "Sign", "Degree", "Sign Lord", "Nakshatra", "Star Lord", "Sub-lord"]]
+    for i, h in enumerate(houses, start=1):
+        rows.append([str(i), h['sign'], h['degree'], owners[i], h['nakshatra'], h['nakshatra_lord'], h['sublord']])
+    return [Paragraph("House Cusps (Placidus)", _styles()['section']),
+            _table(rows, [0.6, 0.9, 0.9, 0.9, 1.1, 0.9, 0.9]), Spacer(1, 0.2 * INCH)]
+
+
+def _significator_section(chart_data):
+    from reportlab.platypus import Paragraph, Spacer
+
+    sig = kp_significators(chart_data['planets'], chart_data['house_cusps_degrees'],
+                           [h['sign'] for h in chart_data['houses'].values()])
+
+    def fmt(houses):
+        return ", ".join(str(h) for h in houses) or "-"
+
+    rows = [["Planet", "Star Lord", "A: Star lord occupies", "B: Occupies", "C: Star lord owns", "D: Owns"]]
+    for pname, pdata in chart_data['planets'].items():
+        s = sig[pname]
+        rows.append([pname, pdata['nakshatra_lord'], fmt(s['a']), fmt(s['b']), fmt(s['c']), fmt(s['d'])])
+    return [Paragraph("KP Significators", _styles()['section']),
+            _table(rows, [0.8, 0.8, 1.35, 0.9, 1.25, 0.9]),
+            Paragraph("A is the strongest level, D the weakest.", _styles()['note']),
+            Spacer(1, 0.2 * INCH)]
+
+
+def _dasha_rows(periods, now):
+    rows, current = [["Lord", "Start", "End", "Years"]], None
+    for i, p in enumerate(periods, start=1):
+        rows.append([p.path, p.start.strftime('%Y-%m-%d'), p.end.strftime('%Y-%m-%d'), f"{p.years:.2f}"])
+        if p.start <= now < p.end:
+            current = i
+    return rows, current
+
+
+def _dasha_section(birth_data, chart_data, now):
+    from reportlab.platypus import Paragraph, Spacer
+
+    # same tree as the app: Moon longitude, counted from the birth date; one 120-year cycle shown
+    tree = VimshottariDasha(chart_data['planets']['Moon']['full_degree'],
+                            datetime.combine(birth_data['dob'], datetime.min.time()))
+    story = [Paragraph("Vimshottari Dasha", _styles()['section'])]
+    span_end = tree.birth + timedelta(days=VIMSHOTTARI_TOTAL_YEARS * DAYS_PER_YEAR)
+    rows, cur = _dasha_rows([p for p in tree.mahadashas if p.start < span_end], now)
+    story += [Paragraph(LEVEL_NAMES[0].title() + "s", _styles()['note']),
+              _table(rows, [2.4, 1.2, 1.2, 0.8], highlight_row=cur), Spacer(1, 0.15 * INCH)]
+
+    # antardashas of the running mahadasha, pratyantardashas of the running antardasha
+    for parent in tree.running(now, depth=2):
+        rows, cur = _dasha_rows(tree.children(parent), now)
+        story += [Paragraph(f"{LEVEL_NAMES[parent.level].title()}s of {parent.path}", _styles()['note']),
+                  _table(rows, [2.4, 1.2, 1.2, 0.8], highlight_row=cur), Spacer(1, 0.15 * INCH)]
+    return story
+
+
+def generate_pdf_report(birth_data, chart_data, name=None, numerology=None, now=None, chart_flowable=None):
+    """Generate PDF report. `chart_flowable` is a prebuilt chart drawing (see kp_engine.vector)."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+
+    now = now or datetime.now()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5 * INCH, bottomMargin=0.5 * INCH)
+    story = [Paragraph("🙏 KP ASTROLOGY CHART REPORT", _styles()['title']), Spacer(1, 0.1 * INCH)]
+    story += _birth_section(birth_data, chart_data, name, numerology)
+    story += _planet_section(chart_data)
+    # Chart (vector drawing, no embedded bitmap)
+    if chart_flowable is None:
+        chart_flowable = chart_drawing_for(chart_data['planets'], chart_data['house_cusps_degrees'],
+                                           CHART_WIDTH, show_pada=True)
+    story.append(chart_flowable)
+    story += _cusp_section(chart_data)
+    story += _significator_section(chart_data)
+    story.append(PageBreak())
+    story += _dasha_section(birth_data, chart_data, now)
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+# ---------- Cache ----------
+def report_fingerprint(birth_data, chart_data, name=None, numerology=None, as_of=None):
+    """sha256 of everything the report prints, plus REPORT_VERSION and the as-of date."""
+    payload = {
+        'v': REPORT_VERSION,
+        'birth': birth_data,
+        'name': name or "",
+        'numerology': numerology or {},
+        'as_of': as_of or datetime.now().date(),
+        'location': chart_data['location'],
+        'ayanamsa': chart_data.get('ayanamsa'),
+        'cusps': [round(float(c), 9) for c in chart_data['house_cusps_degrees']],
+        'planets': {p: round(float(d['full_degree']), 9) for p, d in chart_data['planets'].items()},
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+_pdf_cache = None
+_pdf_cache_lock = threading.Lock()
+
+
+def get_pdf_cache():
+    global _pdf_cache
+    if _pdf_cache is None:
+        with _pdf_cache_lock:
+            if _pdf_cache is None:
+                _pdf_cache = SpillingLRUCache(DEFAULT_PDF_CACHE_DIR, max_bytes=PDF_MEMORY_BYTES,
+                                              max_disk_bytes=PDF_DISK_BYTES)
+    return _pdf_cache
+
+
+def get_pdf_report_cached(birth_data, chart_data, name=None, numerology=None, cache=None):
+    """PDF bytes for a report, built at most once per fingerprint."""
+    if cache is None:
+        cache = get_pdf_cache()
+    key = report_fingerprint(birth_data, chart_data, name, numerology)
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = generate_pdf_report(birth_data, chart_data, name, numerology).getvalue()
+        cache.put(key, pdf)
+    return pdf
@@ -0,0 +1,445 @@
+"""
+HTTP JSON API in front of the chart engine.
+
+    python -m kp_engine.service --port 8800 --workers 4
+    curl 'http://127.0.0.1:8800/v1/chart?dob=15/08/1990&tob=05:30&place=Mumbai,%20India'
+
+Endpoints (GET with query parameters, or POST with a JSON object; birth
+fields are dob, tob and place as in kp_engine.bulk_reports manifests):
+
+    /v1/chart                   the full chart dict, as the app uses it
+    /v1/dasha                   running periods (?depth=1..5, ?as_of=) and the mahadashas
+    /v1/sublords                sign/star/sub/sub-sub lords of planets and cusps,
+                                or of raw longitudes with ?deg=12.5,200.25 (no birth needed)
+    /v1/chart.png, /v1/chart.svg    the rendered chart (?size=, ?pada=0)
+    /healthz, /stats
+
+Charts are computed in a process pool whose workers are started and warmed
+(engine imported, KP sidereal mode set, timezone polygons loaded) before the
+server accepts connections; the response bodies are built there too. The
+parent only parses, routes and waits:
+
+- responses are cached by (endpoint, birth key, options) in a SizedLRUCache,
+  with an ETag so clients can revalidate for free;
+- identical requests that arrive while one is being computed share its
+  future instead of queueing again;
+- at most `max_queue` distinct computations are queued or running; beyond
+  that requests are shed at once with 503 + Retry-After rather than piling
+  up behind a backlog, and a request that waits longer than `timeout` gets
+  504 (its result is still cached when it lands);
+- a failing upstream geocoder answers 503 + Retry-After (unreachable, timed
+  out, rate limited) or 502, with a short message, and is not cached.
+
+Birth keys include today's date, because the chart's current dasha does.
+"""
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from kp_engine.memo import SizedLRUCache, chart_cache_key
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_QUEUE_PER_WORKER = 8
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_TASKS_PER_CHILD = 10_000
+WORKER_CHART_CACHE_BYTES = 16 * 1024 * 1024
+
+ENDPOINTS = ('chart', 'dasha', 'sublords', 'chart.png', 'chart.svg')
+_OPTIONS = {           # option -> endpoints it applies to; anything else is ignored (and kept out of keys)
+    'depth': ('dasha',), 'as_of': ('dasha',),
+    'size': ('chart.png', 'chart.svg'), 'pada': ('chart.png', 'chart.svg'),
+}
+_JSON = "application/json"
+
+
+class Overloaded(RuntimeError):
+    """The queue is full; the request was shed."""
+
+
+# ---------- Worker process ----------
+_chart_memo = None
+_warm_barrier = None
+WARM_UP_TIMEOUT = 120.0
+
+
+def _init_worker(warm_barrier=None):
+    """Import and warm everything a request needs once per process."""
+    global _chart_memo, _warm_barrier
+    import swisseph as swe
+    import kp_engine.chart  # noqa: F401
+    from kp_engine.timezones import get_resolver
+
+    swe.set_sid_mode(swe.SIDM_KRISHNAMURTI)
+    get_resolver().finder           # timezone polygons are the slowest thing to load
+    _chart_memo = SizedLRUCache(max_bytes=WORKER_CHART_CACHE_BYTES)
+    _warm_barrier = warm_barrier
+
+
+def _ping():
+    """Start-up ping: blocks until every worker holds one, so each ping lands on a different process."""
+    if _warm_barrier is not None:
+        _warm_barrier.wait(WARM_UP_TIMEOUT)
+    return os.getpid()
+
+
+def _geocoder_failure(exc):
+    """(status, message) if `exc` means the upstream geocoder failed, else None."""
+    from geopy import exc as geopy_exc
+
+    if isinstance(exc, (geopy_exc.GeocoderTimedOut, geopy_exc.GeocoderUnavailable,
+                        geopy_exc.GeocoderQuotaExceeded, geopy_exc.GeocoderRateLimited, ConnectionError)):
+        return 503, "geocoding service unavailable; try again later"
+    if isinstance(exc, geopy_exc.GeopyError):
+        return 502, "geocoding service error"
+    return None
+
+
+def _json_body(payload, status=200):
+    return status, _JSON, json.dumps(payload, default=str).encode()
+
+
+def _chart(dob, tob, place):
+    from kp_engine.chart import calculate_comprehensive_chart
+
+    key = chart_cache_key(dob, tob, place, as_of=date.today())
+    chart = _chart_memo.get(key)
+    if chart is None:
+        chart, error = calculate_comprehensive_chart(dob, tob, place)
+        if chart is None:
+            return None, error
+        _chart_memo.put(key, chart)
+    return chart, None
+
+
+def _lords(deg):
+    from kp_engine.sublords import kp_lords
+
+    lords = kp_lords(deg)
+    return {'degree': float(deg) % 360.0, 'sign': lords.sign, 'star_lord': lords.star_lord,
+            'sub_lord': lords.sub_lord, 'sub_sub_lord': lords.sub_sub_lord}
+
+
+def _dasha_payload(chart, dob, options):
+    from kp_engine.dasha import VimshottariDasha, LEVEL_NAMES
+
+    tree = VimshottariDasha(chart['planets']['Moon']['full_degree'], datetime.combine(dob, datetime.min.time()))
+    as_of = options.get('as_of', date.today())
+
+    def period(p):
+        return {'lord': p.lord, 'path': p.path, 'start': p.start.strftime('%Y-%m-%d'),
+                'end': p.end.strftime('%Y-%m-%d'), 'years': round(p.years, 4)}
+
+    return {
+        'as_of': as_of,
+        'running': [{'level': LEVEL_NAMES[p.level - 1], **period(p)}
+                    for p in tree.running(as_of, options.get('depth', 3))],
+        'mahadashas': [period(p) for p in tree.mahadashas],
+    }
+
+
+def compute(endpoint, dob, tob, place, options):
+    """Build one response in a worker: (status, content type, body bytes)."""
+    try:
+        chart, error = _chart(dob, tob, place)
+    except Exception as e:
+        failure = _geocoder_failure(e)
+        if failure is None:
+            raise
+        return _json_body({'error': failure[1]}, failure[0])
+    if chart is None:
+        return _json_body({'error': error}, 422)
+    if endpoint == 'chart':
+        return _json_body(chart)
+    if endpoint == 'dasha':
+        return _json_body(_dasha_payload(chart, dob, options))
+    if endpoint == 'sublords':
+        return _json_body({
+            'planets': {name: _lords(p['full_degree']) for name, p in chart['planets'].items()},
+            'cusps': [_lords(c) for c in chart['house_cusps_degrees']],
+        })
+    if endpoint == 'chart.png':
+        from kp_engine.render import render_chart_png_bytes_pil
+        png = render_chart_png_bytes_pil(chart['planets'], chart['house_cusps_degrees'],
+                                         options.get('size', 900), options.get('pada', True))
+        return 200, "image/png", png
+    from kp_engine.vector import render_chart_svg
+    svg = render_chart_svg(chart['planets'], chart['house_cusps_degrees'],
+                           options.get('size', 900), options.get('pada', True))
+    return 200, "image/svg+xml", svg.encode()
+
+
+# ---------- Request parsing ----------
+def _parse_options(endpoint, params):
+    """Validated options for `endpoint`, as a sorted tuple of (name, value) pairs."""
+    from kp_engine.bulk_reports import _parse_date
+
+    options = {}
+    for name, value in params.items():
+        if endpoint not in _OPTIONS.get(name, ()):
+            continue
+        if name == 'depth':
+            value = int(value)
+            if not 1 <= value <= 5:
+                raise ValueError("depth must be 1..5")
+        elif name == 'as_of':
+            value = _parse_date(value)
+        elif name == 'size':
+            value = int(value)
+            if not 200 <= value <= 2400:
+                raise ValueError("size must be 200..2400")
+        elif name == 'pada':
+            value = str(value).lower() not in ("0", "false", "no")
+        options[name] = value
+    return tuple(sorted(options.items()))
+
+
+def parse_degrees(value):
+    """Finite longitudes from ?deg= (comma-separated string or JSON list); ValueError otherwise."""
+    degrees = value.split(",") if isinstance(value, str) else value
+    out = [float(d) for d in degrees]
+    if not all(math.isfinite(d) for d in out):
+        raise ValueError("deg values must be finite numbers")
+    return out
+
+
+def parse_request(endpoint, params):
+    """(dob, tob, place, options) from query/JSON parameters; ValueError on bad input."""
+    from kp_engine.bulk_reports import _parse_date, _parse_time
+
+    missing = [f for f in ('dob', 'tob', 'place') if not str(params.get(f) or "").strip()]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    return (_parse_date(params['dob']), _parse_time(params['tob']), str(params['place']).strip(),
+            _parse_options(endpoint, params))
+
+
+# ---------- Dispatcher ----------
+class ChartService:
+    """Process pool + response cache + request coalescing + bounded queue."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_queue=None, timeout=DEFAULT_TIMEOUT,
+                 cache_bytes=DEFAULT_CACHE_BYTES, max_tasks_per_child=DEFAULT_MAX_TASKS_PER_CHILD):
+        self.workers = workers
+        self.max_queue = max_queue or workers * DEFAULT_QUEUE_PER_WORKER
+        self.timeout = timeout
+        self.max_tasks_per_child = max_tasks_per_child
+        self.cache = SizedLRUCache(max_bytes=cache_bytes)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._pool = None
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'computed': 0, 'shed': 0,
+                      'timeouts': 0, 'errors': 0, 'queued': 0, 'peak_queued': 0, 'pool_restarts': 0}
+
+    def start(self):
+        """Start the workers and wait until every one has run its initializer."""
+        ctx = multiprocessing.get_context("spawn")
+        # the pool spawns a process per submit only while none is idle; pings that wait for
+        # each other keep every worker busy, so all `workers` processes start and warm up now
+        barrier = ctx.Barrier(self.workers)
+        self._pool = ProcessPoolExecutor(self.workers, mp_context=ctx, initializer=_init_worker,
+                                         initargs=(barrier,), max_tasks_per_child=self.max_tasks_per_child)
+        pids = {f.result() for f in [self._pool.submit(_ping) for _ in range(self.workers)]}
+        return len(pids)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    def _count(self, **deltas):
+        with self._lock:
+            for k, v in deltas.items():
+                self.stats[k] += v
+
+    def _finished(self, key, future):
+        with self._lock:
+            self._inflight.pop(key, None)
+            self.stats['queued'] -= 1
+        if future.cancelled() or future.exception() is not None:
+            return
+        if future.result()[0] == 200:
+            self.cache.put(key, future.result())
+
+    def _submit(self, key, args):
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats['coalesced'] += 1
+                return future
+            if self.stats['queued'] >= self.max_queue:
+                self.stats['shed'] += 1
+                raise Overloaded(f"{self.stats['queued']} requests queued")
+            try:
+                future = self._pool.submit(compute, *args)
+            except BrokenProcessPool:
+                # a worker died (OOM, segfault in the ephemeris); replace the pool and carry on
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self.start()
+                self.stats['pool_restarts'] += 1
+                future = self._pool.submit(compute, *args)
+            self._inflight[key] = future
+            self.stats['queued'] += 1
+            self.stats['computed'] += 1
+            self.stats['peak_queued'] = max(self.stats['peak_queued'], self.stats['queued'])
+        future.add_done_callback(lambda f: self._finished(key, f))
+        return future
+
+    def handle(self, endpoint, dob, tob, place, options=()):
+        """(status, content type, body) for a parsed request; raises Overloaded or TimeoutError."""
+        self._count(requests=1)
+        key = (endpoint, chart_cache_key(dob, tob, place, as_of=date.today()), options)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._count(cache_hits=1)
+            return cached
+        future = self._submit(key, (endpoint, dob, tob, place, dict(options)))
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            self._count(timeouts=1)
+            raise TimeoutError(f"no answer within {self.timeout:g}s") from None
+        except Exception:
+            self._count(errors=1)
+            raise
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats.update(workers=self.workers, max_queue=self.max_queue, cache_entries=len(self.cache),
+                     cache_bytes=self.cache.nbytes)
+        return stats
+
+
+# ---------- HTTP ----------
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "AstroGenChartAPI/1"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, status, content_type, body, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in headers:
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _error(self, status, message, headers=()):
+        self._send(*_json_body({'error': message}, status), headers=headers)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self._route(url.path, dict(parse_qsl(url.query)))
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            params = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._error(400, "invalid JSON")
+        if not isinstance(params, dict):
+            return self._error(400, "expected a JSON object")
+        self._route(url.path, {**dict(parse_qsl(url.query)), **params})
+
+    def _route(self, path, params):
+        service = self.server.service
+        path = path.rstrip("/")
+        if path == "/healthz":
+            return self._send(*_json_body({'status': 'ok'}))
+        if path == "/stats":
+            return self._send(*_json_body(service.snapshot()))
+        endpoint = path[len("/v1/"):] if path.startswith("/v1/") else None
+        if endpoint not in ENDPOINTS:
+            return self._error(404, f"unknown endpoint {path!r}")
+
+        try:
+            if endpoint == 'sublords' and 'deg' in params and 'dob' not in params:
+                degrees = parse_degrees(params['deg'])
+                return self._send(*_json_body({'longitudes': [_lords(d) for d in degrees]}))
+            dob, tob, place, options = parse_request(endpoint, params)
+        except (TypeError, ValueError) as e:
+            return self._error(400, str(e))
+
+        try:
+            status, content_type, body = service.handle(endpoint, dob, tob, place, options)
+        except Overloaded as e:
+            return self._error(503, f"overloaded: {e}", headers=(("Retry-After", "1"),))
+        except TimeoutError as e:
+            return self._error(504, str(e))
+        except Exception as e:
+            return self._error(500, f"{type(e).__name__}: {e}")
+
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        headers = (("ETag", etag), ("Cache-Control", "private, max-age=3600"))
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            return self._send(304, content_type, b"", headers=headers)
+        if status != 200:
+            headers = (("Retry-After", "30"),) if status == 503 else ()
+        self._send(status, content_type, body, headers=headers)
+
+
+class ChartAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, verbose=False):
+        super().__init__(address, _Handler)
+        self.service = service
+        self.verbose = verbose
+
+
+def serve(service, host="127.0.0.1", port=8800, verbose=False):
+    """Start `service`'s workers, then serve until interrupted."""
+    started = time.perf_counter()
+    n = service.start()
+    server = ChartAPIServer((host, port), service, verbose)
+    print(f"{n} workers warm in {time.perf_counter() - started:.1f}s; "
+          f"chart API on http://{host}:{server.server_address[1]}/v1/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="HTTP JSON API for KP charts.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8800)
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="chart worker processes")
+    ap.add_argument("--max-queue", type=int, default=None,
+                    help=f"distinct computations queued or running before shedding "
+                         f"(default {DEFAULT_QUEUE_PER_WORKER} per worker)")
+    ap.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds a request may wait")
+    ap.add_argument("--cache-mb", type=float, default=DEFAULT_CACHE_BYTES / 2**20, help="response cache size")
+    ap.add_argument("--max-tasks-per-child", type=int, default=DEFAULT_MAX_TASKS_PER_CHILD,
+                    help="recycle a worker after this many requests")
+    ap.add_argument("--verbose", action="store_true", help="log every request")
+    args = ap.parse_args(argv)
+    service = ChartService(args.workers, args.max_queue, args.timeout, int(args.cache_mb * 2**20),
+                           args.max_tasks_per_child)
+    serve(service, args.host, args.port, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Precomputed KP sub-lord boundaries.
+
+The zodiac is cut into 27 nakshatras of 48000" and each nakshatra into nine
+Vimshottari subs starting with the nakshatra's own lord, i.e. a sub of lord L
+spans DASHA_YEARS[L] * 400". Six subs straddle a sign boundary and are split
+in two, which gives the classic 249-row KP table. Every edge is an exact
+rational number of arc-seconds; lookups are a single bisect over the edges.
+Intervals are half-open, so a longitude sitting exactly on an edge belongs to
+the row that starts there.
+"""
+from bisect import bisect_right
+from fractions import Fraction
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple
+
+from kp_engine.constants import (
+    SIGNS, NAKSHATRAS, VIMSHOTTARI_ORDER, DASHA_YEARS, VIMSHOTTARI_TOTAL_YEARS,
+    ARCSEC_PER_CIRCLE, ARCSEC_PER_SIGN, ARCSEC_PER_NAKSHATRA,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class KPSub(NamedTuple):
+    """One row of the 249-sub table. Edges are in arc-seconds."""
+    index: int
+    start: Fraction
+    end: Fraction
+    sign_index: int
+    nakshatra_index: int
+    star_lord_index: int
+    sub_lord_index: int
+    sub_start: Fraction   # start of the (unsplit) sub, used for sub-sub lords
+
+
+class KPLords(NamedTuple):
+    sign: str
+    star_lord: str
+    sub_lord: str
+    sub_sub_lord: str
+
+
+class KPLordIndices(NamedTuple):
+    """Array result of `kp_lords_bulk`; lord indices refer to VIMSHOTTARI_ORDER."""
+    sub: 'np.ndarray'
+    sign: 'np.ndarray'
+    nakshatra: 'np.ndarray'
+    star_lord: 'np.ndarray'
+    sub_lord: 'np.ndarray'
+    sub_sub_lord: 'np.ndarray'
+
+
+def _rotated_spans(lord_idx, total):
+    """(lord index, width) for the nine Vimshottari portions of `total`, starting at lord_idx."""
+    spans = []
+    for k in range(9):
+        li = (lord_idx + k) % 9
+        spans.append((li, total * Fraction(DASHA_YEARS[li], VIMSHOTTARI_TOTAL_YEARS)))
+    return spans
+
+
+def _build_sub_table():
+    rows = []
+    for nak_idx, (_, star_lord) in enumerate(NAKSHATRAS):
+        star_lord_idx = VIMSHOTTARI_ORDER.index(star_lord)
+        pos = Fraction(nak_idx * ARCSEC_PER_NAKSHATRA)
+        for sub_lord_idx, width in _rotated_spans(star_lord_idx, Fraction(ARCSEC_PER_NAKSHATRA)):
+            sub_start, sub_end = pos, pos + width
+            # split the sub where it crosses a sign boundary
+            edges = [sub_start]
+            boundary = (sub_start // ARCSEC_PER_SIGN + 1) * ARCSEC_PER_SIGN
+            if sub_start < boundary < sub_end:
+                edges.append(Fraction(boundary))
+            edges.append(sub_end)
+            for a, b in zip(edges, edges[1:]):
+                rows.append(KPSub(len(rows), a, b, int(a // ARCSEC_PER_SIGN), nak_idx,
+                                  star_lord_idx, sub_lord_idx, sub_start))
+            pos = sub_end
+    assert len(rows) == 249 and rows[-1].end == ARCSEC_PER_CIRCLE
+    return tuple(rows)
+
+
+def _build_sub_sub_edges():
+    """Per sub lord: cumulative end offsets (arc-seconds from sub start) of its nine sub-subs."""
+    table = []
+    for lord_idx in range(9):
+        sub_width = Fraction(DASHA_YEARS[lord_idx] * ARCSEC_PER_NAKSHATRA, VIMSHOTTARI_TOTAL_YEARS)
+        cum, ends = Fraction(0), []
+        for _, width in _rotated_spans(lord_idx, sub_width):
+            cum += width
+            ends.append(cum)
+        table.append(tuple(ends))
+    return tuple(table)
+
+
+KP_SUB_TABLE = _build_sub_table()
+KP_SUB_SUB_EDGES = _build_sub_sub_edges()
+
+# Float mirrors used for searching. Sub edges are whole arc-seconds, so these are exact.
+_SUB_STARTS = tuple(float(r.start) for r in KP_SUB_TABLE)
+_SUB_SUB_ENDS = tuple(tuple(float(e) for e in ends) for ends in KP_SUB_SUB_EDGES)
+
+
+@lru_cache(maxsize=1)
+def _np_tables():
+    """NumPy copies of the table for kp_lords_bulk, built on first use so importing stays NumPy-free."""
+    import numpy as np
+
+    starts = np.array(_SUB_STARTS)
+    sub_sub_inner = np.array([ends[:-1] for ends in _SUB_SUB_ENDS])  # (9, 8)
+    columns = {
+        field: np.array([getattr(r, field) for r in KP_SUB_TABLE], dtype=np.int16)
+        for field in ('sign_index', 'nakshatra_index', 'star_lord_index', 'sub_lord_index')
+    }
+    sub_start = np.array([float(r.sub_start) for r in KP_SUB_TABLE])
+    return starts, sub_sub_inner, columns, sub_start
+
+
+def _arcsec(deg360):
+    x = (float(deg360) % 360.0) * 3600.0
+    return x if x < ARCSEC_PER_CIRCLE else 0.0  # tiny negatives wrap to exactly 360
+
+
+def kp_sub_index(deg360):
+    """Row index (0..248) into KP_SUB_TABLE for a longitude in degrees."""
+    return min(bisect_right(_SUB_STARTS, _arcsec(deg360)) - 1, 248)
+
+
+def kp_lords(deg360):
+    """Sign, star lord, sub lord and sub-sub lord for a sidereal longitude."""
+    x = _arcsec(deg360)
+    row = KP_SUB_TABLE[min(bisect_right(_SUB_STARTS, x) - 1, 248)]
+    ends = _SUB_SUB_ENDS[row.sub_lord_index]
+    k = min(bisect_right(ends, x - float(row.sub_start)), 8)
+    return KPLords(
+        SIGNS[row.sign_index],
+        VIMSHOTTARI_ORDER[row.star_lord_index],
+        VIMSHOTTARI_ORDER[row.sub_lord_index],
+        VIMSHOTTARI_ORDER[(row.sub_lord_index + k) % 9],
+    )
+
+
+def kp_lords_bulk(longitudes):
+    """
+    Vectorised `kp_lords` for an array of longitudes (degrees).
+    Returns integer index arrays rather than names to keep memory flat.
+    """
+    import numpy as np
+
+    starts, sub_sub_inner, columns, sub_start = _np_tables()
+    x = np.mod(np.asarray(longitudes, dtype=np.float64), 360.0) * 3600.0
+    x = np.where(x < ARCSEC_PER_CIRCLE, x, 0.0)
+    rows = np.clip(np.searchsorted(starts, x, side='right') - 1, 0, 248)
+    sub_lord = columns['sub_lord_index'][rows]
+    offset = x - sub_start[rows]
+    k = (offset[..., None] >= sub_sub_inner[sub_lord]).sum(axis=-1)
+    return KPLordIndices(
+        sub=rows.astype(np.int16),
+        sign=columns['sign_index'][rows],
+        nakshatra=columns['nakshatra_index'][rows],
+        star_lord=columns['star_lord_index'][rows],
+        sub_lord=sub_lord,
+        sub_sub_lord=((sub_lord + k) % 9).astype(np.int16),
+    )
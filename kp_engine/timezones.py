@@ -0,0 +1,152 @@
+"""
+Process-wide timezone resolution.
+
+TimezoneFinder (5.x) seeks and reads shared file handles, so it is not
+thread-safe. Each thread lazily gets its own finder, and cache misses in
+different threads resolve in parallel instead of queueing on one lock. Point
+lookups are cached on a lat/lng grid (default 0.001°, roughly 100 m): the
+zone is resolved once at the centre of each cell, so results never depend on
+query order. pytz zones are cached by name, and each zone can be flattened
+into an `OffsetTable` of UTC transition instants so that many local birth
+times in one zone convert to UTC / JD as NumPy array operations (NumPy is
+imported only by those bulk paths). Ambiguous and non-existent local times
+resolve the same way as `tz.localize(dt)` (pytz's is_dst=False default).
+"""
+import threading
+from datetime import datetime
+from functools import lru_cache
+
+import pytz
+
+DEFAULT_GRID_DEG = 0.001
+GRID_CACHE_SIZE = 1 << 16
+
+_EPOCH = datetime(1970, 1, 1)
+_JD_UNIX_EPOCH = 2440587.5
+_DAY = 86400
+
+
+class OffsetTable:
+    """UTC offset history of one zone as sorted arrays (seconds since the Unix epoch)."""
+
+    def __init__(self, tz):
+        import numpy as np
+
+        self.zone = tz.zone
+        trans = getattr(tz, '_utc_transition_times', None)
+        if trans:
+            info = tz._transition_info
+            self.transitions = np.array([int((t - _EPOCH).total_seconds()) for t in trans], dtype=np.int64)
+            self.offsets = np.array([int(i[0].total_seconds()) for i in info], dtype=np.int64)
+            self.dst = np.array([bool(i[1]) for i in info])
+            # pytz starts the table at datetime.min; make sure nothing falls before it
+            self.transitions[0] = np.iinfo(np.int64).min // 2
+        else:
+            off = tz.utcoffset(datetime(2000, 1, 1))
+            self.transitions = np.array([np.iinfo(np.int64).min // 2], dtype=np.int64)
+            self.offsets = np.array([int(off.total_seconds()) if off else 0], dtype=np.int64)
+            self.dst = np.array([False])
+
+    def _index_at_utc(self, utc_seconds):
+        import numpy as np
+
+        return np.searchsorted(self.transitions, utc_seconds, side='right') - 1
+
+    def utc_offsets(self, utc_seconds):
+        """Offset (seconds) in force at each UTC instant."""
+        import numpy as np
+
+        return self.offsets[self._index_at_utc(np.asarray(utc_seconds, dtype=np.int64))]
+
+    def local_to_utc(self, local_seconds):
+        """Wall-clock seconds (naive, as if UTC) -> UTC seconds, vectorised."""
+        import numpy as np
+
+        local = np.asarray(local_seconds, dtype=np.int64)
+        last = len(self.offsets) - 1
+        first = self._index_at_utc(local - _DAY)
+
+        # a local time maps to period i if it lands inside it once shifted by that period's offset
+        idx = np.minimum(first + np.arange(4).reshape((4,) + (1,) * local.ndim), last)
+        offs = self.offsets[idx]
+        valid = self._index_at_utc(local - offs) == idx
+        std = valid & ~self.dst[idx]
+        # ambiguous: prefer standard time, then the smallest offset (latest UTC), as pytz does
+        pool = np.where(std.any(axis=0), std, valid)
+        best = np.where(pool, offs, np.iinfo(np.int64).max).min(axis=0)
+        found = valid.any(axis=0)
+
+        gap = ~found
+        if gap.any():
+            # non-existent wall time: localize(dt - 6h) + 6h, i.e. the offset before the gap
+            best[gap] = local[gap] - 6 * 3600 - self.local_to_utc(local[gap] - 6 * 3600)
+        return local - best
+
+
+class TimezoneResolver:
+    """Lazily initialised per-thread TimezoneFinder + grid cache + per-zone caches."""
+
+    def __init__(self, grid_deg=DEFAULT_GRID_DEG, cache_size=GRID_CACHE_SIZE, in_memory=False):
+        self.grid_deg = grid_deg
+        self.in_memory = in_memory
+        self._local = threading.local()
+        self._cell_zone = lru_cache(maxsize=cache_size)(self._resolve_cell)
+        self._zones = {}
+        self._tables = {}
+
+    @property
+    def finder(self):
+        """This thread's TimezoneFinder (in_memory=True copies the data into every thread that looks up)."""
+        finder = getattr(self._local, 'finder', None)
+        if finder is None:
+            from timezonefinder import TimezoneFinder
+            finder = self._local.finder = TimezoneFinder(in_memory=self.in_memory)
+        return finder
+
+    def _resolve_cell(self, qlat, qlng):
+        return self.finder.timezone_at(lat=qlat * self.grid_deg, lng=qlng * self.grid_deg)
+
+    def timezone_at(self, lat, lng):
+        """IANA zone name for a point, or None (open ocean / unknown)."""
+        return self._cell_zone(round(float(lat) / self.grid_deg), round(float(lng) / self.grid_deg))
+
+    def zone(self, name):
+        tz = self._zones.get(name)
+        if tz is None:
+            tz = self._zones[name] = pytz.timezone(name)
+        return tz
+
+    def offset_table(self, name):
+        table = self._tables.get(name)
+        if table is None:
+            table = self._tables[name] = OffsetTable(self.zone(name))
+        return table
+
+    def local_to_utc(self, local_dt, name):
+        """Naive local datetime -> aware UTC datetime (same result as tz.localize)."""
+        return self.zone(name).localize(local_dt).astimezone(pytz.utc)
+
+    def local_to_jd_ut(self, local_datetimes, name):
+        """
+        Vectorised local -> JD (UT) for many wall-clock times in one zone.
+        Accepts datetime64 arrays or sequences of naive datetimes.
+        """
+        import numpy as np
+
+        local = np.asarray(local_datetimes, dtype='datetime64[s]').astype(np.int64)
+        utc = self.offset_table(name).local_to_utc(local)
+        return utc / _DAY + _JD_UNIX_EPOCH
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    """The shared, process-wide TimezoneResolver."""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = TimezoneResolver()
+    return _resolver
@@ -0,0 +1,230 @@
+"""
+Transit ingress search.
+
+Finds the moments a body crosses sign, nakshatra, pada or KP sub boundaries
+(sidereal, KP ayanamsa) over arbitrary date ranges without day-by-day
+sampling of every boundary:
+
+1. step through time with a per-body step short enough that at most one
+   station (speed sign change) falls inside a step;
+2. split a step at the station, found by root-finding the speed, so motion is
+   monotonic on each piece;
+3. every boundary between the two end longitudes of a monotonic piece is
+   crossed exactly once; refine each crossing with Newton steps on
+   swe.calc_ut speed, safeguarded by bisection and never leaving the piece.
+   A piece that apparently moved more than 180 degrees is a nearly stationary
+   one that drifted a hair the wrong way, and crosses nothing.
+
+The true node turns round every few days, so the nodes use bracketing
+instead of a short fixed step: a bracket [a, c] can only cross boundary b if
+dist(lon_a, b) + dist(b, lon_c) <= MAX_SPEED * (c - a). Brackets that cannot
+reach any boundary are skipped after one calc_ut call; the rest are halved
+down to NODE_LEAF_DAYS and then handled as in 2-3. Long node steps therefore
+cost about one call each away from boundaries.
+
+Retrograde re-entries fall out naturally as crossings with direction -1.
+Events are computed one calendar year at a time and memoised per
+(body, division, year), so repeated and overlapping queries are cheap.
+"""
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+import swisseph as swe
+
+from kp_engine.sublords import KP_SUB_TABLE
+
+BODIES = {
+    'Sun': swe.SUN, 'Moon': swe.MOON, 'Mars': swe.MARS, 'Mercury': swe.MERCURY,
+    'Jupiter': swe.JUPITER, 'Venus': swe.VENUS, 'Saturn': swe.SATURN,
+    'Rahu': swe.TRUE_NODE, 'Ketu': swe.TRUE_NODE,
+}
+
+# Scan step in days; each is well under the body's shortest direct/retrograde run,
+# except for the nodes, whose steps are bracketed with MAX_SPEED
+SCAN_STEP_DAYS = {
+    'Sun': 5.0, 'Moon': 0.5, 'Mars': 4.0, 'Mercury': 2.0, 'Jupiter': 8.0,
+    'Venus': 3.0, 'Saturn': 8.0, 'Rahu': 8.0, 'Ketu': 8.0,
+}
+
+# Upper bound on |speed| in deg/day (true node: 0.256 observed over 1900-2100, plus margin)
+MAX_SPEED = {'Rahu': 0.35, 'Ketu': 0.35}
+NODE_LEAF_DAYS = 0.5
+
+DIVISIONS = {
+    'sign': np.arange(12) * 30.0,
+    'nakshatra': np.arange(27) * (40.0 / 3.0),
+    'pada': np.arange(108) * (10.0 / 3.0),
+    'sub': np.array([float(r.start) / 3600.0 for r in KP_SUB_TABLE]),
+}
+
+TIME_TOL_DAYS = 1e-7    # ~0.01 s
+_JD_UNIX_EPOCH = 2440587.5
+_FLAGS = swe.FLG_SIDEREAL | swe.FLG_SPEED
+
+
+class TransitEvent(NamedTuple):
+    jd: float           # JD (UT) of the crossing
+    body: str
+    division: str       # 'sign' | 'nakshatra' | 'pada' | 'sub'
+    index: int          # segment entered (sign 0..11, nakshatra 0..26, pada 0..107, sub 0..248)
+    direction: int      # +1 direct, -1 retrograde
+    boundary: float     # boundary longitude in degrees
+
+    @property
+    def datetime(self):
+        """UTC datetime of the event."""
+        return datetime(1970, 1, 1) + timedelta(days=self.jd - _JD_UNIX_EPOCH)
+
+
+def jd_from_datetime(dt):
+    """Naive UTC datetime -> JD (UT)."""
+    return (dt - datetime(1970, 1, 1)).total_seconds() / 86400.0 + _JD_UNIX_EPOCH
+
+
+def segment_index(lon, division):
+    """Segment of `division` containing a longitude."""
+    bounds = DIVISIONS[division]
+    return int(np.searchsorted(bounds, float(lon) % 360.0, side='right') - 1)
+
+
+def position(body, jd):
+    """(sidereal longitude, speed in deg/day) of a body at JD (UT)."""
+    res = swe.calc_ut(jd, BODIES[body], _FLAGS)[0]
+    lon = res[0] + 180.0 if body == 'Ketu' else res[0]
+    return lon % 360.0, res[3]
+
+
+def _wrap(x):
+    return (x + 180.0) % 360.0 - 180.0
+
+
+def _find_station(body, a, c, sa):
+    """Time in [a, c] where speed changes sign (sa = speed at a)."""
+    for _ in range(60):
+        if c - a < TIME_TOL_DAYS:
+            break
+        m = 0.5 * (a + c)
+        sm = position(body, m)[1]
+        if (sm > 0) == (sa > 0):
+            a, sa = m, sm
+        else:
+            c = m
+    return 0.5 * (a + c)
+
+
+def _refine_crossing(body, boundary, a, c):
+    """Crossing time of `boundary` in [a, c], where motion is monotonic."""
+    ga = _wrap(position(body, a)[0] - boundary)
+    gc = _wrap(position(body, c)[0] - boundary)
+    t = a + (c - a) * (-ga / (gc - ga)) if gc != ga else 0.5 * (a + c)
+    if not a < t < c:
+        t = 0.5 * (a + c)
+    for _ in range(60):
+        lon, speed = position(body, t)
+        gt = _wrap(lon - boundary)
+        if (gt < 0) == (ga < 0):
+            a, ga = t, gt
+        else:
+            c = t
+        if c - a < TIME_TOL_DAYS or abs(gt) < 1e-10:
+            break
+        # Newton step on the longitude, falling back to bisection if it leaves the bracket
+        t_next = t - gt / speed if speed else None
+        t = t_next if t_next is not None and a < t_next < c else 0.5 * (a + c)
+    return t
+
+
+def _monotonic_crossings(body, division, a, c, lon_a, lon_c, direct):
+    bounds = DIVISIONS[division]
+    n = len(bounds)
+    if direct:
+        span = (lon_c - lon_a) % 360.0
+        offs = (bounds - lon_a) % 360.0
+        hit = (offs > 0) & (offs <= span)
+    else:
+        span = (lon_a - lon_c) % 360.0
+        offs = (lon_a - bounds) % 360.0
+        hit = offs < span
+    if span > 180.0:
+        # a near-stationary piece ended marginally behind its start: no crossing
+        return []
+    events = []
+    for k in np.flatnonzero(hit)[np.argsort(offs[hit])]:
+        t = _refine_crossing(body, bounds[k], a, c)
+        entered = int(k) if direct else int(k - 1) % n
+        events.append(TransitEvent(float(t), body, division, entered, 1 if direct else -1, float(bounds[k])))
+    return events
+
+
+def _reachable(bounds, lon_a, lon_c, travel):
+    """True if some boundary could be crossed going from lon_a to lon_c within `travel` degrees."""
+    return bool(np.any(np.abs(_wrap(bounds - lon_a)) + np.abs(_wrap(bounds - lon_c)) <= travel))
+
+
+def _step_crossings(body, division, a, lon_a, sp_a, c, lon_c, sp_c):
+    vmax = MAX_SPEED.get(body)
+    if vmax is not None:
+        if not _reachable(DIVISIONS[division], lon_a, lon_c, vmax * (c - a)):
+            return []
+        if c - a > NODE_LEAF_DAYS:
+            m = 0.5 * (a + c)
+            lon_m, sp_m = position(body, m)
+            return (_step_crossings(body, division, a, lon_a, sp_a, m, lon_m, sp_m)
+                    + _step_crossings(body, division, m, lon_m, sp_m, c, lon_c, sp_c))
+    pieces = [(a, lon_a, c, lon_c, sp_a >= 0)]
+    if (sp_a >= 0) != (sp_c >= 0):
+        s = _find_station(body, a, c, sp_a)
+        lon_s = position(body, s)[0]
+        pieces = [(a, lon_a, s, lon_s, sp_a >= 0), (s, lon_s, c, lon_c, sp_c >= 0)]
+    events = []
+    for pa, la, pc, lc, direct in pieces:
+        events.extend(_monotonic_crossings(body, division, pa, pc, la, lc, direct))
+    return events
+
+
+def scan_transits(body, division, start_jd, end_jd):
+    """All crossings in [start_jd, end_jd), uncached, in time order."""
+    if body not in BODIES:
+        raise ValueError(f"unknown body {body!r}")
+    if division not in DIVISIONS:
+        raise ValueError(f"division must be one of {sorted(DIVISIONS)}")
+    swe.set_sid_mode(swe.SIDM_KRISHNAMURTI)
+    step = SCAN_STEP_DAYS[body]
+    events = []
+    a = start_jd
+    lon_a, sp_a = position(body, a)
+    while a < end_jd:
+        c = min(a + step, end_jd)
+        lon_c, sp_c = position(body, c)
+        events.extend(_step_crossings(body, division, a, lon_a, sp_a, c, lon_c, sp_c))
+        a, lon_a, sp_a = c, lon_c, sp_c
+    return [e for e in events if start_jd <= e.jd < end_jd]
+
+
+def _year_start_jd(year):
+    return swe.julday(year, 1, 1, 0.0)
+
+
+@lru_cache(maxsize=1024)
+def _year_events(body, division, year):
+    return tuple(scan_transits(body, division, _year_start_jd(year), _year_start_jd(year + 1)))
+
+
+def iter_transits(body, division, start_jd, end_jd):
+    """Event stream for [start_jd, end_jd), served from the per-year cache."""
+    year = swe.revjul(start_jd)[0]
+    while _year_start_jd(year) < end_jd:
+        for ev in _year_events(body, division, year):
+            if start_jd <= ev.jd < end_jd:
+                yield ev
+        year += 1
+
+
+def next_ingress(body, division, target_index, after_jd, max_years=200):
+    """First time after `after_jd` that `body` enters segment `target_index` (either direction)."""
+    for ev in iter_transits(body, division, after_jd, after_jd + max_years * 365.25):
+        if ev.index == target_index:
+            return ev
+    return None
@@ -0,0 +1,170 @@
+"""
+Vector chart backends: SVG for the UI and a ReportLab Drawing for the PDF.
+
+Both fill planet labels into the frame from kp_engine.render.chart_template,
+so they match the PIL raster chart house for house. The static part of each
+output is built once per size; a chart only adds its labels. SVG output is a
+few kilobytes and is cached by (layout, size) like the PNGs.
+"""
+from functools import lru_cache
+from html import escape
+
+from kp_engine.render import (
+    BG, LINE_COLOR, PLANET_COLOR, HOUSE_NUM_COLOR, FOOTER_NOTE,
+    chart_template, chart_layout, _fonts,
+)
+
+SVG_FONT_FAMILY = "DejaVu Sans, Verdana, sans-serif"
+RL_FONT_BOLD = "Helvetica-Bold"
+RL_FONT = "Helvetica"
+_CAP_HEIGHT = 0.73       # cap height / font size for the label fonts
+_ROW_HEIGHT = 0.96       # label row height / font size, as PIL measures it for DejaVu Bold
+_TEXT_ANCHOR = {'left': 'start', 'right': 'end', 'center': 'middle'}
+
+
+def _hex(rgb):
+    return "#%02x%02x%02x" % rgb
+
+
+def _place_labels(tpl, house, labels, width_of):
+    """(anchor, [(label, x, baseline y, marker cx, marker cy)]) for one house, template pixels, y down."""
+    x, y, anchor = tpl.anchors[house]
+    fs = tpl.planet_font_px
+    row = fs * _ROW_HEIGHT
+    total_h = len(labels) * row + (len(labels) - 1) * tpl.label_gap
+    top = y - total_h / 2
+    rows = []
+    for lab in labels:
+        w = width_of(lab)
+        if anchor == 'left':
+            left = x
+        elif anchor == 'right':
+            left = x - w
+        else:
+            left = x - w / 2.0
+        mid = top + row / 2
+        rows.append((lab, x, mid + fs * (_CAP_HEIGHT / 2 + 0.04), left - tpl.marker_radius - 2, mid))
+        top += row + tpl.label_gap
+    return anchor, rows
+
+
+# ---------- SVG ----------
+@lru_cache(maxsize=16)
+def _svg_frame(size):
+    """(head, tail) of the SVG document for a size; labels go in between."""
+    tpl = chart_template(size)
+    line = _hex(LINE_COLOR)
+    bx0, by0, bx1, by1 = tpl.border
+    ix0, iy0, ix1, iy1 = tpl.inner
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+        f'width="{size}" height="{size}" font-family="{SVG_FONT_FAMILY}">',
+        f'<rect width="{size}" height="{size}" fill="{_hex(BG)}"/>',
+        f'<g fill="none" stroke="{line}">',
+        f'<rect x="{bx0}" y="{by0}" width="{bx1 - bx0}" height="{by1 - by0}" stroke-width="{tpl.border_width}"/>',
+        f'<rect x="{ix0}" y="{iy0}" width="{ix1 - ix0}" height="{iy1 - iy0}" stroke-width="{tpl.line_width}"/>',
+        f'<path stroke-width="{tpl.line_width}" d="'
+        + " ".join(f"M{a[0]:.1f} {a[1]:.1f}L{b[0]:.1f} {b[1]:.1f}" for a, b in tpl.lines) + '"/>',
+        '</g>',
+    ]
+    hx, hy, _ = tpl.anchors[1]
+    fs = tpl.house_font_px
+    parts.append(f'<rect x="{hx - fs * 0.5:.1f}" y="{hy - fs * 0.6:.1f}" width="{fs:.1f}" height="{fs * 1.2:.1f}" '
+                 f'fill="{_hex(BG)}"/>')
+    parts.append(f'<text x="{hx:.1f}" y="{hy + fs * _CAP_HEIGHT / 2:.1f}" font-size="{fs}" font-weight="bold" '
+                 f'text-anchor="middle" fill="{_hex(HOUSE_NUM_COLOR)}">1</text>')
+    parts.append(f'<text x="{size - tpl.pad}" y="{size - tpl.pad + 2 + tpl.small_font_px}" '
+                 f'font-size="{tpl.small_font_px}" text-anchor="end" fill="#464646">{escape(FOOTER_NOTE, quote=False)}</text>')
+    parts.append(f'<g fill="{_hex(PLANET_COLOR)}" font-size="{tpl.planet_font_px}" font-weight="bold">')
+    return "".join(parts), "</g></svg>"
+
+
+@lru_cache(maxsize=256)
+def render_layout_svg(layout, size=900):
+    """SVG text for a layout from chart_layout(); cached per (layout, size)."""
+    tpl = chart_template(size)
+    head, tail = _svg_frame(size)
+    font = _fonts(size)[1]
+    r = tpl.marker_radius
+    body = []
+    for h, labels in enumerate(layout, start=1):
+        if not labels:
+            continue
+        anchor, rows = _place_labels(tpl, h, labels, font.getlength)
+        ta = _TEXT_ANCHOR[anchor]
+        for lab, x, base, mx, my in rows:
+            body.append(f'<text x="{x:.1f}" y="{base:.1f}" text-anchor="{ta}">{escape(lab, quote=False)}</text>'
+                        f'<circle cx="{mx:.1f}" cy="{my:.1f}" r="{r}"/>')
+    return head + "".join(body) + tail
+
+
+def render_chart_svg(planet_data, house_cusps_degrees, size=900, show_pada=True):
+    """East-Indian chart as an SVG string (same layout as render_chart_png_bytes_pil)."""
+    return render_layout_svg(chart_layout(planet_data, house_cusps_degrees, show_pada), size)
+
+
+# ---------- ReportLab ----------
+def _rl_color(rgb):
+    from reportlab.lib import colors
+    return colors.Color(*(c / 255.0 for c in rgb))
+
+
+@lru_cache(maxsize=16)
+def _rl_frame(size):
+    """ReportLab Group with the static frame, in template pixels with y flipped up."""
+    from reportlab.graphics.shapes import Group, Rect, Line, String
+    tpl = chart_template(size)
+    line = _rl_color(LINE_COLOR)
+    g = Group()
+    bx0, by0, bx1, by1 = tpl.border
+    g.add(Rect(bx0, size - by1, bx1 - bx0, by1 - by0, fillColor=None,
+               strokeColor=line, strokeWidth=tpl.border_width))
+    ix0, iy0, ix1, iy1 = tpl.inner
+    g.add(Rect(ix0, size - iy1, ix1 - ix0, iy1 - iy0, fillColor=None,
+               strokeColor=line, strokeWidth=tpl.line_width))
+    for (x0, y0), (x1, y1) in tpl.lines:
+        g.add(Line(x0, size - y0, x1, size - y1, strokeColor=line, strokeWidth=tpl.line_width))
+
+    hx, hy, _ = tpl.anchors[1]
+    fs = tpl.house_font_px
+    g.add(Rect(hx - fs * 0.5, size - hy - fs * 0.6, fs, fs * 1.2,
+               fillColor=_rl_color(BG), strokeColor=None))
+    g.add(String(hx, size - hy - fs * _CAP_HEIGHT / 2, "1", fontName=RL_FONT_BOLD, fontSize=fs,
+                 fillColor=_rl_color(HOUSE_NUM_COLOR), textAnchor='middle'))
+    g.add(String(size - tpl.pad, tpl.pad - 2 - tpl.small_font_px, FOOTER_NOTE, fontName=RL_FONT,
+                 fontSize=tpl.small_font_px, fillColor=_rl_color((70, 70, 70)), textAnchor='end'))
+    return g
+
+
+def chart_drawing(layout, width, size=900):
+    """
+    ReportLab Drawing (a flowable) of a layout, scaled to `width` points.
+    `size` is the template size the geometry is taken from.
+    """
+    from reportlab.graphics.shapes import Drawing, Group, String, Circle
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    tpl = chart_template(size)
+    scale = width / float(size)
+    fill = _rl_color(PLANET_COLOR)
+    fs = tpl.planet_font_px
+
+    labels_group = Group()
+    for h, labels in enumerate(layout, start=1):
+        if not labels:
+            continue
+        anchor, rows = _place_labels(tpl, h, labels, lambda s: stringWidth(s, RL_FONT_BOLD, fs))
+        ta = _TEXT_ANCHOR[anchor]
+        for lab, x, base, mx, my in rows:
+            labels_group.add(String(x, size - base, lab, fontName=RL_FONT_BOLD, fontSize=fs,
+                                    fillColor=fill, textAnchor=ta))
+            labels_group.add(Circle(mx, size - my, tpl.marker_radius, fillColor=fill, strokeColor=None))
+
+    d = Drawing(width, width)
+    d.add(Group(_rl_frame(size), labels_group, transform=(scale, 0, 0, scale, 0, 0)))
+    return d
+
+
+def chart_drawing_for(planet_data, house_cusps_degrees, width, show_pada=True):
+    """chart_drawing() straight from chart data."""
+    return chart_drawing(chart_layout(planet_data, house_cusps_degrees, show_pada), width)
@@ -0,0 +1,31 @@
+"""Bulk table regression tests (python -m pytest tests)."""
+import pandas as pd
+
+import kp_engine.geocode
+from kp_engine.bulk_tables import tabulate_chunk
+
+PLACES = {'London': (51.50853, -0.12574), 'Mumbai, India': (19.07283, 72.88261)}
+
+
+def test_mixed_coordinates_and_places(monkeypatch):
+    """Rows with lat/lng and rows left blank for geocoding share one chunk."""
+    looked_up = []
+
+    def fake_coordinates(place):
+        looked_up.append(place)
+        return PLACES.get(place, (None, None))
+
+    monkeypatch.setattr(kp_engine.geocode, 'get_coordinates', fake_coordinates)
+    df = pd.DataFrame({
+        'id': ['1', '2', '3', '4', '5'],
+        'dob': ['15/08/1990', '01/01/1985', '1970-03-04', '02/02/2000', 'bad'],
+        'tob': ['05:30', '12:00', '23:10', '07:45', '07:45'],
+        'place': ['', 'London', 'New York', 'Mumbai, India', 'London'],
+        'lat': ['19.076', '', '40.71', '', ''],
+        'lng': ['72.8777', '', '-74.0', '', ''],
+    })
+    payload, records, rows, errors = tabulate_chunk(df)
+    assert (records, rows) == (5, 40)
+    assert errors == [('5', "bad date or time")]
+    assert looked_up == ['London', 'Mumbai, India']
+    assert sorted({line.split(",")[0] for line in payload.splitlines()}) == ['1', '2', '3', '4']
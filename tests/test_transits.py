@@ -0,0 +1,28 @@
+"""Transit scanning regression tests (python -m pytest tests)."""
+import pytest
+import swisseph as swe
+
+from kp_engine.transits import DIVISIONS, position, scan_transits, segment_index
+
+NODE_WINDOWS = [
+    ('sub', (2000, 1, 1), (2000, 3, 1)),            # stations on Jan 8, 14, 21, 24, 28, ...
+    ('nakshatra', (1966, 8, 10), (1966, 9, 10)),     # a crossing two days after a station
+    ('sub', (2040, 1, 1), (2043, 1, 1)),             # used to run out of the ephemeris range
+]
+
+
+@pytest.mark.parametrize('body', ['Rahu', 'Ketu'])
+@pytest.mark.parametrize('division, start, end', NODE_WINDOWS)
+def test_node_crossings(body, division, start, end):
+    """Every node event is a real crossing, and consecutive events chain segment to segment."""
+    start_jd, end_jd = swe.julday(*start, 0.0), swe.julday(*end, 0.0)
+    events = scan_transits(body, division, start_jd, end_jd)
+    n = len(DIVISIONS[division])
+    segment = segment_index(position(body, start_jd)[0], division)
+    for ev in events:
+        assert start_jd <= ev.jd < end_jd
+        lon = position(body, ev.jd)[0]
+        assert abs((lon - ev.boundary + 180.0) % 360.0 - 180.0) < 1e-5
+        assert (ev.index - ev.direction) % n == segment
+        segment = ev.index
+    assert segment == segment_index(position(body, end_jd)[0], division)